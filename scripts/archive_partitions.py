@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Archive old monthly partitions of the time-series tables
+Detaches partitions older than a cutoff, exports them to gzip-compressed
+CSV files and drops them (or restores a previously archived partition)
+"""
+
+import argparse
+import sys
+import os
+from datetime import date
+
+# Add src to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.config.connection import get_engine, get_session
+from src.models.partitions import (
+    add_months, list_partitions, month_from_partition_name, month_start, archive_partition, restore_partition
+)
+
+
+def archive_old_partitions(table: str, older_than_months: int, directory: str, keep: bool) -> list:
+    """Archive every partition of a table older than a number of months
+
+    Args:
+        table (str): Partitioned table
+        older_than_months (int): Partitions whose month ends before this many months ago are archived
+        directory (str): Directory receiving the archives
+        keep (bool): Keep the detached tables instead of dropping them
+
+    Returns:
+        list: Paths of the archive files
+    """
+    cutoff = add_months(month_start(date.today()), -older_than_months)
+    session = get_session()
+    try:
+        partitions = list_partitions(session, table)
+    finally:
+        session.close()
+
+    old = [name for name in partitions if month_from_partition_name(name) < cutoff]
+    print(f"Archiving {len(old)}/{len(partitions)} partitions of {table} older than {cutoff}")
+
+    engine = get_engine()
+    return [archive_partition(engine, table, month_from_partition_name(name), directory, keep) for name in old]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Archive old monthly partitions')
+    parser.add_argument('--table', default='artist_stats_keyed', choices=['artist_stats_keyed', 'spotify_charts_keyed'],
+                        help='Partitioned table to archive')
+    parser.add_argument('--older-than-months', type=int, default=24,
+                        help='Archive partitions older than this many months')
+    parser.add_argument('--directory', default='data/archive', help='Directory receiving the archives')
+    parser.add_argument('--keep', action='store_true', help='Keep the detached tables in the database')
+    parser.add_argument('--restore', metavar='ARCHIVE', help='Restore an archived partition instead')
+
+    args = parser.parse_args()
+
+    if args.restore:
+        restore_partition(get_engine(), args.table, args.restore)
+    else:
+        archive_old_partitions(args.table, args.older_than_months, args.directory, args.keep)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""Benchmark artist_stats queries on a B-tree heap vs monthly partitions with BRIN
+
+Generates a synthetic multi-year series (ARTISTS artists x YEARS years of
+daily rows, inserted in date order like the daily loads) into
+benchmark.stats_heap (single table, B-tree primary key and date index)
+and benchmark.stats_partitioned (monthly partitions, primary key and a
+BRIN index on date), then compares EXPLAIN ANALYZE execution times of
+the per-artist history and per-day leaderboard queries, and index sizes.
+"""
+
+import subprocess
+import re
+import sys
+import os
+from datetime import date
+import dotenv
+import matplotlib.pyplot as plt
+import numpy as np
+import seaborn as sns
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.models.partitions import months_between, monthly_partition_ddl
+
+dotenv.load_dotenv()
+
+DB_NAME = os.getenv("DB_NAME", "your_database_name")
+PSQL_COMMAND = ["psql", "-d", DB_NAME, "-c"]
+RUNS = 20
+
+ARTISTS = 5000
+FIRST_DAY = date(2020, 1, 1)
+LAST_DAY = date(2024, 12, 31)
+
+COLUMNS = "artist_id, date, total_streams, daily_streams, listeners"
+
+SETUP_QUERY = """
+CREATE SCHEMA IF NOT EXISTS benchmark;
+DROP TABLE IF EXISTS benchmark.stats_heap;
+DROP TABLE IF EXISTS benchmark.stats_partitioned CASCADE;
+
+CREATE TABLE benchmark.stats_heap (
+    artist_id VARCHAR NOT NULL,
+    date DATE NOT NULL,
+    total_streams BIGINT,
+    daily_streams INTEGER,
+    listeners BIGINT,
+    PRIMARY KEY (artist_id, date)
+);
+CREATE INDEX ON benchmark.stats_heap (date);
+
+CREATE TABLE benchmark.stats_partitioned (
+    artist_id VARCHAR NOT NULL,
+    date DATE NOT NULL,
+    total_streams BIGINT,
+    daily_streams INTEGER,
+    listeners BIGINT,
+    PRIMARY KEY (artist_id, date)
+) PARTITION BY RANGE (date);
+CREATE INDEX ON benchmark.stats_partitioned USING brin (date);
+"""
+
+# Rows ordered by date, as the daily pipeline appends them
+SYNTHETIC_ROWS = f"""
+SELECT 'artist' || lpad(a::text, 6, '0'), d::date,
+       (a * 1000 + (d::date - DATE '{FIRST_DAY}') * 37)::bigint,
+       (1000 + (a * 7919 + (d::date - DATE '{FIRST_DAY}') * 104729) % 100000)::int,
+       (10000 + (a * 31 + (d::date - DATE '{FIRST_DAY}')) % 1000000)::bigint
+FROM generate_series(DATE '{FIRST_DAY}', DATE '{LAST_DAY}', INTERVAL '1 day') AS d,
+     generate_series(1, {ARTISTS}) AS a
+ORDER BY d, a
+"""
+
+LOAD_QUERY = f"""
+INSERT INTO benchmark.stats_heap ({COLUMNS}) {SYNTHETIC_ROWS};
+INSERT INTO benchmark.stats_partitioned ({COLUMNS}) {SYNTHETIC_ROWS};
+ANALYZE benchmark.stats_heap;
+ANALYZE benchmark.stats_partitioned;
+"""
+
+SIZE_QUERY = """
+SELECT COALESCE(sum(pg_indexes_size(relid)), 0)
+FROM pg_partition_tree('{table}')
+"""
+
+# {table} is replaced by the heap or partitioned table
+QUERIES = {
+    "Artist history, 1 year": f"""
+        EXPLAIN ANALYZE
+        SELECT date, daily_streams, listeners
+        FROM {{table}}
+        WHERE artist_id = 'artist001234' AND date > DATE '{LAST_DAY}' - 365
+        ORDER BY date;
+    """,
+    "Artist full history": """
+        EXPLAIN ANALYZE
+        SELECT date, daily_streams
+        FROM {table}
+        WHERE artist_id = 'artist001234'
+        ORDER BY date;
+    """,
+    "Daily leaderboard": f"""
+        EXPLAIN ANALYZE
+        SELECT artist_id, daily_streams
+        FROM {{table}}
+        WHERE date = DATE '{LAST_DAY}'
+        ORDER BY daily_streams DESC
+        LIMIT 100;
+    """,
+    "Last 30 days, top artists": f"""
+        EXPLAIN ANALYZE
+        SELECT artist_id, SUM(daily_streams) AS streams
+        FROM {{table}}
+        WHERE date > DATE '{LAST_DAY}' - 30
+        GROUP BY artist_id
+        ORDER BY streams DESC
+        LIMIT 100;
+    """,
+}
+
+
+def psql(query):
+    return subprocess.run(PSQL_COMMAND + [query], capture_output=True, text=True)
+
+
+def setup():
+    """Build the heap and partitioned tables from the synthetic series"""
+    psql(SETUP_QUERY)
+    ddl = [monthly_partition_ddl('benchmark.stats_partitioned', month) for month in months_between(FIRST_DAY, LAST_DAY)]
+    psql(";\n".join(ddl) + ";")
+    print(f"Generating {ARTISTS} artists x {(LAST_DAY - FIRST_DAY).days + 1} days of stats...")
+    psql(LOAD_QUERY)
+
+
+def index_size(table):
+    """Total size in bytes of the indexes of a table and its partitions"""
+    result = psql(SIZE_QUERY.format(table=table)).stdout
+    return int(re.search(r"^\s*(\d+)\s*$", result, re.MULTILINE).group(1))
+
+
+def run_query(query, query_name):
+    """Run benchmark query, print and return execution times
+
+    Args:
+        query (str): the query to run
+        query_name (str): how to name the query in the output
+
+    Returns:
+        list: list of execution times
+    """
+    print(f"Benchmarking {query_name}...")
+    execution_times = []
+
+    for _ in range(RUNS):
+        result = psql(query)
+        match = re.search(r"Execution Time: ([\d.]+) ms", result.stdout)
+        execution_times.append(float(match.group(1)))
+
+    print(f"Average {query_name} Time: {np.mean(execution_times):.2f} ms")
+    return execution_times
+
+
+setup()
+layouts = [("Heap + B-tree", "benchmark.stats_heap"), ("Partitioned + BRIN", "benchmark.stats_partitioned")]
+
+for layout, table in layouts:
+    print(f"{layout} index size: {index_size(table) / 1024 / 1024:.1f} MB")
+
+results = []
+for name, query in QUERIES.items():
+    for layout, table in layouts:
+        times = run_query(query.format(table=table), f"{name} ({layout})")
+        results.extend({"Query": name, "Layout": layout, "Execution Time": t} for t in times)
+
+# Plot
+df = pd.DataFrame(results)
+
+plt.figure(figsize=(12, 6))
+sns.barplot(data=df, x="Query", y="Execution Time", hue="Layout")
+plt.title("artist_stats queries: B-tree heap vs monthly partitions with BRIN")
+plt.ylabel("Execution Time (ms)")
+plt.grid(True, axis="y")
+plt.tight_layout()
+plt.show()
@@ -0,0 +1,98 @@
+"""Benchmark the INSERT ... VALUES loader path against the COPY staging path
+
+Synthetic songs and chart entries are loaded through both modes of
+PostgresLoader, on disjoint date ranges so each run inserts fresh rows,
+and removed again afterwards.
+
+Usage:
+    python scripts/benchmark/copy_loader.py [rows]
+"""
+
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import sqlalchemy as sa
+from src.config.connection import get_session
+from src.loaders.postgres_loader import PostgresLoader
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+SONGS = 200
+SONG_PREFIX = "bench_copy_"
+
+
+def build_chart_rows(country_code: str, start_date: date, rows: int) -> list:
+    """Build synthetic chart entries cycling over the benchmark songs
+
+    Args:
+        country_code (str): country the entries are charted in
+        start_date (date): first chart date
+        rows (int): number of entries to build
+
+    Returns:
+        list: list of chart entry dictionaries
+    """
+    return [
+        {
+            'date': start_date + timedelta(days=i // SONGS),
+            'country_code': country_code,
+            'song_id': f"{SONG_PREFIX}{i % SONGS}",
+            'streams': 1000 + i,
+            'total_streams': 100000 + i,
+            'days': i // SONGS + 1,
+            'rank': i % SONGS + 1
+        }
+        for i in range(rows)
+    ]
+
+
+def time_load(loader: PostgresLoader, rows: list) -> float:
+    """Load chart rows and return the elapsed time in seconds"""
+    start = time.perf_counter()
+    loader.load_spotify_charts(rows)
+    elapsed = time.perf_counter() - start
+    loader.close_session()
+    return elapsed
+
+
+def cleanup(session):
+    session.execute(
+        sa.text("DELETE FROM spotify_charts_keyed c USING song s WHERE s.song_key = c.song_key AND s.song_id LIKE :prefix"),
+        {"prefix": f"{SONG_PREFIX}%"}
+    )
+    session.execute(sa.text("DELETE FROM song WHERE song_id LIKE :prefix"), {"prefix": f"{SONG_PREFIX}%"})
+    session.commit()
+
+
+def main():
+    session = get_session()
+    country_code = session.execute(sa.text("SELECT country_code FROM country ORDER BY country_code LIMIT 1")).scalar()
+    if not country_code:
+        print("No countries found, run scripts/setup_database.py first")
+        return
+
+    cleanup(session)
+    PostgresLoader().load_songs([{'song_id': f"{SONG_PREFIX}{i}", 'name': f"Benchmark song {i}"} for i in range(SONGS)])
+
+    days = ROWS // SONGS + 1
+    insert_rows = build_chart_rows(country_code, date(2000, 1, 1), ROWS)
+    copy_rows = build_chart_rows(country_code, date(2000, 1, 1) + timedelta(days=days), ROWS)
+
+    try:
+        print(f"Benchmarking {ROWS} chart entries...")
+        insert_time = time_load(PostgresLoader(), insert_rows)
+        copy_time = time_load(PostgresLoader(bulk_mode=True), copy_rows)
+
+        print(f"INSERT ... VALUES: {insert_time:.2f} s ({ROWS / insert_time:,.0f} rows/s)")
+        print(f"COPY + merge:      {copy_time:.2f} s ({ROWS / copy_time:,.0f} rows/s)")
+        print(f"Speed-up:          {insert_time / copy_time:.1f}x")
+    finally:
+        cleanup(session)
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Benchmark genre-by-country-by-day aggregations
+
+Compares unnesting sp_artist->'genres' for every charted artist with
+joining the artist_genre table, on the latest chart day, and looking up
+the artists of one genre through the GIN index on the genres path
+against a full scan of the artist table.
+"""
+
+import subprocess
+import re
+import dotenv
+import os
+import matplotlib.pyplot as plt
+import numpy as np
+import seaborn as sns
+import pandas as pd
+
+dotenv.load_dotenv()
+
+DB_NAME = os.getenv("DB_NAME", "your_database_name")
+PSQL_COMMAND = ["psql", "-d", DB_NAME, "-c"]
+RUNS = 20
+
+QUERIES = {
+    "Top genres per country, one day": {
+        "JSONB unnest": """
+            EXPLAIN ANALYZE
+            SELECT co.country_code, genre, SUM(c.streams) AS streams
+            FROM spotify_charts_keyed c
+            JOIN country co ON co.country_key = c.country_key
+            JOIN artist_song_keyed ars ON ars.song_key = c.song_key
+            JOIN artist a ON a.artist_key = ars.artist_key,
+            LATERAL jsonb_array_elements_text(a.sp_artist->'genres') AS genre
+            WHERE c.date = (SELECT max(date) FROM spotify_charts_keyed)
+            GROUP BY co.country_code, genre;
+        """,
+        "artist_genre": """
+            EXPLAIN ANALYZE
+            SELECT co.country_code, g.genre, SUM(c.streams) AS streams
+            FROM spotify_charts_keyed c
+            JOIN country co ON co.country_key = c.country_key
+            JOIN artist_song_keyed ars ON ars.song_key = c.song_key
+            JOIN artist_genre g ON g.artist_key = ars.artist_key
+            WHERE c.date = (SELECT max(date) FROM spotify_charts_keyed)
+            GROUP BY co.country_code, g.genre;
+        """,
+    },
+    "Artists of one genre": {
+        "JSONB scan": """
+            SET enable_bitmapscan = off;
+            EXPLAIN ANALYZE
+            SELECT spotify_id FROM artist WHERE sp_artist->'genres' ? 'pop';
+        """,
+        "GIN index": """
+            EXPLAIN ANALYZE
+            SELECT spotify_id FROM artist WHERE sp_artist->'genres' ? 'pop';
+        """,
+    },
+}
+
+
+def psql(query):
+    return subprocess.run(PSQL_COMMAND + [query], capture_output=True, text=True)
+
+
+def run_query(query, query_name):
+    """Run benchmark query, print and return execution times
+
+    Args:
+        query (str): the query to run
+        query_name (str): how to name the query in the output
+
+    Returns:
+        list: list of execution times
+    """
+    print(f"Benchmarking {query_name}...")
+    execution_times = []
+
+    for _ in range(RUNS):
+        result = psql(query)
+        match = re.search(r"Execution Time: ([\d.]+) ms", result.stdout)
+        execution_times.append(float(match.group(1)))
+
+    print(f"Average {query_name} Time: {np.mean(execution_times):.2f} ms")
+    return execution_times
+
+
+results = []
+for name, variants in QUERIES.items():
+    for access, query in variants.items():
+        times = run_query(query, f"{name} ({access})")
+        results.extend({"Query": name, "Access path": access, "Execution Time": t} for t in times)
+
+# Plot
+df = pd.DataFrame(results)
+
+plt.figure(figsize=(12, 6))
+sns.barplot(data=df, x="Query", y="Execution Time", hue="Access path")
+plt.title("Genre queries: JSONB traversal vs artist_genre and GIN index")
+plt.ylabel("Execution Time (ms)")
+plt.grid(True, axis="y")
+plt.tight_layout()
+plt.show()
@@ -0,0 +1,140 @@
+"""Benchmark date-range chart queries on a single heap vs monthly partitions
+
+Copies public.spotify_charts into benchmark.charts_heap (plain table, as
+before the partitioning migration) and benchmark.charts_partitioned
+(monthly range partitions), then compares EXPLAIN ANALYZE execution times.
+"""
+
+import subprocess
+import re
+import sys
+import os
+import dotenv
+import matplotlib.pyplot as plt
+import numpy as np
+import seaborn as sns
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.models.partitions import months_between, monthly_partition_ddl
+
+dotenv.load_dotenv()
+
+DB_NAME = os.getenv("DB_NAME", "your_database_name")
+PSQL_COMMAND = ["psql", "-d", DB_NAME, "-c"]
+RUNS = 50
+
+COLUMNS = "date, country_code, song_id, streams, total_streams, days, rank"
+
+SETUP_QUERY = f"""
+CREATE SCHEMA IF NOT EXISTS benchmark;
+DROP TABLE IF EXISTS benchmark.charts_heap;
+DROP TABLE IF EXISTS benchmark.charts_partitioned CASCADE;
+
+CREATE TABLE benchmark.charts_heap (LIKE public.spotify_charts INCLUDING DEFAULTS);
+ALTER TABLE benchmark.charts_heap ADD PRIMARY KEY (song_id, country_code, date);
+INSERT INTO benchmark.charts_heap ({COLUMNS}) SELECT {COLUMNS} FROM public.spotify_charts;
+
+CREATE TABLE benchmark.charts_partitioned (LIKE public.spotify_charts INCLUDING DEFAULTS)
+PARTITION BY RANGE (date);
+ALTER TABLE benchmark.charts_partitioned ADD PRIMARY KEY (song_id, country_code, date);
+"""
+
+LOAD_QUERY = f"""
+INSERT INTO benchmark.charts_partitioned ({COLUMNS}) SELECT {COLUMNS} FROM public.spotify_charts;
+ANALYZE benchmark.charts_heap;
+ANALYZE benchmark.charts_partitioned;
+"""
+
+# {table} is replaced by the heap or partitioned table, {last} by the latest chart date
+QUERIES = {
+    "Last 7 days, all countries": """
+        EXPLAIN ANALYZE
+        SELECT country_code, SUM(streams)
+        FROM {table}
+        WHERE date > DATE '{last}' - 7 AND date <= DATE '{last}'
+        GROUP BY country_code;
+    """,
+    "One month, top songs": """
+        EXPLAIN ANALYZE
+        SELECT song_id, SUM(streams) AS streams
+        FROM {table}
+        WHERE date >= date_trunc('month', DATE '{last}') AND date <= DATE '{last}'
+        GROUP BY song_id
+        ORDER BY streams DESC
+        LIMIT 50;
+    """,
+    "Single day top 200": """
+        EXPLAIN ANALYZE
+        SELECT song_id, rank, streams
+        FROM {table}
+        WHERE date = DATE '{last}' AND country_code = 'US'
+        ORDER BY rank
+        LIMIT 200;
+    """,
+}
+
+
+def psql(query):
+    return subprocess.run(PSQL_COMMAND + [query], capture_output=True, text=True)
+
+
+def setup():
+    """Build the heap and partitioned copies of spotify_charts
+
+    Returns:
+        str: latest chart date in the data
+    """
+    psql(SETUP_QUERY)
+    bounds = psql("SELECT min(date), max(date) FROM public.spotify_charts;").stdout
+    first, last = re.findall(r"\d{4}-\d{2}-\d{2}", bounds)
+
+    ddl = [
+        monthly_partition_ddl('benchmark.charts_partitioned', month)
+        for month in months_between(pd.Timestamp(first).date(), pd.Timestamp(last).date())
+    ]
+    psql(";\n".join(ddl) + ";")
+    psql(LOAD_QUERY)
+    return last
+
+
+def run_query(query, query_name):
+    """Run benchmark query, print and return execution times
+
+    Args:
+        query (str): the query to run
+        query_name (str): how to name the query in the output
+
+    Returns:
+        list: list of execution times
+    """
+    print(f"Benchmarking {query_name}...")
+    execution_times = []
+
+    for _ in range(RUNS):
+        result = psql(query)
+        match = re.search(r"Execution Time: ([\d.]+) ms", result.stdout)
+        execution_times.append(float(match.group(1)))
+
+    print(f"Average {query_name} Time: {np.mean(execution_times):.2f} ms")
+    return execution_times
+
+
+last_date = setup()
+results = []
+for name, query in QUERIES.items():
+    for layout, table in [("Heap", "benchmark.charts_heap"), ("Partitioned", "benchmark.charts_partitioned")]:
+        times = run_query(query.format(table=table, last=last_date), f"{name} ({layout})")
+        results.extend({"Query": name, "Layout": layout, "Execution Time": t} for t in times)
+
+# Plot
+df = pd.DataFrame(results)
+
+plt.figure(figsize=(12, 6))
+sns.barplot(data=df, x="Query", y="Execution Time", hue="Layout")
+plt.title("Date-range queries: single heap vs monthly partitions")
+plt.ylabel("Execution Time (ms)")
+plt.grid(True, axis="y")
+plt.tight_layout()
+plt.show()
@@ -0,0 +1,108 @@
+"""Benchmark long-range chart trends on the daily rows vs the rollup tables
+
+Compares monthly streams per song per country and yearly top songs over
+the last three full years, computed from spotify_charts_keyed and read
+from the chart_rollup_month and chart_rollup_year tables.
+"""
+
+import subprocess
+import re
+import dotenv
+import os
+import matplotlib.pyplot as plt
+import numpy as np
+import seaborn as sns
+import pandas as pd
+
+dotenv.load_dotenv()
+
+DB_NAME = os.getenv("DB_NAME", "your_database_name")
+PSQL_COMMAND = ["psql", "-d", DB_NAME, "-c"]
+RUNS = 20
+
+# The last three full years before the current one
+RANGE = "date_trunc('year', CURRENT_DATE) - interval '3 years' AND date_trunc('year', CURRENT_DATE) - interval '1 day'"
+
+QUERIES = {
+    "Monthly streams per song, one country": {
+        "Daily rows": f"""
+            EXPLAIN ANALYZE
+            SELECT date_trunc('month', CAST(c.date AS timestamp)) AS month, c.song_key, SUM(c.streams)
+            FROM spotify_charts_keyed c
+            WHERE c.country_key = (SELECT country_key FROM country WHERE country_code = 'US')
+              AND c.date BETWEEN {RANGE}
+            GROUP BY 1, c.song_key;
+        """,
+        "Rollup": f"""
+            EXPLAIN ANALYZE
+            SELECT r.period_start, r.song_key, r.streams
+            FROM chart_rollup_month r
+            WHERE r.country_key = (SELECT country_key FROM country WHERE country_code = 'US')
+              AND r.period_start BETWEEN {RANGE};
+        """,
+    },
+    "Yearly top 100 songs, all countries": {
+        "Daily rows": f"""
+            EXPLAIN ANALYZE
+            SELECT date_trunc('year', CAST(c.date AS timestamp)) AS year, c.song_key, SUM(c.streams) AS streams
+            FROM spotify_charts_keyed c
+            WHERE c.date BETWEEN {RANGE}
+            GROUP BY 1, c.song_key
+            ORDER BY streams DESC
+            LIMIT 100;
+        """,
+        "Rollup": f"""
+            EXPLAIN ANALYZE
+            SELECT r.period_start, r.song_key, SUM(r.streams) AS streams
+            FROM chart_rollup_year r
+            WHERE r.period_start BETWEEN {RANGE}
+            GROUP BY r.period_start, r.song_key
+            ORDER BY streams DESC
+            LIMIT 100;
+        """,
+    },
+}
+
+
+def psql(query):
+    return subprocess.run(PSQL_COMMAND + [query], capture_output=True, text=True)
+
+
+def run_query(query, query_name):
+    """Run benchmark query, print and return execution times
+
+    Args:
+        query (str): the query to run
+        query_name (str): how to name the query in the output
+
+    Returns:
+        list: list of execution times
+    """
+    print(f"Benchmarking {query_name}...")
+    execution_times = []
+
+    for _ in range(RUNS):
+        result = psql(query)
+        match = re.search(r"Execution Time: ([\d.]+) ms", result.stdout)
+        execution_times.append(float(match.group(1)))
+
+    print(f"Average {query_name} Time: {np.mean(execution_times):.2f} ms")
+    return execution_times
+
+
+results = []
+for name, variants in QUERIES.items():
+    for source, query in variants.items():
+        times = run_query(query, f"{name} ({source})")
+        results.extend({"Query": name, "Source": source, "Execution Time": t} for t in times)
+
+# Plot
+df = pd.DataFrame(results)
+
+plt.figure(figsize=(12, 6))
+sns.barplot(data=df, x="Query", y="Execution Time", hue="Source")
+plt.title("Three-year chart trends: daily rows vs rollup tables")
+plt.ylabel("Execution Time (ms)")
+plt.grid(True, axis="y")
+plt.tight_layout()
+plt.show()
@@ -0,0 +1,183 @@
+"""Benchmark the covering secondary indexes of charts and stats
+
+Copies spotify_charts, artist_song and artist_stats into the benchmark
+schema with their primary keys only, runs the read queries with
+EXPLAIN ANALYZE, adds the secondary indexes of the models and runs them
+again. The write cost is measured the same way, by inserting a shifted
+copy of the latest month of charts (rolled back) before and after the
+indexes are added, and the size of every index is reported.
+"""
+
+import subprocess
+import re
+import sys
+import os
+import dotenv
+import matplotlib.pyplot as plt
+import numpy as np
+import seaborn as sns
+import pandas as pd
+
+dotenv.load_dotenv()
+
+DB_NAME = os.getenv("DB_NAME", "your_database_name")
+PSQL_COMMAND = ["psql", "-d", DB_NAME, "-c"]
+RUNS = 20
+
+CHART_COLUMNS = "date, country_code, song_id, streams, total_streams, days, rank"
+
+SETUP_QUERY = f"""
+CREATE SCHEMA IF NOT EXISTS benchmark;
+DROP TABLE IF EXISTS benchmark.charts, benchmark.artist_song, benchmark.stats;
+
+CREATE TABLE benchmark.charts (LIKE public.spotify_charts INCLUDING DEFAULTS);
+ALTER TABLE benchmark.charts ADD PRIMARY KEY (song_id, country_code, date);
+INSERT INTO benchmark.charts ({CHART_COLUMNS}) SELECT {CHART_COLUMNS} FROM public.spotify_charts;
+
+CREATE TABLE benchmark.artist_song AS SELECT * FROM public.artist_song;
+ALTER TABLE benchmark.artist_song ADD PRIMARY KEY (artist_id, song_id);
+
+CREATE TABLE benchmark.stats AS SELECT * FROM public.artist_stats ORDER BY date, artist_id;
+ALTER TABLE benchmark.stats ADD PRIMARY KEY (artist_id, date);
+
+ANALYZE benchmark.charts;
+ANALYZE benchmark.artist_song;
+ANALYZE benchmark.stats;
+"""
+
+# Same definitions as the indexes of src/models/database.py
+INDEX_QUERY = """
+CREATE INDEX ix_bench_charts_country_date_rank ON benchmark.charts (country_code, date, rank) INCLUDE (song_id, streams);
+CREATE INDEX ix_bench_charts_date_rank ON benchmark.charts (date, rank) INCLUDE (country_code, song_id, streams);
+CREATE INDEX ix_bench_artist_song_song_id ON benchmark.artist_song (song_id, artist_id);
+CREATE INDEX ix_bench_stats_date_daily_streams ON benchmark.stats (date, daily_streams DESC) INCLUDE (artist_id, listeners);
+VACUUM ANALYZE benchmark.charts;
+VACUUM ANALYZE benchmark.artist_song;
+VACUUM ANALYZE benchmark.stats;
+"""
+
+SIZE_QUERY = """
+SELECT indexrelid::regclass, pg_relation_size(indexrelid)
+FROM pg_index
+WHERE indrelid IN ('benchmark.charts'::regclass, 'benchmark.artist_song'::regclass, 'benchmark.stats'::regclass);
+"""
+
+# {country}, {date}, {stats_date} and {artist} are filled from the data
+QUERIES = {
+    "Top 200, one country and date": """
+        EXPLAIN ANALYZE
+        SELECT rank, song_id, streams
+        FROM benchmark.charts
+        WHERE country_code = '{country}' AND date = DATE '{date}'
+        ORDER BY rank
+        LIMIT 200;
+    """,
+    "Top 200 with artists": """
+        EXPLAIN ANALYZE
+        SELECT c.rank, c.song_id, ars.artist_id
+        FROM benchmark.charts c
+        JOIN benchmark.artist_song ars ON ars.song_id = c.song_id
+        WHERE c.country_code = '{country}' AND c.date = DATE '{date}'
+        ORDER BY c.rank;
+    """,
+    "Chart runs of an artist": """
+        EXPLAIN ANALYZE
+        SELECT c.country_code, c.date, c.rank
+        FROM benchmark.artist_song ars
+        JOIN benchmark.charts c ON c.song_id = ars.song_id
+        WHERE ars.artist_id = '{artist}';
+    """,
+    "All countries on a date": """
+        EXPLAIN ANALYZE
+        SELECT country_code, song_id, streams
+        FROM benchmark.charts
+        WHERE date = DATE '{date}' AND rank <= 10;
+    """,
+    "Artist leaderboard on a date": """
+        EXPLAIN ANALYZE
+        SELECT artist_id, daily_streams
+        FROM benchmark.stats
+        WHERE date = DATE '{stats_date}'
+        ORDER BY daily_streams DESC NULLS LAST
+        LIMIT 100;
+    """,
+}
+
+# Latest month of charts shifted 100 years ahead, inserted and rolled back
+WRITE_QUERY = f"""
+BEGIN;
+EXPLAIN ANALYZE
+INSERT INTO benchmark.charts ({CHART_COLUMNS})
+SELECT date + INTERVAL '100 years', country_code, song_id, streams, total_streams, days, rank
+FROM benchmark.charts
+WHERE date > DATE '{{date}}' - 30;
+ROLLBACK;
+"""
+
+
+def psql(query):
+    return subprocess.run(PSQL_COMMAND + [query], capture_output=True, text=True)
+
+
+def scalar(query):
+    """First value of the first row of a query"""
+    return psql(query).stdout.splitlines()[2].strip()
+
+
+def run_query(query, query_name):
+    """Run benchmark query, print and return execution times
+
+    Args:
+        query (str): the query to run
+        query_name (str): how to name the query in the output
+
+    Returns:
+        list: list of execution times
+    """
+    print(f"Benchmarking {query_name}...")
+    execution_times = []
+
+    for _ in range(RUNS):
+        result = psql(query)
+        match = re.search(r"Execution Time: ([\d.]+) ms", result.stdout)
+        execution_times.append(float(match.group(1)))
+
+    print(f"Average {query_name} Time: {np.mean(execution_times):.2f} ms")
+    return execution_times
+
+
+def run_all(indexes, parameters):
+    rows = []
+    for name, query in {**QUERIES, "Insert one month of charts": WRITE_QUERY}.items():
+        times = run_query(query.format(**parameters), f"{name} ({indexes})")
+        rows.extend({"Query": name, "Indexes": indexes, "Execution Time": t} for t in times)
+    return rows
+
+
+psql(SETUP_QUERY)
+parameters = {
+    "date": scalar("SELECT max(date) FROM benchmark.charts;"),
+    "country": scalar("SELECT country_code FROM benchmark.charts GROUP BY country_code ORDER BY count(*) DESC LIMIT 1;"),
+    "artist": scalar("""
+        SELECT ars.artist_id FROM benchmark.artist_song ars JOIN benchmark.charts c USING (song_id)
+        GROUP BY ars.artist_id ORDER BY count(*) DESC LIMIT 1;
+    """),
+    "stats_date": scalar("SELECT COALESCE(max(date), CURRENT_DATE) FROM benchmark.stats;"),
+}
+
+results = run_all("Primary keys only", parameters)
+psql(INDEX_QUERY)
+print(psql(SIZE_QUERY).stdout)
+results += run_all("Secondary indexes", parameters)
+
+# Plot
+df = pd.DataFrame(results)
+
+plt.figure(figsize=(14, 6))
+sns.barplot(data=df, x="Query", y="Execution Time", hue="Indexes")
+plt.title("Chart and stats queries: primary keys only vs covering secondary indexes")
+plt.ylabel("Execution Time (ms)")
+plt.yscale("log")
+plt.grid(True, axis="y")
+plt.tight_layout()
+plt.show()
@@ -0,0 +1,158 @@
+"""Benchmark text natural keys against integer surrogate keys in the fact tables
+
+Builds benchmark copies of the charts and artist-song relationships keyed
+by the Spotify IDs and country codes (text) and by the integer surrogate
+keys (as stored in spotify_charts_keyed and artist_song_keyed), reports
+the heap and index size of each and compares EXPLAIN ANALYZE execution
+times of the joins between them.
+"""
+
+import subprocess
+import re
+import dotenv
+import os
+import matplotlib.pyplot as plt
+import numpy as np
+import seaborn as sns
+import pandas as pd
+
+dotenv.load_dotenv()
+
+DB_NAME = os.getenv("DB_NAME", "your_database_name")
+PSQL_COMMAND = ["psql", "-d", DB_NAME, "-c"]
+RUNS = 20
+
+SETUP_QUERY = """
+CREATE SCHEMA IF NOT EXISTS benchmark;
+DROP TABLE IF EXISTS benchmark.charts_text, benchmark.charts_keys, benchmark.artist_song_text, benchmark.artist_song_keys;
+
+CREATE TABLE benchmark.charts_text AS
+SELECT date, country_code, song_id, streams, total_streams, days, rank FROM public.spotify_charts ORDER BY date;
+ALTER TABLE benchmark.charts_text ADD PRIMARY KEY (song_id, country_code, date);
+CREATE INDEX ON benchmark.charts_text (country_code, date, rank) INCLUDE (song_id, streams);
+
+CREATE TABLE benchmark.charts_keys AS
+SELECT date, country_key, song_key, streams, total_streams, days, rank FROM public.spotify_charts_keyed ORDER BY date;
+ALTER TABLE benchmark.charts_keys ADD PRIMARY KEY (song_key, country_key, date);
+CREATE INDEX ON benchmark.charts_keys (country_key, date, rank) INCLUDE (song_key, streams);
+
+CREATE TABLE benchmark.artist_song_text AS SELECT artist_id, song_id FROM public.artist_song;
+ALTER TABLE benchmark.artist_song_text ADD PRIMARY KEY (artist_id, song_id);
+CREATE INDEX ON benchmark.artist_song_text (song_id, artist_id);
+
+CREATE TABLE benchmark.artist_song_keys AS SELECT artist_key, song_key FROM public.artist_song_keyed;
+ALTER TABLE benchmark.artist_song_keys ADD PRIMARY KEY (artist_key, song_key);
+CREATE INDEX ON benchmark.artist_song_keys (song_key, artist_key);
+
+VACUUM ANALYZE benchmark.charts_text;
+VACUUM ANALYZE benchmark.charts_keys;
+VACUUM ANALYZE benchmark.artist_song_text;
+VACUUM ANALYZE benchmark.artist_song_keys;
+"""
+
+SIZE_QUERY = """
+SELECT relname, pg_size_pretty(pg_table_size(oid)) AS heap, pg_size_pretty(pg_indexes_size(oid)) AS indexes
+FROM pg_class
+WHERE relnamespace = 'benchmark'::regnamespace
+  AND relname IN ('charts_text', 'charts_keys', 'artist_song_text', 'artist_song_keys')
+ORDER BY relname;
+"""
+
+QUERIES = {
+    "Streams per artist": {
+        "Text keys": """
+            EXPLAIN ANALYZE
+            SELECT ars.artist_id, SUM(c.streams)
+            FROM benchmark.charts_text c
+            JOIN benchmark.artist_song_text ars ON ars.song_id = c.song_id
+            GROUP BY ars.artist_id;
+        """,
+        "Surrogate keys": """
+            EXPLAIN ANALYZE
+            SELECT ars.artist_key, SUM(c.streams)
+            FROM benchmark.charts_keys c
+            JOIN benchmark.artist_song_keys ars ON ars.song_key = c.song_key
+            GROUP BY ars.artist_key;
+        """,
+    },
+    "Streams per country and song": {
+        "Text keys": """
+            EXPLAIN ANALYZE
+            SELECT country_code, song_id, SUM(streams)
+            FROM benchmark.charts_text
+            GROUP BY country_code, song_id;
+        """,
+        "Surrogate keys": """
+            EXPLAIN ANALYZE
+            SELECT country_key, song_key, SUM(streams)
+            FROM benchmark.charts_keys
+            GROUP BY country_key, song_key;
+        """,
+    },
+    "Top 200 with names": {
+        "Text keys": """
+            EXPLAIN ANALYZE
+            SELECT c.rank, s.name
+            FROM benchmark.charts_text c
+            JOIN public.song s ON s.song_id = c.song_id
+            WHERE c.country_code = 'US' AND c.date = (SELECT max(date) FROM benchmark.charts_text)
+            ORDER BY c.rank;
+        """,
+        "Surrogate keys": """
+            EXPLAIN ANALYZE
+            SELECT c.rank, s.name
+            FROM benchmark.charts_keys c
+            JOIN public.song s ON s.song_key = c.song_key
+            WHERE c.country_key = (SELECT country_key FROM public.country WHERE country_code = 'US')
+              AND c.date = (SELECT max(date) FROM benchmark.charts_keys)
+            ORDER BY c.rank;
+        """,
+    },
+}
+
+
+def psql(query):
+    return subprocess.run(PSQL_COMMAND + [query], capture_output=True, text=True)
+
+
+def run_query(query, query_name):
+    """Run benchmark query, print and return execution times
+
+    Args:
+        query (str): the query to run
+        query_name (str): how to name the query in the output
+
+    Returns:
+        list: list of execution times
+    """
+    print(f"Benchmarking {query_name}...")
+    execution_times = []
+
+    for _ in range(RUNS):
+        result = psql(query)
+        match = re.search(r"Execution Time: ([\d.]+) ms", result.stdout)
+        execution_times.append(float(match.group(1)))
+
+    print(f"Average {query_name} Time: {np.mean(execution_times):.2f} ms")
+    return execution_times
+
+
+psql(SETUP_QUERY)
+print(psql(SIZE_QUERY).stdout)
+
+results = []
+for name, variants in QUERIES.items():
+    for keys, query in variants.items():
+        times = run_query(query, f"{name} ({keys})")
+        results.extend({"Query": name, "Keys": keys, "Execution Time": t} for t in times)
+
+# Plot
+df = pd.DataFrame(results)
+
+plt.figure(figsize=(12, 6))
+sns.barplot(data=df, x="Query", y="Execution Time", hue="Keys")
+plt.title("Fact table joins: text natural keys vs integer surrogate keys")
+plt.ylabel("Execution Time (ms)")
+plt.grid(True, axis="y")
+plt.tight_layout()
+plt.show()
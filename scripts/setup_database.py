@@ -32,7 +32,7 @@ def drop_and_recreate_tables():
         existing_tables = inspector.get_table_names()
 
         # Drop tables if they exist (in reverse order to handle foreign keys)
-        tables_to_drop = ['artist_song', 'spotify_charts', 'artist_stats', 'song', 'artist', 'country']
+        tables_to_drop = ['chart_dropout', 'artist_collab', 'artist_graph_metrics', 'song_summary', 'artist_summary', 'regional_chart', 'chart_rollup_week', 'chart_rollup_month', 'chart_rollup_year', 'chart_rollup_merged', 'latest_chart', 'daily_artist_streams', 'song_country_summary', 'latest_artist_stats', 'aggregate_watermark', 'artist_history', 'song_history', 'artist_genre', 'artist_song_keyed', 'spotify_charts_keyed', 'artist_stats_keyed', 'song', 'album', 'artist', 'country']
         for table in tables_to_drop:
             if table in existing_tables:
                 print(f"Dropping {table} table...")
@@ -57,7 +57,10 @@ def check_tables():
         inspector = inspect(engine)
         existing_tables = inspector.get_table_names()
 
-        expected_tables = ['artist', 'song', 'artist_song', 'country', 'spotify_charts', 'artist_stats']
+        expected_tables = ['artist', 'artist_genre', 'artist_history', 'song_history', 'song', 'album', 'artist_song_keyed', 'country', 'spotify_charts_keyed', 'artist_stats_keyed',
+                           'latest_chart', 'daily_artist_streams', 'song_country_summary', 'latest_artist_stats', 'aggregate_watermark',
+                           'chart_rollup_week', 'chart_rollup_month', 'chart_rollup_year', 'chart_rollup_merged', 'regional_chart',
+                           'song_summary', 'artist_summary', 'artist_collab', 'artist_graph_metrics', 'chart_dropout']
 
         for table in expected_tables:
             if table in existing_tables:
@@ -7,7 +7,7 @@ Keeps the same tests but in a cleaner pytest format
 import sys
 import os
 import pytest
-from datetime import datetime
+from datetime import date, datetime
 
 # Add src to Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
@@ -106,6 +106,507 @@ class TestPostgresLoader:
         loader.close_session()
 
 
+class TestCsvRowStream:
+    """Test the CSV stream feeding COPY FROM STDIN"""
+
+    def test_streams_rows_in_chunks(self):
+        from src.loaders.postgres_loader import CsvRowStream
+
+        rows = [{'song_id': 'a', 'rank': 1}, {'song_id': 'b', 'rank': None}]
+        stream = CsvRowStream(rows, ['song_id', 'rank'])
+
+        chunks = []
+        while chunk := stream.read(3):
+            chunks.append(chunk)
+
+        assert all(len(chunk) <= 3 for chunk in chunks)
+        assert ''.join(chunks) == "a,1\r\nb,\r\n"
+
+
+class TestChunking:
+    """Test the statement-size-bounded chunking of loader input"""
+
+    def test_iter_chunks_bounds_rows_and_bytes(self):
+        from src.loaders.postgres_loader import iter_chunks, estimate_row_bytes
+
+        rows = [{'song_id': f"song{i}", 'name': 'x' * 10} for i in range(10)]
+        row_bytes = estimate_row_bytes(rows[0])
+
+        assert [len(c) for c in iter_chunks(rows, 4, 10_000)] == [4, 4, 2]
+        assert [len(c) for c in iter_chunks(rows, 100, row_bytes * 3)] == [3, 3, 3, 1]
+        assert [len(c) for c in iter_chunks(rows, 100, 1)] == [1] * 10
+        assert list(iter_chunks([], 4, 10_000)) == []
+
+
+class TestUpsertCounts:
+    """Test the summary of change-aware upserts"""
+
+    def test_count_upserts(self):
+        from src.loaders.postgres_loader import count_upserts
+
+        assert count_upserts(5, [True, False, True]) == {'inserted': 2, 'updated': 1, 'unchanged': 2}
+        assert count_upserts(3, []) == {'inserted': 0, 'updated': 0, 'unchanged': 3}
+
+
+class TestParallelLoader:
+    """Test the partitioning used by the parallel loader"""
+
+    def test_partition_rows_is_key_disjoint_and_sorted(self):
+        from src.loaders.parallel_loader import partition_rows
+
+        rows = [{'artist_id': f"artist{i % 7}", 'date': i} for i in range(50)]
+        partitions = partition_rows(rows, ['artist_id'], 3)
+
+        assert sum(len(p) for p in partitions) == len(rows)
+        keys = [{row['artist_id'] for row in p} for p in partitions]
+        for i in range(len(keys)):
+            for j in range(i + 1, len(keys)):
+                assert not keys[i] & keys[j]
+        for p in partitions:
+            assert [row['artist_id'] for row in p] == sorted(row['artist_id'] for row in p)
+
+
+class TestKnownEntityCache:
+    """Test the known-entity filter applied before loading chart data"""
+
+    def test_filters_known_entities_and_persists(self, tmp_path):
+        from src.loaders.known_ids import KnownEntityCache
+
+        chart_data = {
+            'charts': [{'song_id': 's1'}],
+            'songs': [{'song_id': 's1', 'name': 'Song'}],
+            'artists': [{'spotify_id': 'a1', 'name': 'Artist'}],
+            'artist_songs': [{'artist_id': 'a1', 'song_id': 's1'}]
+        }
+        cache = KnownEntityCache(str(tmp_path / "known_ids.npz"))
+        assert cache.filter_chart_data(chart_data)['songs'] == chart_data['songs']
+
+        cache.add_chart_data(chart_data)
+        cache.save()
+
+        reloaded = KnownEntityCache(cache.path)
+        reloaded.load()
+        # Saved without a session, so every set is rebuilt by the next verify
+        assert reloaded.stamps == {}
+        filtered = reloaded.filter_chart_data(chart_data)
+        assert filtered['songs'] == [] and filtered['artists'] == [] and filtered['artist_songs'] == []
+        assert filtered['charts'] == chart_data['charts']
+
+
+class TestBatchSpool:
+    """Test the local Arrow spool used when the database is unavailable"""
+
+    def test_spool_round_trip_in_order(self, tmp_path):
+        pytest.importorskip("pyarrow")
+        from datetime import date
+        from src.loaders.spool import BatchSpool
+
+        spool = BatchSpool(str(tmp_path))
+        chart_data = {
+            'charts': [{'date': date(2025, 1, 1), 'country_code': 'FR', 'song_id': 's1',
+                        'streams': 10, 'total_streams': 100, 'days': 1, 'rank': 1}],
+            'songs': [{'song_id': 's1', 'name': 'Song'}],
+            'artists': [],
+            'artist_songs': [],
+            'dropouts': []
+        }
+        first = spool.write_chart_data(chart_data)
+        second = spool.write_artist_stats([{'artist_id': 'a1', 'date': date(2025, 1, 1), 'listeners': None}])
+
+        assert spool.pending() == [first, second]
+        kind, parts = spool.read(first)
+        assert kind == 'chart_data'
+        assert parts['charts'] == chart_data['charts']
+        # Empty parts are kept, so the replay still clears the day's drop-outs
+        assert parts['artists'] == [] and parts['dropouts'] == []
+
+        spool.remove(first)
+        assert spool.pending() == [second]
+        assert spool.read(second) == ('artist_stats', {'stats': [{'artist_id': 'a1', 'date': date(2025, 1, 1), 'listeners': None}]})
+
+
+class TestPartitions:
+    """Test the monthly partition helpers"""
+
+    def test_monthly_partition_ddl(self):
+        from datetime import date
+        from src.models.partitions import monthly_partition_ddl, months_between
+
+        assert monthly_partition_ddl('spotify_charts', date(2024, 12, 1)) == (
+            "CREATE TABLE IF NOT EXISTS spotify_charts_y2024m12 PARTITION OF spotify_charts "
+            "FOR VALUES FROM ('2024-12-01') TO ('2025-01-01')"
+        )
+        assert months_between(date(2024, 11, 15), '2025-01-02') == [
+            date(2024, 11, 1), date(2024, 12, 1), date(2025, 1, 1)
+        ]
+
+    def test_group_by_month(self):
+        from datetime import date
+        from src.models.partitions import group_by_month, month_from_partition_name, partition_name
+
+        rows = [{'date': '2025-01-31'}, {'date': date(2025, 2, 1)}, {'date': '2025-01-02'}]
+        months = group_by_month(rows)
+        assert sorted(months) == [date(2025, 1, 1), date(2025, 2, 1)]
+        assert len(months[date(2025, 1, 1)]) == 2
+        assert month_from_partition_name(partition_name('artist_stats', date(2025, 2, 1))) == date(2025, 2, 1)
+
+
+class TestTypedColumns:
+    """Test the typed column expressions of song JSONB documents"""
+
+    def test_typed_assignments(self):
+        from src.models.database import Song
+        from src.models.typed_columns import typed_assignments
+
+        assignments = typed_assignments('features', 'v.doc')
+        assert "tempo = CAST(v.doc->>'tempo' AS real)" in assignments
+        assert all(assignment.split(' = ')[0] in Song.__table__.c for assignment in assignments)
+        assert typed_assignments('sp_artist', 'v.doc') == []
+
+
+class TestSurrogateKeys:
+    """Test the bulk natural key to surrogate key encoding"""
+
+    def test_encode_rows(self):
+        from src.loaders.keys import encode_rows
+
+        lookups = []
+
+        def fetch_keys(table, natural_column, key_column, ids):
+            lookups.append(table)
+            keys = {'song': {'s1': 10, 's2': 20}, 'country': {'FR': 3}}[table]
+            return [(value, keys[value]) for value in ids if value in keys]
+
+        rows = [{'song_id': 's1', 'country_code': 'FR', 'rank': 1}, {'song_id': 's2', 'country_code': 'FR', 'rank': 2}]
+        assert encode_rows(rows, ['song_id', 'country_code'], fetch_keys) == [
+            {'rank': 1, 'song_key': 10, 'country_key': 3}, {'rank': 2, 'song_key': 20, 'country_key': 3}
+        ]
+        assert lookups == ['song', 'country']
+
+        with pytest.raises(ValueError):
+            encode_rows([{'song_id': 's3'}], ['song_id'], fetch_keys)
+
+
+class TestTrackTransformer:
+    """Test the projection of Spotify track objects"""
+
+    def test_project_tracks(self):
+        from src.transformers.track_transformer import project_tracks, markets_from_bits
+
+        positions = {'AD': 0, 'FR': 1, 'US': 3}
+        track = {
+            'id': 't1', 'name': 'Song', 'available_markets': ['FR', 'US', 'XK'],
+            'album': {'name': 'Album', 'available_markets': ['FR']}
+        }
+        slim_tracks, bits = project_tracks([track, None], positions)
+
+        assert slim_tracks == [{'id': 't1', 'name': 'Song', 'album': {'name': 'Album'}}]
+        assert bits == {'t1': '0101'}
+        assert markets_from_bits(bits['t1'], positions) == ['FR', 'US']
+        assert 'available_markets' in track
+
+    def test_extract_albums(self):
+        from datetime import date
+        from src.transformers.track_transformer import extract_albums
+
+        album = {'id': 'a1', 'name': 'Album', 'release_date': '2019-03', 'release_date_precision': 'month', 'images': []}
+        tracks = [{'id': 't1', 'album': album}, {'id': 't2', 'album': album}, {'id': 't3'}]
+        slim_tracks, albums, album_ids = extract_albums(tracks)
+
+        assert len(albums) == 1 and albums[0]['release_date'] == date(2019, 3, 1)
+        assert album_ids == {'t1': 'a1', 't2': 'a1'}
+        assert slim_tracks[0]['album'] == {'id': 'a1', 'release_date': '2019-03', 'release_date_precision': 'month'}
+        assert slim_tracks[2] == {'id': 't3'}
+
+    def test_parse_release_date(self):
+        from datetime import date
+        from src.transformers.track_transformer import parse_release_date
+
+        assert parse_release_date('2019') == date(2019, 1, 1)
+        assert parse_release_date('2019-03-08') == date(2019, 3, 8)
+        for placeholder in [None, '', '0000', '2019-00-00', '2019-03-00', '2019-02-30']:
+            assert parse_release_date(placeholder) is None
+
+
+class TestRegionalCharts:
+    """Test the regional and global charts built from country charts"""
+
+    def test_build_regional_charts(self):
+        import pandas as pd
+        from src.transformers.regional_chart_transformer import build_regional_charts
+
+        charts = pd.DataFrame({
+            'date': ['2025-03-01'] * 4,
+            'region': ['Europe', 'Europe', 'Americas', None],
+            'song_key': [1, 2, 1, 2],
+            'streams': [100, 150, 80, 60],
+            'rank': [2, 1, 1, 1],
+        })
+        regional = build_regional_charts(charts)
+        ranked = {(row.scope, row.rank): (row.song_key, row.streams, row.countries) for row in regional.itertuples()}
+
+        assert ranked[('Global', 1)] == (2, 210, 2)
+        assert ranked[('Global', 2)] == (1, 180, 2)
+        assert ranked[('Europe', 1)] == (2, 150, 1)
+        assert ranked[('Americas', 1)] == (1, 80, 1)
+        assert len(regional) == 5
+        assert build_regional_charts(charts.iloc[:0]).empty
+
+
+class TestRollups:
+    """Test the helpers answering date ranges from the chart rollups"""
+
+    def test_rollup_segments(self):
+        from datetime import date
+        from src.models.rollups import period_start, period_end, rollup_segments
+
+        assert period_start('week', date(2025, 3, 6)) == date(2025, 3, 3)
+        assert period_end('month', date(2024, 2, 10)) == date(2024, 2, 29)
+        assert rollup_segments('month', date(2022, 1, 1), date(2024, 12, 31)) == [
+            ('month', date(2022, 1, 1), date(2024, 12, 31))
+        ]
+        assert rollup_segments('year', date(2022, 1, 1), date(2024, 12, 31)) == [
+            ('year', date(2022, 1, 1), date(2024, 12, 31))
+        ]
+        # Only the partial first month comes from weeks and daily rows
+        assert rollup_segments('month', date(2022, 1, 15), date(2024, 12, 31)) == [
+            ('day', date(2022, 1, 15), date(2022, 1, 16)),
+            ('week', date(2022, 1, 17), date(2022, 1, 30)),
+            ('day', date(2022, 1, 31), date(2022, 1, 31)),
+            ('month', date(2022, 2, 1), date(2024, 12, 31)),
+        ]
+        assert rollup_segments('week', date(2025, 3, 4), date(2025, 3, 16)) == [
+            ('day', date(2025, 3, 4), date(2025, 3, 9)), ('week', date(2025, 3, 10), date(2025, 3, 16))
+        ]
+        assert rollup_segments('day', date(2025, 3, 4), date(2025, 3, 16)) == [
+            ('day', date(2025, 3, 4), date(2025, 3, 16))
+        ]
+
+
+class TestAggregates:
+    """Test the change detection of the dashboard aggregate refresh"""
+
+    def test_changed_chart_days(self):
+        from datetime import date
+        from src.loaders.aggregates import changed_chart_days
+
+        rows = [
+            {'date': date(2025, 3, 2), 'country_code': 'FR', 'rank': 1},
+            {'date': '2025-03-02', 'country_code': 'FR', 'rank': 2},
+            {'date': '2025-03-01', 'country_code': 'US', 'rank': 1},
+        ]
+        assert changed_chart_days(rows) == [('2025-03-01', 'US'), ('2025-03-02', 'FR')]
+        assert changed_chart_days([]) == []
+
+
+@pytest.mark.database
+class TestChartSummaries:
+    """Test the incremental chart summaries (requires database, rolled back)"""
+
+    DAY1, DAY2, DAY3 = '2001-01-01', '2001-01-02', '2001-01-03'
+
+    @pytest.fixture
+    def charts(self):
+        import sqlalchemy as sa
+        from src.config.connection import get_session
+        from src.models.partitions import ensure_monthly_partitions
+
+        session = get_session()
+        try:
+            country_key = session.execute(sa.text(
+                "INSERT INTO country (country_code, country_name) VALUES ('ZZ', 'Test') RETURNING country_key"
+            )).scalar()
+            song_keys = [session.execute(sa.text(
+                "INSERT INTO song (song_id, name) VALUES (:song_id, 'Test Song') RETURNING song_key"
+            ), {"song_id": song_id}).scalar() for song_id in ['test_summary_a', 'test_summary_b']]
+            ensure_monthly_partitions(session, 'spotify_charts_keyed', [self.DAY1])
+            yield session, country_key, song_keys
+        finally:
+            session.rollback()
+            session.close()
+
+    def _load_day(self, charts, day: str, entries: list) -> dict:
+        """Replace a chart day with (song index, rank, streams) entries and refresh the summaries"""
+        import sqlalchemy as sa
+        from src.models.rollups import merge_rollups_sql
+        from src.models.summaries import refresh_summaries_sql
+
+        session, country_key, song_keys = charts
+        params = {"day": day, "country_key": country_key}
+        session.execute(sa.text(
+            "DELETE FROM spotify_charts_keyed WHERE country_key = :country_key AND date = CAST(:day AS date)"
+        ), params)
+        for song, rank, streams in entries:
+            session.execute(sa.text("""
+                INSERT INTO spotify_charts_keyed (date, country_key, song_key, streams, total_streams, days, rank)
+                VALUES (CAST(:day AS date), :country_key, :song_key, :streams, :streams, 1, :rank)
+                """), {**params, "song_key": song_keys[song], "rank": rank, "streams": streams})
+
+        session.execute(sa.text("""
+            CREATE TEMPORARY TABLE changed_chart_days ON COMMIT DROP AS
+            SELECT CAST(:day AS date) AS date, CAST(:country_key AS smallint) AS country_key
+            """), params)
+        for statement in merge_rollups_sql() + refresh_summaries_sql():
+            session.execute(sa.text(statement))
+        session.execute(sa.text("DROP TABLE changed_chart_days, rollup_days, summary_recompute, summary_songs"))
+
+        rows = session.execute(sa.text("""
+            SELECT song_key, days_on_chart, peak_rank, first_date, last_date, total_streams,
+                   current_streak, current_streak_start, longest_streak
+            FROM song_country_summary
+            WHERE country_key = :country_key
+            """), params).mappings().all()
+        return {song_keys.index(row['song_key']): dict(row) for row in rows}
+
+    def test_streak_extended_by_next_day(self, charts):
+        self._load_day(charts, self.DAY1, [(0, 2, 100)])
+        summary = self._load_day(charts, self.DAY2, [(0, 1, 150)])[0]
+
+        assert (summary['days_on_chart'], summary['peak_rank'], summary['total_streams']) == (2, 1, 250)
+        assert (summary['current_streak'], summary['longest_streak']) == (2, 2)
+        assert str(summary['current_streak_start']) == self.DAY1
+
+    def test_streak_closed_on_drop_out(self, charts):
+        self._load_day(charts, self.DAY1, [(0, 1, 100), (1, 2, 90)])
+        summaries = self._load_day(charts, self.DAY2, [(1, 1, 95)])
+
+        assert (summaries[0]['current_streak'], summaries[0]['current_streak_start']) == (0, None)
+        assert summaries[0]['longest_streak'] == 1
+        assert summaries[1]['current_streak'] == 2
+
+    def test_backfilled_day_recomputes(self, charts):
+        self._load_day(charts, self.DAY1, [(0, 1, 100)])
+        self._load_day(charts, self.DAY3, [(0, 1, 100)])
+        summary = self._load_day(charts, self.DAY2, [(0, 3, 50)])[0]
+
+        assert (summary['days_on_chart'], summary['peak_rank'], summary['total_streams']) == (3, 1, 250)
+        assert (summary['current_streak'], summary['longest_streak']) == (3, 3)
+
+    def test_corrected_day_recomputes(self, charts):
+        self._load_day(charts, self.DAY1, [(0, 1, 100), (1, 2, 90)])
+        self._load_day(charts, self.DAY2, [(0, 1, 100), (1, 2, 90)])
+        summaries = self._load_day(charts, self.DAY2, [(1, 1, 80)])
+
+        assert (summaries[0]['days_on_chart'], summaries[0]['total_streams']) == (1, 100)
+        assert (summaries[0]['current_streak'], summaries[0]['longest_streak']) == (0, 1)
+        assert (summaries[1]['peak_rank'], summaries[1]['total_streams'], summaries[1]['current_streak']) == (1, 170, 2)
+
+    def test_rerun_leaves_summaries_unchanged(self, charts):
+        self._load_day(charts, self.DAY1, [(0, 1, 100), (1, 2, 90)])
+        before = self._load_day(charts, self.DAY2, [(0, 2, 80)])
+        after = self._load_day(charts, self.DAY2, [(0, 2, 80)])
+
+        assert after == before
+
+
+@pytest.mark.database
+class TestHistory:
+    """Test the change-only Spotify field history (requires database, rolled back)"""
+
+    DAY1, DAY2, DAY3 = date(2001, 1, 1), date(2001, 1, 2), date(2001, 1, 3)
+
+    @pytest.fixture
+    def session(self):
+        import sqlalchemy as sa
+        from src.config.connection import get_session
+
+        session = get_session()
+        try:
+            session.execute(sa.text("INSERT INTO song (song_id, name) VALUES ('test_history', 'Test Song')"))
+            yield session
+        finally:
+            session.rollback()
+            session.close()
+
+    def _record(self, session, day, popularity: int) -> list:
+        """Set the song's popularity, record the changes on a day and return its versions"""
+        import sqlalchemy as sa
+        from src.models.history import record_changes_sql
+
+        session.execute(sa.text(
+            "UPDATE song SET sp_track = jsonb_build_object('popularity', :popularity) WHERE song_id = 'test_history'"
+        ), {"popularity": popularity})
+        session.execute(sa.text(record_changes_sql('song')), {"ids": ['test_history'], "today": day})
+        return session.execute(sa.text("""
+            SELECT h.valid_from, h.valid_to, h.popularity
+            FROM song_history h JOIN song s ON s.song_key = h.song_key
+            WHERE s.song_id = 'test_history'
+            ORDER BY h.valid_from
+            """)).all()
+
+    def test_only_changes_are_recorded(self, session):
+        self._record(session, self.DAY1, 50)
+        assert self._record(session, self.DAY2, 50) == [(self.DAY1, None, 50)]
+        assert self._record(session, self.DAY3, 60) == [(self.DAY1, self.DAY3, 50), (self.DAY3, None, 60)]
+
+    def test_same_day_revert_reopens_previous_version(self, session):
+        self._record(session, self.DAY1, 50)
+        assert self._record(session, self.DAY2, 60) == [(self.DAY1, self.DAY2, 50), (self.DAY2, None, 60)]
+        assert self._record(session, self.DAY2, 50) == [(self.DAY1, None, 50)]
+
+    def test_value_as_of(self, session):
+        from src.models.history import value_as_of
+
+        self._record(session, self.DAY1, 50)
+        self._record(session, self.DAY3, 60)
+
+        assert value_as_of(session, 'song', 'test_history', date(2000, 12, 31)) is None
+        assert value_as_of(session, 'song', 'test_history', self.DAY2)['popularity'] == 50
+        assert value_as_of(session, 'song', 'test_history', self.DAY3)['popularity'] == 60
+
+
+class TestCollabGraph:
+    """Test the artist collaboration graph metrics"""
+
+    def test_graph_metrics(self):
+        pytest.importorskip("networkx")
+        pytest.importorskip("scipy")
+        from src.loaders.collab_graph import graph_metrics
+
+        rows = {row['artist_key']: row for row in graph_metrics([(1, 2, 3), (2, 3, 1), (7, 9, 2)])}
+
+        assert {key: row['component'] for key, row in rows.items()} == {1: 1, 2: 1, 3: 1, 7: 7, 9: 7}
+        assert (rows[2]['degree'], rows[2]['weighted_degree']) == (2, 4)
+        assert rows[9]['community'] == 7
+        assert rows[7]['centrality'] == pytest.approx(1.0)
+        assert sum(rows[key]['centrality'] for key in (1, 2, 3)) == pytest.approx(3.0)
+        assert graph_metrics([]) == []
+
+
+class TestChartMovements:
+    """Test the movement fields computed against the previous day's chart"""
+
+    def test_chart_movements(self):
+        import pandas as pd
+        from datetime import date
+        from src.transformers.chart_movement_transformer import chart_movements
+
+        charts = pd.DataFrame({
+            'country_code': ['FR', 'FR', 'FR', 'US', 'FR'],
+            'date': [date(2025, 3, 2)] * 4 + [date(2025, 3, 3)],
+            'song_id': ['a', 'c', 'd', 'a', 'c'],
+            'streams': [120, 90, 80, 500, 95],
+            'days': [5, 1, 9, 3, 2],
+            'rank': [1, 2, 3, 1, 1],
+        })
+        previous = pd.DataFrame({
+            'country_code': ['FR', 'FR'],
+            'date': [date(2025, 3, 1)] * 2,
+            'song_id': ['a', 'b'],
+            'streams': [100, 110],
+            'rank': [2, 1],
+        })
+        movements, dropouts = chart_movements(charts, previous)
+
+        assert movements[0] == {'previous_rank': 2, 'rank_change': 1, 'streams_change': 20, 'entry': 'stay'}
+        assert [movement['entry'] for movement in movements] == ['stay', 'new', 'reentry', None, 'stay']
+        assert movements[4]['streams_change'] == 5
+        assert [(row['date'], row['song_id'], row['last_rank']) for row in dropouts] == [
+            (date(2025, 3, 2), 'b', 1), (date(2025, 3, 3), 'a', 1), (date(2025, 3, 3), 'd', 3)
+        ]
+        assert chart_movements(charts.iloc[:0], previous) == ([], [])
+
+
 class TestNetworkExtractors:
     """Test network-dependent extractors (requires internet)"""
 
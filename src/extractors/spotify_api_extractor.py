@@ -92,6 +92,30 @@ class SpotifyAPIExtractor:
         )
         return [row[0] for row in result]
 
+    def get_all_artist_ids(self, session) -> list:
+        """Get every artist ID, to refresh the Spotify data of all artists
+
+        Args:
+            session: Database session
+
+        Returns:
+            list: List of artist IDs
+        """
+        result = session.execute(sa.text("SELECT spotify_id FROM artist ORDER BY spotify_id"))
+        return [row[0] for row in result]
+
+    def get_all_track_ids(self, session) -> list:
+        """Get every track ID, to refresh the Spotify data of all tracks
+
+        Args:
+            session: Database session
+
+        Returns:
+            list: List of track IDs
+        """
+        result = session.execute(sa.text("SELECT song_id FROM song ORDER BY song_id"))
+        return [row[0] for row in result]
+
     def fetch_audio_features_batch(self, track_ids: list) -> list:
         """Fetch audio features for tracks from Spotify API
 
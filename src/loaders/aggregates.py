@@ -0,0 +1,203 @@
+from datetime import date
+import sqlalchemy as sa
+from src.config.connection import get_session
+from src.models.collab import COLLAB_DATES
+from src.models.rollups import ROLLUP_GRAINS, merge_rollups_sql, rollup_table_name
+from src.models.summaries import refresh_summaries_sql
+from src.loaders.postgres_loader import PostgresLoader
+from src.transformers.regional_chart_transformer import build_regional_charts
+
+# (date, country_key) pairs touched by the run, resolved once per refresh
+CHANGED_DAYS = """
+CREATE TEMPORARY TABLE changed_chart_days ON COMMIT DROP AS
+SELECT DISTINCT CAST(u.day AS date) AS date, co.country_key
+FROM unnest(CAST(:dates AS text[]), CAST(:countries AS text[])) AS u(day, country_code)
+JOIN country co ON co.country_code = u.country_code
+"""
+
+# Whole (date, country) slices are rebuilt, so a reloaded day never leaves stale artists behind
+DAILY_ARTIST_STREAMS_DELETE = """
+DELETE FROM daily_artist_streams d
+USING changed_chart_days c
+WHERE d.date = c.date AND d.country_key = c.country_key
+"""
+
+DAILY_ARTIST_STREAMS_INSERT = """
+INSERT INTO daily_artist_streams (date, country_key, artist_key, streams, entries, best_rank)
+SELECT ch.date, ch.country_key, ars.artist_key, SUM(ch.streams), COUNT(*), MIN(ch.rank)
+FROM changed_chart_days c
+JOIN spotify_charts_keyed ch ON ch.date = c.date AND ch.country_key = c.country_key
+JOIN artist_song_keyed ars ON ars.song_key = ch.song_key
+GROUP BY ch.date, ch.country_key, ars.artist_key
+"""
+
+# The snapshot is rebuilt next to the live table: unchanged countries are
+# copied over and changed ones re-read at their latest chart date
+LATEST_CHART_BUILD = [
+    "DROP TABLE IF EXISTS latest_chart_next",
+    "CREATE TABLE latest_chart_next (LIKE latest_chart INCLUDING ALL)",
+    """
+    INSERT INTO latest_chart_next
+    SELECT l.*
+    FROM latest_chart l
+    WHERE l.country_key NOT IN (SELECT country_key FROM changed_chart_days)
+    """,
+    """
+    INSERT INTO latest_chart_next (country_key, country_code, date, rank, song_key, song_id, song_name, streams, days)
+    SELECT ch.country_key, co.country_code, ch.date, ch.rank, ch.song_key, s.song_id, s.name, ch.streams, ch.days
+    FROM (
+        SELECT c.country_key, (SELECT MAX(date) FROM spotify_charts_keyed WHERE country_key = c.country_key) AS date
+        FROM (SELECT DISTINCT country_key FROM changed_chart_days) c
+    ) latest
+    JOIN spotify_charts_keyed ch ON ch.country_key = latest.country_key AND ch.date = latest.date
+    JOIN country co ON co.country_key = ch.country_key
+    JOIN song s ON s.song_key = ch.song_key
+    """,
+]
+
+# Swapped in at the very end of the transaction, so readers only wait on the
+# exclusive lock for the duration of the renames
+LATEST_CHART_SWAP = [
+    "DROP TABLE latest_chart",
+    "ALTER TABLE latest_chart_next RENAME TO latest_chart",
+    "ALTER TABLE latest_chart RENAME CONSTRAINT latest_chart_next_pkey TO latest_chart_pkey",
+]
+
+LATEST_ARTIST_STATS_UPSERT = """
+INSERT INTO latest_artist_stats AS t (artist_key, date, total_streams, daily_streams, listeners)
+SELECT DISTINCT ON (st.artist_key) st.artist_key, st.date, st.total_streams, st.daily_streams, st.listeners
+FROM artist_stats_keyed st
+JOIN artist a ON a.artist_key = st.artist_key
+WHERE a.spotify_id = ANY(:ids) AND st.date = ANY(CAST(CAST(:dates AS text[]) AS date[]))
+ORDER BY st.artist_key, st.date DESC
+ON CONFLICT (artist_key) DO UPDATE
+SET date = EXCLUDED.date, total_streams = EXCLUDED.total_streams, daily_streams = EXCLUDED.daily_streams,
+    listeners = EXCLUDED.listeners
+WHERE EXCLUDED.date >= t.date
+  AND (t.date, t.total_streams, t.daily_streams, t.listeners)
+    IS DISTINCT FROM (EXCLUDED.date, EXCLUDED.total_streams, EXCLUDED.daily_streams, EXCLUDED.listeners)
+"""
+
+WATERMARK_UPSERT = """
+INSERT INTO aggregate_watermark AS t (aggregate, through_date, refreshed_at, changed_days)
+VALUES (:aggregate, :through_date, now(), :changed_days)
+ON CONFLICT (aggregate) DO UPDATE
+SET through_date = GREATEST(t.through_date, EXCLUDED.through_date),
+    refreshed_at = EXCLUDED.refreshed_at, changed_days = EXCLUDED.changed_days
+"""
+
+
+def changed_chart_days(chart_rows: list) -> list:
+    """Distinct (date, country code) pairs of a batch of chart entries
+
+    Args:
+        chart_rows (list): List of chart entry dictionaries
+
+    Returns:
+        list: Sorted list of (ISO date, country code) tuples
+    """
+    return sorted({(str(row['date'])[:10], row['country_code']) for row in chart_rows})
+
+
+def rebuild_regional_charts(dates: list):
+    """Rebuild the regional and global charts of the given dates
+
+    Every country's rows of those dates are read back in one query, so
+    countries loaded by earlier runs or spool replays of the same day are
+    included.
+
+    Args:
+        dates (list): ISO dates whose regional charts are rebuilt
+    """
+    if not dates:
+        return
+
+    loader = PostgresLoader()
+    try:
+        regional_charts = build_regional_charts(loader.fetch_chart_days(dates))
+        loader.replace_regional_charts(dates, regional_charts)
+    finally:
+        loader.close_session()
+
+
+class AggregateRefresher:
+    """Keeps the dashboard aggregate tables in step with the fact tables
+
+    Each refresh only touches the dates and countries (or artists) loaded by
+    the run, inside one transaction serialized by an advisory lock, and
+    records a watermark per aggregate in ``aggregate_watermark``. The
+    ``latest_chart`` snapshot is rebuilt next to the live table and
+    swapped in atomically, so dashboards never see a partial chart.
+    """
+
+    LOCK_KEY = 'aggregate_refresh'
+
+    def _lock(self, session):
+        session.execute(sa.text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": self.LOCK_KEY})
+
+    def _record_watermark(self, session, aggregate: str, through_date: str, changed_days: int):
+        session.execute(sa.text(WATERMARK_UPSERT), {
+            "aggregate": aggregate, "through_date": date.fromisoformat(through_date), "changed_days": changed_days
+        })
+
+    def refresh_charts(self, chart_rows: list):
+        """Refresh the chart aggregates for the dates and countries of the loaded chart entries
+
+        Args:
+            chart_rows (list): Chart entry dictionaries committed by the run
+        """
+        days = changed_chart_days(chart_rows)
+        if not days:
+            return
+
+        session = get_session()
+        try:
+            self._lock(session)
+            session.execute(sa.text(CHANGED_DAYS), {
+                "dates": [day for day, _ in days], "countries": [country for _, country in days]
+            })
+            session.execute(sa.text(DAILY_ARTIST_STREAMS_DELETE))
+            session.execute(sa.text(DAILY_ARTIST_STREAMS_INSERT))
+            for statement in merge_rollups_sql() + refresh_summaries_sql() + [COLLAB_DATES]:
+                session.execute(sa.text(statement))
+            for statement in LATEST_CHART_BUILD + LATEST_CHART_SWAP:
+                session.execute(sa.text(statement))
+
+            through_date = max(day for day, _ in days)
+            rollups = [rollup_table_name(grain) for grain in ROLLUP_GRAINS]
+            summaries = ['song_country_summary', 'song_summary', 'artist_summary', 'artist_collab']
+            for aggregate in ['daily_artist_streams', 'latest_chart'] + rollups + summaries:
+                self._record_watermark(session, aggregate, through_date, len(days))
+            session.commit()
+            print(f"Refreshed chart aggregates for {len(days)} country-days (through {through_date})")
+        except Exception as e:
+            session.rollback()
+            print(f"Error refreshing chart aggregates: {e}")
+            raise
+        finally:
+            session.close()
+
+    def refresh_artist_stats(self, stats_rows: list):
+        """Refresh the latest statistics of the artists in the loaded stats
+
+        Args:
+            stats_rows (list): Artist stats dictionaries committed by the run
+        """
+        if not stats_rows:
+            return
+
+        artist_ids = sorted({row['artist_id'] for row in stats_rows})
+        dates = sorted({str(row['date'])[:10] for row in stats_rows})
+        session = get_session()
+        try:
+            self._lock(session)
+            session.execute(sa.text(LATEST_ARTIST_STATS_UPSERT), {"ids": artist_ids, "dates": dates})
+            self._record_watermark(session, 'latest_artist_stats', dates[-1], len(dates))
+            session.commit()
+            print(f"Refreshed latest stats of {len(artist_ids)} artists (through {dates[-1]})")
+        except Exception as e:
+            session.rollback()
+            print(f"Error refreshing artist stats aggregates: {e}")
+            raise
+        finally:
+            session.close()
@@ -0,0 +1,134 @@
+from datetime import date
+import sqlalchemy as sa
+from src.config.connection import get_session
+from src.loaders.aggregates import WATERMARK_UPSERT
+
+try:
+    import networkx as nx
+    HAS_NETWORKX = True
+except ImportError:
+    HAS_NETWORKX = False
+
+# Claims the edges merged since the last refresh; edges merged concurrently
+# wait on the row locks and are flagged again for the next refresh
+CLAIM_STALE_EDGES = """
+UPDATE artist_collab
+SET metrics_stale = false
+WHERE metrics_stale
+RETURNING artist_key_a, artist_key_b
+"""
+
+# Components only ever grow, so the changed components are the old
+# components of the claimed artists plus the claimed artists themselves
+COMPONENT_MEMBERS = """
+SELECT m.artist_key
+FROM artist_graph_metrics m
+WHERE m.component IN (SELECT component FROM artist_graph_metrics WHERE artist_key = ANY(:artists))
+UNION
+SELECT unnest(CAST(:artists AS integer[]))
+"""
+
+COMPONENT_EDGES = """
+SELECT artist_key_a, artist_key_b, shared_songs
+FROM artist_collab
+WHERE artist_key_a = ANY(:members)
+"""
+
+METRICS_UPSERT = """
+INSERT INTO artist_graph_metrics AS t (artist_key, component, degree, weighted_degree, community, centrality)
+SELECT *
+FROM unnest(CAST(:artist_key AS integer[]), CAST(:component AS integer[]), CAST(:degree AS integer[]),
+            CAST(:weighted_degree AS integer[]), CAST(:community AS integer[]), CAST(:centrality AS real[]))
+ON CONFLICT (artist_key) DO UPDATE
+SET component = EXCLUDED.component, degree = EXCLUDED.degree, weighted_degree = EXCLUDED.weighted_degree,
+    community = EXCLUDED.community, centrality = EXCLUDED.centrality
+"""
+
+METRIC_COLUMNS = ['artist_key', 'component', 'degree', 'weighted_degree', 'community', 'centrality']
+
+
+def graph_metrics(edges: list) -> list:
+    """Graph metrics of every artist of a set of whole connected components
+
+    Components and communities are labelled with their smallest artist key,
+    so labels stay stable across refreshes. Communities are Louvain
+    communities weighted by shared songs, and the centrality is the
+    PageRank of the artist within its component scaled by the component
+    size (1.0 is the component average).
+
+    Args:
+        edges (list): (artist_key_a, artist_key_b, shared_songs) tuples
+
+    Returns:
+        list: One dictionary per artist with the METRIC_COLUMNS keys
+    """
+    if not HAS_NETWORKX:
+        raise ImportError("Graph metrics require networkx: pip install networkx")
+
+    graph = nx.Graph()
+    graph.add_weighted_edges_from(edges)
+
+    rows = []
+    for members in nx.connected_components(graph):
+        component = graph.subgraph(members)
+        communities = nx.community.louvain_communities(component, weight='weight', seed=42)
+        community_of = {artist: min(community) for community in communities for artist in community}
+        pagerank = nx.pagerank(component, weight='weight')
+        for artist in sorted(members):
+            rows.append({
+                'artist_key': artist,
+                'component': min(members),
+                'degree': component.degree(artist),
+                'weighted_degree': int(component.degree(artist, weight='weight')),
+                'community': community_of[artist],
+                'centrality': pagerank[artist] * len(members),
+            })
+    return rows
+
+
+class CollabGraphMetrics:
+    """Keeps ``artist_graph_metrics`` in step with the ``artist_collab`` edges
+
+    Only the connected components holding an edge merged since the last
+    refresh (flagged ``metrics_stale`` by the loader) are loaded into
+    networkx and recomputed, in one transaction with the claim of their
+    edges, so a failed refresh leaves them flagged for the next run.
+    """
+
+    LOCK_KEY = 'artist_graph_metrics'
+
+    def refresh(self):
+        """Recompute the graph metrics of the components with stale edges"""
+        if not HAS_NETWORKX:
+            print("Skipping collaboration graph metrics: networkx is not installed")
+            return
+
+        session = get_session()
+        try:
+            session.execute(sa.text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": self.LOCK_KEY})
+            claimed = session.execute(sa.text(CLAIM_STALE_EDGES)).fetchall()
+            if not claimed:
+                session.commit()
+                return
+
+            artists = sorted({artist for edge in claimed for artist in edge})
+            members = [row[0] for row in session.execute(sa.text(COMPONENT_MEMBERS), {"artists": artists})]
+            edges = session.execute(sa.text(COMPONENT_EDGES), {"members": members}).fetchall()
+            rows = graph_metrics([tuple(edge) for edge in edges])
+
+            session.execute(sa.text(METRICS_UPSERT), {
+                column: [row[column] for row in rows] for column in METRIC_COLUMNS
+            })
+            session.execute(sa.text(WATERMARK_UPSERT), {
+                "aggregate": 'artist_graph_metrics', "through_date": date.today(), "changed_days": len(claimed)
+            })
+            session.commit()
+            components = len({row['component'] for row in rows})
+            print(f"Refreshed graph metrics of {len(rows)} artists in {components} changed components "
+                  f"({len(claimed)} changed edges)")
+        except Exception as e:
+            session.rollback()
+            print(f"Error refreshing collaboration graph metrics: {e}")
+            raise
+        finally:
+            session.close()
@@ -0,0 +1,43 @@
+# natural key column of the chart and stats rows -> (table, natural column, surrogate key column)
+KEY_COLUMNS = {
+    'artist_id': ('artist', 'spotify_id', 'artist_key'),
+    'song_id': ('song', 'song_id', 'song_key'),
+    'country_code': ('country', 'country_code', 'country_key'),
+}
+
+
+def encode_rows(rows: list, id_columns: list, fetch_keys) -> list:
+    """Replace Spotify IDs and country codes by their surrogate keys
+
+    Keys are resolved in bulk, with one lookup per key column for the
+    whole batch, and are never cached across batches: a key read inside a
+    transaction that is later rolled back would otherwise outlive its row.
+
+    Args:
+        rows (list): List of row dictionaries carrying natural keys
+        id_columns (list): Natural key columns to encode, e.g. ``['song_id', 'country_code']``
+        fetch_keys: Callable ``(table, natural_column, key_column, ids)`` returning
+            ``(natural, key)`` pairs for the ids found in the table
+
+    Returns:
+        list: New row dictionaries carrying surrogate keys instead
+
+    Raises:
+        ValueError: When a natural key has no row in its table
+    """
+    key_maps = {}
+    for column in id_columns:
+        table, natural_column, key_column = KEY_COLUMNS[column]
+        ids = list({row[column] for row in rows})
+        key_maps[column] = dict(fetch_keys(table, natural_column, key_column, ids))
+        missing = [value for value in ids if value not in key_maps[column]]
+        if missing:
+            raise ValueError(f"{len(missing)} unknown {natural_column} value(s) in {table}, e.g. {missing[0]}")
+
+    encoded = []
+    for row in rows:
+        row = dict(row)
+        for column in id_columns:
+            row[KEY_COLUMNS[column][2]] = key_maps[column][row.pop(column)]
+        encoded.append(row)
+    return encoded
@@ -0,0 +1,150 @@
+import hashlib
+import os
+import numpy as np
+import sqlalchemy as sa
+
+# table -> (key columns, matching part of the chart data)
+ENTITY_KINDS = {
+    'artist': (['spotify_id'], 'artists'),
+    'song': (['song_id'], 'songs'),
+    'artist_song': (['artist_id', 'song_id'], 'artist_songs'),
+}
+
+# table -> row count of the table and a value that changes on every insert or delete
+# (surrogate keys are never reused; the links are summed as a checksum)
+ENTITY_STAMPS = {
+    'artist': "SELECT count(*), coalesce(max(artist_key), 0) FROM artist",
+    'song': "SELECT count(*), coalesce(max(song_key), 0) FROM song",
+    'artist_song': "SELECT count(*), coalesce(sum(hashtext(artist_key || ':' || song_key)), 0) FROM artist_song_keyed",
+}
+
+
+def hash_key(*parts) -> int:
+    """Hash a (possibly composite) key to an unsigned 64-bit integer"""
+    key = '\x1f'.join(str(part) for part in parts)
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'little')
+
+
+class KnownIdSet:
+    """Compact set of keys stored as a sorted array of 64-bit hashes
+
+    Membership tests are a vectorized binary search. A hash collision can
+    make a new key look known, but with 64-bit hashes the odds are
+    negligible for the number of artists and songs we track.
+    """
+
+    def __init__(self, hashes: np.ndarray = None):
+        self.hashes = np.unique(hashes) if hashes is not None else np.empty(0, dtype=np.uint64)
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        """Return a boolean mask telling which hashes are in the set"""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if not len(self.hashes) or not len(hashes):
+            return np.zeros(len(hashes), dtype=bool)
+        positions = np.searchsorted(self.hashes, hashes).clip(max=len(self.hashes) - 1)
+        return self.hashes[positions] == hashes
+
+    def add(self, hashes: np.ndarray):
+        """Add hashes to the set"""
+        self.hashes = np.union1d(self.hashes, np.asarray(hashes, dtype=np.uint64))
+
+
+class KnownEntityCache:
+    """Known artist, song and artist_song keys persisted between runs
+
+    Every set is saved with the stamp (row count and highest surrogate key,
+    or checksum of the links) its table had when the set last matched it.
+    The cache is verified against the database before use: when a table's
+    stamp or row count no longer matches (rows added or removed outside the
+    pipeline, or a lost update), that set is rebuilt from the table. Chart
+    payloads can then be stripped of entities that already exist so only
+    probably-new keys are sent to Postgres.
+    """
+
+    def __init__(self, path: str = "data/cache/known_ids.npz"):
+        self.path = path
+        self.sets = {kind: KnownIdSet() for kind in ENTITY_KINDS}
+        self.stamps = {}
+
+    def load(self):
+        """Load the persisted sets and stamps, if any"""
+        if not os.path.exists(self.path):
+            return
+        with np.load(self.path) as stored:
+            for kind in ENTITY_KINDS:
+                if kind in stored:
+                    self.sets[kind] = KnownIdSet(stored[kind])
+                if f"{kind}_stamp" in stored:
+                    self.stamps[kind] = tuple(int(value) for value in stored[f"{kind}_stamp"])
+
+    def save(self, session=None):
+        """Persist the sets, stamped with the current state of their tables
+
+        A set is only stamped when its size matches its table's row count;
+        the others are saved unstamped and rebuilt by the next ``verify``.
+
+        Args:
+            session: Database session, or None to save every set unstamped
+        """
+        self.stamps = {}
+        if session is not None:
+            for kind in ENTITY_KINDS:
+                stamp = self._stamp(session, kind)
+                if stamp[0] == len(self.sets[kind]):
+                    self.stamps[kind] = stamp
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        np.savez(self.path, **{kind: known.hashes for kind, known in self.sets.items()},
+                 **{f"{kind}_stamp": np.array(stamp, dtype=np.int64) for kind, stamp in self.stamps.items()})
+
+    def _stamp(self, session, kind: str) -> tuple:
+        return tuple(int(value) for value in session.execute(sa.text(ENTITY_STAMPS[kind])).one())
+
+    def verify(self, session):
+        """Load the cache and rebuild every set whose stamp or size disagrees with the database
+
+        Args:
+            session: Database session
+        """
+        self.load()
+        for kind, (columns, _) in ENTITY_KINDS.items():
+            stamp = self._stamp(session, kind)
+            if stamp != self.stamps.get(kind) or stamp[0] != len(self.sets[kind]):
+                print(f"Known {kind} cache out of date ({len(self.sets[kind])} cached, {stamp[0]} in database), rebuilding")
+                result = session.execute(sa.text(f"SELECT {', '.join(columns)} FROM {kind}"))
+                self.sets[kind] = KnownIdSet(np.fromiter((hash_key(*row) for row in result), dtype=np.uint64))
+                self.stamps[kind] = stamp
+
+    def _hashes(self, kind: str, rows: list) -> np.ndarray:
+        columns = ENTITY_KINDS[kind][0]
+        return np.fromiter((hash_key(*(row[column] for column in columns)) for row in rows), dtype=np.uint64, count=len(rows))
+
+    def filter_chart_data(self, chart_data: dict) -> dict:
+        """Drop the artists, songs and relationships already known to exist
+
+        Args:
+            chart_data (dict): Dictionary containing all chart-related data
+
+        Returns:
+            dict: Copy of the chart data holding only probably-new entities
+        """
+        filtered = dict(chart_data)
+        for kind, (_, part) in ENTITY_KINDS.items():
+            rows = chart_data.get(part, [])
+            known = self.sets[kind].contains(self._hashes(kind, rows))
+            filtered[part] = [row for row, is_known in zip(rows, known) if not is_known]
+        return filtered
+
+    def add_chart_data(self, chart_data: dict):
+        """Record the entities of successfully committed chart data
+
+        Args:
+            chart_data (dict): Dictionary containing all chart-related data
+        """
+        for kind, (_, part) in ENTITY_KINDS.items():
+            rows = chart_data.get(part, [])
+            if rows:
+                self.sets[kind].add(self._hashes(kind, rows))
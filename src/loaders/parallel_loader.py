@@ -0,0 +1,178 @@
+import concurrent.futures
+import zlib
+from src.loaders.postgres_loader import PostgresLoader, format_counts
+from src.models.database import Spotify_charts, Artist_stats
+
+
+def partition_rows(rows: list, key_columns: list, partitions: int) -> list:
+    """Split rows into disjoint partitions by hashing their key
+
+    Rows sharing a key always land in the same partition, and every
+    partition is sorted by key so concurrent writers acquire row locks in
+    the same order and cannot deadlock each other.
+
+    Args:
+        rows (list): List of row dictionaries
+        key_columns (list): Columns forming the partitioning key
+        partitions (int): Number of partitions
+
+    Returns:
+        list: List of ``partitions`` lists of rows (some may be empty)
+    """
+    buckets = [[] for _ in range(partitions)]
+    for row in rows:
+        key = '\x1f'.join(str(row[column]) for column in key_columns)
+        buckets[zlib.crc32(key.encode()) % partitions].append(row)
+
+    for bucket in buckets:
+        bucket.sort(key=lambda row: tuple(str(row[column]) for column in key_columns))
+    return buckets
+
+
+def dedupe_rows(rows: list, key_columns: list) -> list:
+    """Keep the last row for every key
+
+    Args:
+        rows (list): List of row dictionaries
+        key_columns (list): Columns forming the key
+
+    Returns:
+        list: Rows with unique keys
+    """
+    return list({tuple(row[column] for column in key_columns): row for row in rows}.values())
+
+
+class ParallelLoader:
+    """Spreads loading work over several pooled connections
+
+    Each worker thread owns its own PostgresLoader (and therefore its own
+    session and connection from the engine pool). Work is split into
+    key-disjoint partitions, and dependent tables are loaded in phases
+    so foreign keys always point to rows committed by an earlier phase.
+    """
+
+    def __init__(self, workers: int = 4, **loader_options):
+        """
+        Args:
+            workers (int): Number of worker threads (and pooled connections)
+            **loader_options: Options forwarded to each worker's PostgresLoader
+        """
+        self.workers = workers
+        self.loader_options = loader_options
+
+    def _load_partition(self, method_name: str, rows: list):
+        loader = PostgresLoader(**self.loader_options)
+        try:
+            return getattr(loader, method_name)(rows)
+        finally:
+            loader.close_session()
+
+    def _run_phase(self, method_name: str, partitions: list) -> dict:
+        """Run one loader method over partitions in parallel
+
+        Args:
+            method_name (str): PostgresLoader method to call per partition
+            partitions (list): List of row lists, one task per non-empty list
+
+        Returns:
+            dict: Summed counts when the method reports them, else an empty dict
+        """
+        totals = {}
+        errors = []
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(self._load_partition, method_name, rows) for rows in partitions if rows]
+
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    counts = future.result()
+                    for key, value in (counts or {}).items():
+                        totals[key] = totals.get(key, 0) + value
+                except Exception as e:
+                    errors.append(e)
+
+        if errors:
+            print(f"{len(errors)} worker(s) failed during {method_name}")
+            raise errors[0]
+        return totals
+
+    def load_chart_data(self, all_chart_data: list) -> dict:
+        """Load the chart data of many countries over parallel connections
+
+        Artists and songs are deduplicated across countries and hash
+        partitioned, relationships follow once both are committed, and the
+        chart entries are finally spread over the workers country by country,
+        followed by their drop-outs.
+
+        Args:
+            all_chart_data (list): List of chart data dictionaries (one per country)
+
+        Returns:
+            dict: Number of inserted, updated and unchanged chart entries
+        """
+        all_chart_data = [chart_data for chart_data in all_chart_data if chart_data]
+
+        def collect(part: str) -> list:
+            return [row for chart_data in all_chart_data for row in chart_data.get(part, [])]
+
+        artists = dedupe_rows(collect('artists'), ['spotify_id'])
+        songs = dedupe_rows(collect('songs'), ['song_id'])
+        relationships = dedupe_rows(collect('artist_songs'), ['artist_id', 'song_id'])
+
+        # Entity tables first: no foreign keys between artists and songs
+        self._run_phase('load_artists', partition_rows(artists, ['spotify_id'], self.workers))
+        self._run_phase('load_songs', partition_rows(songs, ['song_id'], self.workers))
+        self._run_phase('load_artist_song_relationships', partition_rows(relationships, ['artist_id', 'song_id'], self.workers))
+
+        # Create missing monthly partitions up front rather than racing for them
+        charts = collect('charts')
+        loader = PostgresLoader(**self.loader_options)
+        try:
+            loader.ensure_partitions(Spotify_charts.__tablename__, charts)
+            loader.get_session().commit()
+        finally:
+            loader.close_session()
+
+        # Whole countries per worker, largest first to balance the partitions
+        partitions = [[] for _ in range(self.workers)]
+        for chart_data in sorted(all_chart_data, key=lambda data: len(data.get('charts', [])), reverse=True):
+            smallest = min(partitions, key=len)
+            smallest.extend(chart_data.get('charts', []))
+        for partition in partitions:
+            partition.sort(key=lambda row: (row['song_id'], row['country_code'], str(row['date'])))
+
+        counts = self._run_phase('load_spotify_charts', partitions)
+
+        # Drop-outs are a few rows per country: one connection is enough
+        loader = PostgresLoader(**self.loader_options)
+        try:
+            for chart_data in all_chart_data:
+                if 'dropouts' in chart_data:
+                    loader.replace_chart_dropouts(chart_data.get('charts', []), chart_data['dropouts'])
+        finally:
+            loader.close_session()
+        if counts:
+            print(f"Loaded chart data for {len(all_chart_data)} countries on {self.workers} connections ({format_counts(counts)})")
+        return counts
+
+    def load_artist_stats(self, stats_data: list) -> dict:
+        """Load artist statistics over parallel connections, partitioned by artist
+
+        Args:
+            stats_data (list): List of artist stats dictionaries
+
+        Returns:
+            dict: Number of inserted, updated and unchanged artist stats
+        """
+        # Create missing monthly partitions up front rather than racing for them
+        loader = PostgresLoader(**self.loader_options)
+        try:
+            loader.ensure_partitions(Artist_stats.__tablename__, stats_data)
+            loader.get_session().commit()
+        finally:
+            loader.close_session()
+
+        counts = self._run_phase('load_artist_stats', partition_rows(stats_data, ['artist_id'], self.workers))
+        if counts:
+            print(f"Loaded {len(stats_data)} artist stats on {self.workers} connections ({format_counts(counts)})")
+        return counts
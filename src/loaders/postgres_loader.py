@@ -1,15 +1,133 @@
+from contextlib import contextmanager
 from sqlalchemy.dialects.postgresql import insert
 import sqlalchemy as sa
 from src.config.connection import get_session
-from src.models.database import Artist, Song, artist_song, Spotify_charts, Artist_stats
+from src.models.database import Album, Artist, Song, Spotify_charts, Artist_stats, Regional_chart, Chart_dropout
+from src.loaders.keys import encode_rows
+from src.models.partitions import ensure_monthly_partitions, group_by_month, partition_table
+from src.models.typed_columns import typed_assignments
+from src.models.history import record_changes_sql
+from src.models.collab import link_artists_sql, link_locks_sql, merge_edges_sql
+from src.transformers.chart_movement_transformer import MOVEMENT_COLUMNS
+import csv
+from datetime import date
+import io
 import json
+import time
+import pandas as pd
+
+
+class CsvRowStream:
+    """File-like object rendering row dictionaries as CSV on demand
+
+    Used as the source of a ``COPY ... FROM STDIN`` so rows are streamed to
+    the server without building the whole payload in memory.
+    """
+
+    def __init__(self, rows, columns: list):
+        self._rows = iter(rows)
+        self._columns = columns
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+        self._pending = ''
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._pending) < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            self._writer.writerow([row.get(column) for column in self._columns])
+            self._pending += self._buffer.getvalue()
+            self._buffer.seek(0)
+            self._buffer.truncate(0)
+
+        if size < 0:
+            chunk, self._pending = self._pending, ''
+        else:
+            chunk, self._pending = self._pending[:size], self._pending[size:]
+        return chunk
+
+    readline = read
+
+
+def estimate_row_bytes(row) -> int:
+    """Roughly estimate the size a row takes once rendered into a statement
+
+    Args:
+        row: Row dictionary or sequence of values
+
+    Returns:
+        int: Estimated size in bytes
+    """
+    values = row.values() if isinstance(row, dict) else row
+    return sum(len(str(value)) + 4 for value in values)
+
+
+def iter_chunks(rows, max_rows: int, max_bytes: int):
+    """Split rows into chunks bounded by row count and estimated size
+
+    Args:
+        rows: Iterable of rows
+        max_rows (int): Maximum number of rows per chunk
+        max_bytes (int): Maximum estimated size of a chunk in bytes
+
+    Yields:
+        list: Consecutive chunks of rows (a single oversized row forms its own chunk)
+    """
+    chunk = []
+    chunk_bytes = 0
+
+    for row in rows:
+        row_bytes = estimate_row_bytes(row)
+        if chunk and (len(chunk) >= max_rows or chunk_bytes + row_bytes > max_bytes):
+            yield chunk
+            chunk = []
+            chunk_bytes = 0
+        chunk.append(row)
+        chunk_bytes += row_bytes
+
+    if chunk:
+        yield chunk
+
+
+def count_upserts(total: int, inserted_flags: list) -> dict:
+    """Summarize a change-aware upsert from its ``RETURNING (xmax = 0)`` flags
+
+    Rows skipped by the ``IS DISTINCT FROM`` condition return nothing, so
+    whatever was neither inserted nor updated is unchanged.
+
+    Args:
+        total (int): Number of rows sent
+        inserted_flags (list): One boolean per returned row, True when inserted
+
+    Returns:
+        dict: Number of inserted, updated and unchanged rows
+    """
+    inserted = sum(1 for flag in inserted_flags if flag)
+    updated = len(inserted_flags) - inserted
+    return {'inserted': inserted, 'updated': updated, 'unchanged': total - inserted - updated}
+
+
+def format_counts(counts: dict) -> str:
+    return f"{counts['inserted']} inserted, {counts['updated']} updated, {counts['unchanged']} unchanged"
 
 
 class PostgresLoader:
     """Handles all database loading operations for the ETL pipeline"""
 
-    def __init__(self):
+    def __init__(self, bulk_mode: bool = False, chunk_rows: int = 5000, chunk_bytes: int = 8 * 1024 * 1024):
+        """
+        Args:
+            bulk_mode (bool): Load charts and stats through COPY into a staging
+                table followed by a set-based upsert (meant for backfills)
+            chunk_rows (int): Maximum number of rows sent per statement
+            chunk_bytes (int): Maximum estimated payload size per statement
+        """
         self.session = None
+        self.bulk_mode = bulk_mode
+        self.chunk_rows = chunk_rows
+        self.chunk_bytes = chunk_bytes
+        self.in_unit_of_work = False
 
     def get_session(self):
         """Get or create database session"""
@@ -23,6 +141,65 @@ class PostgresLoader:
             self.session.close()
             self.session = None
 
+    def _commit(self, session):
+        """Commit the session unless writes are collected in a unit of work"""
+        if not self.in_unit_of_work:
+            session.commit()
+
+    def _rollback(self, session):
+        """Roll back the session unless a unit of work owns the transaction"""
+        if not self.in_unit_of_work:
+            session.rollback()
+
+    @contextmanager
+    def unit_of_work(self):
+        """Collect every load issued inside the block into a single transaction
+
+        Foreign key checks are deferred until the end of each savepoint
+        (see ``load_country_savepoint``) or the final commit, and the
+        session is closed once the transaction is over.
+
+        Yields:
+            Session: The session shared by all loads of the unit of work
+        """
+        session = self.get_session()
+        self.in_unit_of_work = True
+        try:
+            session.execute(sa.text("SET CONSTRAINTS ALL DEFERRED"))
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            self.in_unit_of_work = False
+            self.close_session()
+
+    def _execute_chunked(self, session, stmt, rows: list, label: str):
+        """Execute a statement over rows chunk by chunk in the current transaction
+
+        Each chunk is sent as an executemany, which SQLAlchemy batches into
+        multi-row INSERTs (insertmanyvalues), so neither the SQL string nor
+        the parameter list grows with the size of the input.
+
+        Args:
+            session: Database session
+            stmt: Statement without bound values
+            rows (list): List of row dictionaries
+            label (str): Name of the rows used in the timing output
+
+        Returns:
+            list: Rows returned by the statement (empty without RETURNING)
+        """
+        returned = []
+        for number, chunk in enumerate(iter_chunks(rows, self.chunk_rows, self.chunk_bytes), start=1):
+            start = time.perf_counter()
+            result = session.execute(stmt, chunk)
+            if result.returns_rows:
+                returned.extend(result.all())
+            print(f"  {label} chunk {number}: {len(chunk)} rows in {time.perf_counter() - start:.2f}s")
+        return returned
+
     def load_artists(self, artists_data: list):
         """Load artists data with upsert functionality
 
@@ -34,13 +211,12 @@ class PostgresLoader:
 
         session = self.get_session()
         try:
-            stmt = insert(Artist).values(artists_data)
-            stmt = stmt.on_conflict_do_nothing(index_elements=['spotify_id'])
-            session.execute(stmt)
-            session.commit()
+            stmt = insert(Artist).on_conflict_do_nothing(index_elements=['spotify_id'])
+            self._execute_chunked(session, stmt, artists_data, 'artists')
+            self._commit(session)
             print(f"Loaded {len(artists_data)} artists")
         except Exception as e:
-            session.rollback()
+            self._rollback(session)
             print(f"Error loading artists: {e}")
             raise
 
@@ -55,18 +231,17 @@ class PostgresLoader:
 
         session = self.get_session()
         try:
-            stmt = insert(Song).values(songs_data)
-            stmt = stmt.on_conflict_do_nothing(index_elements=['song_id'])
-            session.execute(stmt)
-            session.commit()
+            stmt = insert(Song).on_conflict_do_nothing(index_elements=['song_id'])
+            self._execute_chunked(session, stmt, songs_data, 'songs')
+            self._commit(session)
             print(f"Loaded {len(songs_data)} songs")
         except Exception as e:
-            session.rollback()
+            self._rollback(session)
             print(f"Error loading songs: {e}")
             raise
 
     def load_artist_song_relationships(self, relationships_data: list):
-        """Load artist-song relationships
+        """Load artist-song relationships and merge the collaboration edges they create
 
         Args:
             relationships_data (list): List of artist-song relationship dictionaries
@@ -76,73 +251,326 @@ class PostgresLoader:
 
         session = self.get_session()
         try:
-            stmt = insert(artist_song).values(relationships_data)
-            stmt = stmt.on_conflict_do_nothing(index_elements=['artist_id', 'song_id'])
-            session.execute(stmt)
-            session.commit()
+            rows = self.encode_keys(relationships_data, ['artist_id', 'song_id'])
+            session.execute(sa.text(link_locks_sql(':{}')), {"song_keys": sorted({row['song_key'] for row in rows})})
+            stmt = sa.text(link_artists_sql(':{}'))
+            inserted = []
+            for number, chunk in enumerate(iter_chunks(rows, self.chunk_rows, self.chunk_bytes), start=1):
+                start = time.perf_counter()
+                inserted.extend(session.execute(stmt, {
+                    "artist_keys": [row['artist_key'] for row in chunk], "song_keys": [row['song_key'] for row in chunk]
+                }).all())
+                print(f"  artist-song relationships chunk {number}: {len(chunk)} rows in {time.perf_counter() - start:.2f}s")
+            # One edge merge for the whole load, so its artist_collab rows are locked in order
+            if inserted:
+                session.execute(sa.text(merge_edges_sql(':{}')), {
+                    "artist_keys": [link[0] for link in inserted], "song_keys": [link[1] for link in inserted]
+                })
+            self._commit(session)
             print(f"Loaded {len(relationships_data)} artist-song relationships")
         except Exception as e:
-            session.rollback()
+            self._rollback(session)
             print(f"Error loading relationships: {e}")
             raise
 
-    def load_spotify_charts(self, charts_data: list):
+    def encode_keys(self, rows: list, id_columns: list) -> list:
+        """Replace natural keys by surrogate keys, resolved in bulk on the loader's session
+
+        Args:
+            rows (list): List of row dictionaries
+            id_columns (list): Natural key columns to encode
+
+        Returns:
+            list: Row dictionaries carrying surrogate keys
+        """
+        session = self.get_session()
+
+        def fetch_keys(table: str, natural_column: str, key_column: str, ids: list):
+            return session.execute(
+                sa.text(f"SELECT {natural_column}, {key_column} FROM {table} WHERE {natural_column} = ANY(:ids)"),
+                {"ids": ids}
+            ).all()
+
+        return encode_rows(rows, id_columns, fetch_keys)
+
+    def _encode_or_rollback(self, rows: list, id_columns: list) -> list:
+        try:
+            return self.encode_keys(rows, id_columns)
+        except Exception as e:
+            self._rollback(self.get_session())
+            print(f"Error resolving keys: {e}")
+            raise
+
+    def load_spotify_charts(self, charts_data: list) -> dict:
         """Load Spotify charts data with upsert functionality
 
         Args:
             charts_data (list): List of chart entry dictionaries
+
+        Returns:
+            dict: Number of inserted, updated and unchanged chart entries
         """
         if not charts_data:
+            return count_upserts(0, [])
+
+        self.ensure_partitions(Spotify_charts.__tablename__, charts_data)
+        # Entries loaded without the movement stage (e.g. older spooled batches) carry NULL movements
+        charts_data = [{**dict.fromkeys(MOVEMENT_COLUMNS), **row} for row in charts_data]
+        rows = self._encode_or_rollback(charts_data, ['song_id', 'country_code'])
+        upsert = self.copy_upsert if self.bulk_mode else self.upsert
+        counts = upsert(
+            Spotify_charts.__table__,
+            rows,
+            index_elements=['song_key', 'country_key', 'date'],
+            update_columns=['streams', 'total_streams', 'days', 'rank'] + MOVEMENT_COLUMNS
+        )
+        print(f"Loaded {len(charts_data)} chart entries ({format_counts(counts)})")
+        return counts
+
+    def replace_chart_dropouts(self, charts_data: list, dropouts_data: list):
+        """Replace the drop-outs of the country-days of a batch of chart entries
+
+        Args:
+            charts_data (list): Chart entry dictionaries whose country-days are replaced
+            dropouts_data (list): Drop-out dictionaries built by ``src.transformers.chart_movement_transformer``
+        """
+        days = sorted({(str(row['date'])[:10], row['country_code']) for row in charts_data})
+        if not days:
             return
 
+        rows = self._encode_or_rollback(dropouts_data, ['song_id', 'country_code']) if dropouts_data else []
         session = self.get_session()
         try:
-            stmt = insert(Spotify_charts).values(charts_data)
-            stmt = stmt.on_conflict_do_update(
-                index_elements=['song_id', 'country_code', 'date'],
-                set_={
-                    'streams': stmt.excluded.streams,
-                    'total_streams': stmt.excluded.total_streams,
-                    'days': stmt.excluded.days,
-                    'rank': stmt.excluded.rank
-                }
-            )
-            session.execute(stmt)
-            session.commit()
-            print(f"Loaded {len(charts_data)} chart entries")
+            session.execute(sa.text("""
+                DELETE FROM chart_dropout d
+                USING unnest(CAST(:dates AS text[]), CAST(:countries AS text[])) AS u(day, country_code)
+                JOIN country co ON co.country_code = u.country_code
+                WHERE d.country_key = co.country_key AND d.date = CAST(u.day AS date)
+                """), {"dates": [day for day, _ in days], "countries": [country for _, country in days]})
+            if rows:
+                self._execute_chunked(session, insert(Chart_dropout.__table__), rows, 'chart drop-outs')
+            self._commit(session)
         except Exception as e:
-            session.rollback()
-            print(f"Error loading charts: {e}")
+            self._rollback(session)
+            print(f"Error loading chart drop-outs: {e}")
             raise
 
-    def load_artist_stats(self, stats_data: list):
+    def load_artist_stats(self, stats_data: list) -> dict:
         """Load artist statistics with upsert functionality
 
         Args:
             stats_data (list): List of artist stats dictionaries
+
+        Returns:
+            dict: Number of inserted, updated and unchanged artist stats
         """
         if not stats_data:
-            return
+            return count_upserts(0, [])
+
+        # Write each month straight into its partition: stats arrive for the
+        # current day, so this normally touches (and analyzes) one partition
+        self.ensure_partitions(Artist_stats.__tablename__, stats_data)
+        upsert = self.copy_upsert if self.bulk_mode else self.upsert
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        for month, rows in sorted(group_by_month(self._encode_or_rollback(stats_data, ['artist_id'])).items()):
+            month_counts = upsert(
+                partition_table(Artist_stats.__table__, month),
+                rows,
+                index_elements=['artist_key', 'date'],
+                update_columns=['total_streams', 'daily_streams', 'listeners']
+            )
+            for key, value in month_counts.items():
+                counts[key] += value
+        print(f"Loaded {len(stats_data)} artist stats ({format_counts(counts)})")
+        return counts
+
+    def ensure_partitions(self, table_name: str, rows: list):
+        """Create the monthly partitions of a table needed by the rows' dates
+
+        Runs in the loader's transaction, so partitions created for a load
+        that is rolled back disappear with it.
+
+        Args:
+            table_name (str): Partitioned table
+            rows (list): List of row dictionaries with a ``date`` key
+        """
+        session = self.get_session()
+        try:
+            ensure_monthly_partitions(session, table_name, {row['date'] for row in rows})
+        except Exception as e:
+            self._rollback(session)
+            print(f"Error creating partitions of {table_name}: {e}")
+            raise
 
+    def upsert(self, table: sa.Table, rows: list, index_elements: list, update_columns: list) -> dict:
+        """Change-aware upsert of rows through chunked multi-row INSERTs
+
+        Conflicting rows are only rewritten when at least one updated column
+        IS DISTINCT FROM the stored value, so re-loading unchanged data
+        produces no dead tuples.
+
+        Args:
+            table (sa.Table): Target table
+            rows (list): List of row dictionaries
+            index_elements (list): Conflict target columns
+            update_columns (list): Columns overwritten on conflict
+
+        Returns:
+            dict: Number of inserted, updated and unchanged rows
+        """
         session = self.get_session()
         try:
-            stmt = insert(Artist_stats).values(stats_data)
+            stmt = insert(table)
             stmt = stmt.on_conflict_do_update(
-                index_elements=['artist_id', 'date'],
-                set_={
-                    'total_streams': stmt.excluded.total_streams,
-                    'daily_streams': stmt.excluded.daily_streams,
-                    'listeners': stmt.excluded.listeners
-                }
+                index_elements=index_elements,
+                set_={column: stmt.excluded[column] for column in update_columns},
+                where=sa.or_(*[table.c[column].is_distinct_from(stmt.excluded[column]) for column in update_columns])
+            ).returning(sa.literal_column("xmax = 0").label("inserted"))
+            returned = self._execute_chunked(session, stmt, rows, table.name)
+            self._commit(session)
+            return count_upserts(len(rows), [row.inserted for row in returned])
+        except Exception as e:
+            self._rollback(session)
+            print(f"Error loading {table.name}: {e}")
+            raise
+
+    def copy_upsert(self, table: sa.Table, rows: list, index_elements: list, update_columns: list) -> dict:
+        """Upsert rows through COPY into a temporary staging table
+
+        Rows are streamed with ``COPY FROM STDIN`` into a temp table, merged
+        into the target with a single ``INSERT ... SELECT ... ON CONFLICT``,
+        the temp table is dropped and the target is analyzed afterwards.
+        Like ``upsert``, rows whose values did not change are left untouched.
+
+        Args:
+            table (sa.Table): Target table
+            rows (list): List of row dictionaries
+            index_elements (list): Conflict target columns
+            update_columns (list): Columns overwritten on conflict
+
+        Returns:
+            dict: Number of inserted, updated and unchanged rows
+        """
+        columns = [column.name for column in table.columns]
+        column_list = ', '.join(columns)
+        stage = f"stage_{table.name}"
+
+        merge_sql = f"""
+        INSERT INTO {table.name} AS t ({column_list})
+        SELECT DISTINCT ON ({', '.join(index_elements)}) {column_list}
+        FROM {stage}
+        ON CONFLICT ({', '.join(index_elements)}) DO UPDATE
+        SET {', '.join(f'{column} = EXCLUDED.{column}' for column in update_columns)}
+        WHERE ({', '.join(f't.{column}' for column in update_columns)})
+            IS DISTINCT FROM ({', '.join(f'EXCLUDED.{column}' for column in update_columns)})
+        RETURNING (xmax = 0) AS inserted
+        """
+
+        session = self.get_session()
+        try:
+            cursor = session.connection().connection.cursor()
+            cursor.execute(
+                f"CREATE TEMP TABLE {stage} (LIKE {table.name} INCLUDING DEFAULTS) ON COMMIT DROP"
             )
-            session.execute(stmt)
-            session.commit()
-            print(f"Loaded {len(stats_data)} artist stats")
+            cursor.copy_expert(
+                f"COPY {stage} ({column_list}) FROM STDIN WITH (FORMAT csv)",
+                CsvRowStream(rows, columns)
+            )
+            returned = session.execute(sa.text(merge_sql)).scalars().all()
+            session.execute(sa.text(f"DROP TABLE {stage}"))
+            self._commit(session)
+
+            session.execute(sa.text(f"ANALYZE {table.name}"))
+            self._commit(session)
+            return count_upserts(len(rows), returned)
         except Exception as e:
-            session.rollback()
-            print(f"Error loading artist stats: {e}")
+            self._rollback(session)
+            print(f"Error bulk loading {table.name}: {e}")
             raise
 
+    def _bulk_jsonb_update(self, session, table_name: str, key_column: str, json_column: str, records: list,
+                           extra_columns: dict = None):
+        """Set a JSONB column for a whole batch of rows in a single UPDATE
+
+        Keys and serialized payloads are shipped as two parallel arrays and
+        joined against the target table through ``unnest``, split into
+        statements bounded by the loader's chunk limits. Typed columns
+        extracted from the JSONB column (see ``src.models.typed_columns``)
+        are computed in the same statement.
+
+        Args:
+            session: Database session
+            table_name (str): Table to update
+            key_column (str): Column matched against each record's ``id``
+            json_column (str): JSONB column receiving the record
+            records (list): List of Spotify API objects carrying an ``id``
+            extra_columns (dict): Other columns to set, mapping column name to
+                its SQL type and a dictionary of values by record ``id``
+        """
+        extra_columns = extra_columns or {}
+        payloads = {record['id']: json.dumps(record) for record in records if record}
+        arrays = ["CAST(:ids AS text[])", "CAST(:payloads AS text[])"] + [
+            f"CAST(CAST(:{column} AS text[]) AS {sql_type}[])" for column, (sql_type, _) in extra_columns.items()
+        ]
+        assignments = [f"{json_column} = v.doc"] + typed_assignments(json_column, 'v.doc') + [
+            f"{column} = v.{column}" for column in extra_columns
+        ]
+        stmt = sa.text(f"""
+            UPDATE {table_name} AS t
+            SET {', '.join(assignments)}
+            FROM (
+                SELECT id, CAST(payload AS jsonb) AS doc{''.join(f', {column}' for column in extra_columns)}
+                FROM unnest({', '.join(arrays)}) AS u(id, payload{''.join(f', {column}' for column in extra_columns)})
+            ) AS v
+            WHERE t.{key_column} = v.id
+            """)
+
+        for chunk in iter_chunks(payloads.items(), self.chunk_rows, self.chunk_bytes):
+            ids, chunk_payloads = zip(*chunk)
+            params = {"ids": list(ids), "payloads": list(chunk_payloads)}
+            for column, (_, values) in extra_columns.items():
+                params[column] = [values.get(record_id) for record_id in ids]
+            session.execute(stmt, params)
+
+    def _sync_artist_genres(self, session, artist_ids: list):
+        """Bring artist_genre in line with the genres of the artists' sp_artist
+
+        Genres an artist lost are deleted and new ones inserted, so only the
+        given artists' rows are touched.
+
+        Args:
+            session: Database session
+            artist_ids (list): Spotify IDs of the updated artists
+        """
+        for chunk in iter_chunks(artist_ids, self.chunk_rows, self.chunk_bytes):
+            session.execute(sa.text("""
+                DELETE FROM artist_genre g
+                USING artist a
+                WHERE a.artist_key = g.artist_key
+                  AND a.spotify_id = ANY(:ids)
+                  AND NOT COALESCE(a.sp_artist->'genres' ? g.genre, false)
+                """), {"ids": chunk})
+            session.execute(sa.text("""
+                INSERT INTO artist_genre (artist_key, genre)
+                SELECT a.artist_key, genre
+                FROM artist a, jsonb_array_elements_text(a.sp_artist->'genres') AS genre
+                WHERE a.spotify_id = ANY(:ids) AND jsonb_typeof(a.sp_artist->'genres') = 'array'
+                ON CONFLICT (artist_key, genre) DO NOTHING
+                """), {"ids": chunk})
+
+    def _record_history(self, session, kind: str, ids: list):
+        """Append a history version for the artists or songs whose tracked fields changed
+
+        Args:
+            session: Database session
+            kind (str): ``artist`` or ``song``
+            ids (list): Spotify IDs of the updated entities
+        """
+        stmt = sa.text(record_changes_sql(kind))
+        today = date.today()
+        for chunk in iter_chunks(ids, self.chunk_rows, self.chunk_bytes):
+            session.execute(stmt, {"ids": chunk, "today": today})
+
     def update_artist_spotify_data(self, artist_data: list):
         """Update artists with Spotify API data
 
@@ -154,50 +582,64 @@ class PostgresLoader:
 
         session = self.get_session()
         try:
-            for artist in artist_data:
-                if artist:
-                    artist_json = json.dumps(artist)
-                    session.execute(
-                        sa.text("""
-                        UPDATE artist
-                        SET sp_artist = CAST(:artist_data AS jsonb)
-                        WHERE spotify_id = :artist_id
-                        """),
-                        {"artist_data": artist_json, "artist_id": artist['id']}
-                    )
-            session.commit()
+            self._bulk_jsonb_update(session, 'artist', 'spotify_id', 'sp_artist', artist_data)
+            artist_ids = [artist['id'] for artist in artist_data if artist]
+            self._sync_artist_genres(session, artist_ids)
+            self._record_history(session, 'artist', artist_ids)
+            self._commit(session)
             print(f"Updated {len(artist_data)} artists with Spotify data")
         except Exception as e:
-            session.rollback()
+            self._rollback(session)
             print(f"Error updating artist Spotify data: {e}")
             raise
 
-    def update_song_spotify_data(self, track_data: list):
+    def load_albums(self, albums_data: list) -> dict:
+        """Load albums, refreshing the ones whose data changed
+
+        Args:
+            albums_data (list): List of album dictionaries (see ``src.transformers.track_transformer``)
+
+        Returns:
+            dict: Number of inserted, updated and unchanged albums
+        """
+        if not albums_data:
+            return count_upserts(0, [])
+
+        counts = self.upsert(
+            Album.__table__,
+            albums_data,
+            index_elements=['album_id'],
+            update_columns=['name', 'album_type', 'release_date', 'release_date_precision', 'total_tracks', 'sp_album']
+        )
+        print(f"Loaded {len(albums_data)} albums ({format_counts(counts)})")
+        return counts
+
+    def update_song_spotify_data(self, track_data: list, market_bits: dict = None, album_ids: dict = None):
         """Update songs with Spotify API data
 
         Args:
             track_data (list): List of track data from Spotify API
+            market_bits (dict): Market bit string of each track id, written to
+                ``available_markets`` (see ``src.transformers.track_transformer``)
+            album_ids (dict): Album id of each track id, written to ``album_id``
+                (the albums must be loaded first)
         """
         if not track_data:
             return
 
         session = self.get_session()
         try:
-            for track in track_data:
-                if track:
-                    track_json = json.dumps(track)
-                    session.execute(
-                        sa.text("""
-                        UPDATE song
-                        SET sp_track = CAST(:track_data AS jsonb)
-                        WHERE song_id = :track_id
-                        """),
-                        {"track_data": track_json, "track_id": track['id']}
-                    )
-            session.commit()
+            extra_columns = {}
+            if market_bits is not None:
+                extra_columns['available_markets'] = ('varbit', market_bits)
+            if album_ids is not None:
+                extra_columns['album_id'] = ('text', album_ids)
+            self._bulk_jsonb_update(session, 'song', 'song_id', 'sp_track', track_data, extra_columns)
+            self._record_history(session, 'song', [track['id'] for track in track_data if track])
+            self._commit(session)
             print(f"Updated {len(track_data)} songs with Spotify data")
         except Exception as e:
-            session.rollback()
+            self._rollback(session)
             print(f"Error updating song Spotify data: {e}")
             raise
 
@@ -212,24 +654,82 @@ class PostgresLoader:
 
         session = self.get_session()
         try:
-            for features in features_data:
-                if features:
-                    features_json = json.dumps(features)
-                    session.execute(
-                        sa.text("""
-                        UPDATE song
-                        SET features = CAST(:features_data AS jsonb)
-                        WHERE song_id = :track_id
-                        """),
-                        {"features_data": features_json, "track_id": features['id']}
-                    )
-            session.commit()
+            self._bulk_jsonb_update(session, 'song', 'song_id', 'features', features_data)
+            self._commit(session)
             print(f"Updated {len(features_data)} songs with audio features")
         except Exception as e:
-            session.rollback()
+            self._rollback(session)
             print(f"Error updating song audio features: {e}")
             raise
 
+    def fetch_chart_days(self, dates: list) -> pd.DataFrame:
+        """Read every country's chart entries on the given dates, with the country's region
+
+        Args:
+            dates (list): ISO dates
+
+        Returns:
+            pd.DataFrame: Columns date, region, song_key, streams and rank
+        """
+        session = self.get_session()
+        return pd.read_sql(sa.text("""
+            SELECT ch.date, co.region, ch.song_key, ch.streams, ch.rank
+            FROM spotify_charts_keyed ch
+            JOIN country co ON co.country_key = ch.country_key
+            WHERE ch.date = ANY(CAST(CAST(:dates AS text[]) AS date[]))
+            """), session.connection(), params={"dates": dates})
+
+    def fetch_previous_charts(self, days: list) -> pd.DataFrame:
+        """Read the chart of the previous day of each (date, country) pair, in one query
+
+        Args:
+            days (list): (ISO date, country code) tuples
+
+        Returns:
+            pd.DataFrame: Columns country_code, date, song_id, streams and rank
+        """
+        session = self.get_session()
+        return pd.read_sql(sa.text("""
+            SELECT co.country_code, ch.date, s.song_id, ch.streams, ch.rank
+            FROM unnest(CAST(:dates AS text[]), CAST(:countries AS text[])) AS u(day, country_code)
+            JOIN country co ON co.country_code = u.country_code
+            JOIN spotify_charts_keyed ch ON ch.country_key = co.country_key AND ch.date = CAST(u.day AS date) - 1
+            JOIN song s ON s.song_key = ch.song_key
+            """), session.connection(), params={
+                "dates": [day for day, _ in days], "countries": [country for _, country in days]
+            })
+
+    def replace_regional_charts(self, dates: list, regional_charts: pd.DataFrame):
+        """Replace the regional and global charts of the given dates
+
+        Args:
+            dates (list): ISO dates being replaced
+            regional_charts (pd.DataFrame): Rows built by ``src.transformers.regional_chart_transformer``
+        """
+        session = self.get_session()
+        try:
+            session.execute(
+                sa.delete(Regional_chart).where(Regional_chart.date.in_([date.fromisoformat(day) for day in dates]))
+            )
+            rows = regional_charts.to_dict('records')
+            if rows:
+                self._execute_chunked(session, insert(Regional_chart.__table__), rows, 'regional chart entries')
+            self._commit(session)
+            print(f"Loaded {len(rows)} regional chart entries for {len(dates)} dates")
+        except Exception as e:
+            self._rollback(session)
+            print(f"Error loading regional charts: {e}")
+            raise
+
+    def _load_chart_parts(self, chart_data: dict):
+        """Load artists, songs, relationships, charts and chart drop-outs of one chart payload"""
+        self.load_artists(chart_data.get('artists', []))
+        self.load_songs(chart_data.get('songs', []))
+        self.load_artist_song_relationships(chart_data.get('artist_songs', []))
+        self.load_spotify_charts(chart_data.get('charts', []))
+        if 'dropouts' in chart_data:
+            self.replace_chart_dropouts(chart_data.get('charts', []), chart_data['dropouts'])
+
     def load_complete_chart_data(self, chart_data: dict):
         """Load complete chart data (artists, songs, relationships, charts)
 
@@ -238,10 +738,7 @@ class PostgresLoader:
         """
         try:
             # Load in proper order to respect foreign key constraints
-            self.load_artists(chart_data.get('artists', []))
-            self.load_songs(chart_data.get('songs', []))
-            self.load_artist_song_relationships(chart_data.get('artist_songs', []))
-            self.load_spotify_charts(chart_data.get('charts', []))
+            self._load_chart_parts(chart_data)
 
             print("Successfully loaded complete chart data")
         except Exception as e:
@@ -249,3 +746,54 @@ class PostgresLoader:
             raise
         finally:
             self.close_session()
+
+    def load_country_savepoint(self, chart_data: dict) -> bool:
+        """Load one country's chart data in a savepoint of the current unit of work
+
+        Foreign key checks stay deferred while the country is written and
+        are forced before the savepoint is released, so a country failing
+        on data or constraints is rolled back alone.
+
+        Args:
+            chart_data (dict): Dictionary containing all chart-related data
+
+        Returns:
+            bool: Whether the country's data was kept
+        """
+        session = self.get_session()
+        charts = chart_data.get('charts', [])
+        country_code = charts[0]['country_code'] if charts else 'unknown'
+        savepoint = session.begin_nested()
+        try:
+            self._load_chart_parts(chart_data)
+            session.execute(sa.text("SET CONSTRAINTS ALL IMMEDIATE"))
+            savepoint.commit()
+            return True
+        except Exception as e:
+            savepoint.rollback()
+            print(f"Rolled back chart data for {country_code}: {e}")
+            return False
+        finally:
+            session.execute(sa.text("SET CONSTRAINTS ALL DEFERRED"))
+
+    def load_charts_unit_of_work(self, all_chart_data: list) -> list:
+        """Load the chart data of every country in a single transaction
+
+        Each country is written inside its own savepoint (see
+        ``load_country_savepoint``), and the countries that succeeded are
+        committed together.
+
+        Args:
+            all_chart_data (list): List of chart data dictionaries (one per country)
+
+        Returns:
+            list: Chart data dictionaries that were loaded successfully
+        """
+        with self.unit_of_work():
+            loaded = [
+                chart_data for chart_data in all_chart_data
+                if chart_data and self.load_country_savepoint(chart_data)
+            ]
+
+        print(f"Committed chart data for {len(loaded)}/{len(all_chart_data)} countries in one transaction")
+        return loaded
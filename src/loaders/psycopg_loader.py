@@ -0,0 +1,387 @@
+from contextlib import contextmanager
+from src.config.connection import db_config
+from src.loaders.postgres_loader import count_upserts, format_counts
+from src.loaders.keys import encode_rows
+from src.models.partitions import month_start, partition_name, monthly_partition_ddl, group_by_month
+from src.models.collab import link_artists_sql, link_locks_sql, merge_edges_sql
+from src.transformers.chart_movement_transformer import MOVEMENT_COLUMNS
+
+try:
+    import psycopg
+    HAS_PSYCOPG = True
+except ImportError:
+    HAS_PSYCOPG = False
+
+
+ARTIST_UPSERT = """
+INSERT INTO artist (spotify_id, name)
+VALUES (%(spotify_id)s, %(name)s)
+ON CONFLICT (spotify_id) DO NOTHING
+"""
+
+SONG_UPSERT = """
+INSERT INTO song (song_id, name)
+VALUES (%(song_id)s, %(name)s)
+ON CONFLICT (song_id) DO NOTHING
+"""
+
+CHART_UPSERT = """
+INSERT INTO spotify_charts_keyed AS t (date, country_key, song_key, streams, total_streams, days, rank,
+                                       previous_rank, rank_change, streams_change, entry)
+VALUES (%(date)s, %(country_key)s, %(song_key)s, %(streams)s, %(total_streams)s, %(days)s, %(rank)s,
+        %(previous_rank)s, %(rank_change)s, %(streams_change)s, %(entry)s)
+ON CONFLICT (song_key, country_key, date) DO UPDATE
+SET streams = EXCLUDED.streams, total_streams = EXCLUDED.total_streams, days = EXCLUDED.days, rank = EXCLUDED.rank,
+    previous_rank = EXCLUDED.previous_rank, rank_change = EXCLUDED.rank_change,
+    streams_change = EXCLUDED.streams_change, entry = EXCLUDED.entry
+WHERE (t.streams, t.total_streams, t.days, t.rank, t.previous_rank, t.rank_change, t.streams_change, t.entry)
+    IS DISTINCT FROM (EXCLUDED.streams, EXCLUDED.total_streams, EXCLUDED.days, EXCLUDED.rank,
+                      EXCLUDED.previous_rank, EXCLUDED.rank_change, EXCLUDED.streams_change, EXCLUDED.entry)
+RETURNING (xmax = 0) AS inserted
+"""
+
+# Drop-outs are replaced whole for every country-day of a chart payload
+DROPOUT_DELETE = """
+DELETE FROM chart_dropout d
+USING unnest(%(dates)s::text[], %(countries)s::text[]) AS u(day, country_code)
+JOIN country co ON co.country_code = u.country_code
+WHERE d.country_key = co.country_key AND d.date = u.day::date
+"""
+
+DROPOUT_INSERT = """
+INSERT INTO chart_dropout (date, country_key, song_key, last_rank, last_streams)
+VALUES (%(date)s, %(country_key)s, %(song_key)s, %(last_rank)s, %(last_streams)s)
+"""
+
+# {partition} is the monthly partition of artist_stats_keyed receiving the rows
+STATS_UPSERT = """
+INSERT INTO {partition} AS t (artist_key, date, total_streams, daily_streams, listeners)
+VALUES (%(artist_key)s, %(date)s, %(total_streams)s, %(daily_streams)s, %(listeners)s)
+ON CONFLICT (artist_key, date) DO UPDATE
+SET total_streams = EXCLUDED.total_streams, daily_streams = EXCLUDED.daily_streams, listeners = EXCLUDED.listeners
+WHERE (t.total_streams, t.daily_streams, t.listeners)
+    IS DISTINCT FROM (EXCLUDED.total_streams, EXCLUDED.daily_streams, EXCLUDED.listeners)
+RETURNING (xmax = 0) AS inserted
+"""
+
+
+class PsycopgLoader:
+    """Loader backend built on psycopg 3 pipeline mode and prepared statements
+
+    The recurring upserts are fixed SQL strings, prepared server-side on
+    their first execution (``prepare_threshold = 0``) and reused for the
+    lifetime of the connection. Batches are sent with ``executemany``,
+    which streams every row in pipeline mode without waiting for each
+    result, so a remote database costs one round trip per batch rather
+    than per row. It mirrors the chart and stats API of PostgresLoader.
+    """
+
+    def __init__(self):
+        if not HAS_PSYCOPG:
+            raise ImportError("PsycopgLoader requires psycopg 3: pip install 'psycopg[binary]'")
+        self.connection = None
+        self.in_unit_of_work = False
+
+    def get_connection(self):
+        """Get or create the psycopg connection"""
+        if not self.connection or self.connection.closed:
+            self.connection = psycopg.connect(
+                host=db_config['host'],
+                port=db_config['port'],
+                dbname=db_config['database'],
+                user=db_config['user'],
+                password=db_config['password'],
+                connect_timeout=db_config['connect_timeout'],
+                application_name=db_config['application_name'],
+            )
+            self.connection.prepare_threshold = 0
+        return self.connection
+
+    def close_session(self):
+        """Close the psycopg connection"""
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+
+    def _execute_pipelined(self, sql: str, rows: list, label: str, returning: bool = False):
+        """Stream a prepared statement over all rows in pipeline mode
+
+        Args:
+            sql (str): Statement with named placeholders
+            rows (list): List of row dictionaries
+            label (str): Name of the rows used in messages
+            returning (bool): Collect the first column of each returned row
+
+        Returns:
+            list: Returned values when ``returning`` is set
+        """
+        connection = self.get_connection()
+        returned = []
+        try:
+            with connection.cursor() as cursor:
+                cursor.executemany(sql, rows, returning=returning)
+                if returning:
+                    while True:
+                        returned.extend(row[0] for row in cursor.fetchall())
+                        if not cursor.nextset():
+                            break
+            if not self.in_unit_of_work:
+                connection.commit()
+            return returned
+        except Exception as e:
+            if not self.in_unit_of_work:
+                connection.rollback()
+            print(f"Error loading {label}: {e}")
+            raise
+
+    def encode_keys(self, rows: list, id_columns: list) -> list:
+        """Replace natural keys by surrogate keys, resolved in bulk on the loader's connection
+
+        Args:
+            rows (list): List of row dictionaries
+            id_columns (list): Natural key columns to encode
+
+        Returns:
+            list: Row dictionaries carrying surrogate keys
+        """
+        connection = self.get_connection()
+
+        def fetch_keys(table: str, natural_column: str, key_column: str, ids: list):
+            return connection.execute(
+                f"SELECT {natural_column}, {key_column} FROM {table} WHERE {natural_column} = ANY(%s)", [ids]
+            ).fetchall()
+
+        return encode_rows(rows, id_columns, fetch_keys)
+
+    def load_artists(self, artists_data: list):
+        """Load artists data, ignoring already known artists
+
+        Args:
+            artists_data (list): List of artist dictionaries
+        """
+        if not artists_data:
+            return
+
+        self._execute_pipelined(ARTIST_UPSERT, artists_data, 'artists')
+        print(f"Loaded {len(artists_data)} artists")
+
+    def load_songs(self, songs_data: list):
+        """Load songs data, ignoring already known songs
+
+        Args:
+            songs_data (list): List of song dictionaries
+        """
+        if not songs_data:
+            return
+
+        self._execute_pipelined(SONG_UPSERT, songs_data, 'songs')
+        print(f"Loaded {len(songs_data)} songs")
+
+    def load_artist_song_relationships(self, relationships_data: list):
+        """Load artist-song relationships and merge the collaboration edges they create
+
+        Args:
+            relationships_data (list): List of artist-song relationship dictionaries
+        """
+        if not relationships_data:
+            return
+
+        rows = self.encode_keys(relationships_data, ['artist_id', 'song_id'])
+        connection = self.get_connection()
+        try:
+            # Set-based statements rather than a pipelined batch: the links, then the edges they create
+            connection.execute(link_locks_sql('%({})s'), {"song_keys": sorted({row['song_key'] for row in rows})})
+            inserted = connection.execute(link_artists_sql('%({})s'), {
+                "artist_keys": [row['artist_key'] for row in rows], "song_keys": [row['song_key'] for row in rows]
+            }).fetchall()
+            if inserted:
+                connection.execute(merge_edges_sql('%({})s'), {
+                    "artist_keys": [link[0] for link in inserted], "song_keys": [link[1] for link in inserted]
+                })
+            if not self.in_unit_of_work:
+                connection.commit()
+        except Exception as e:
+            if not self.in_unit_of_work:
+                connection.rollback()
+            print(f"Error loading artist-song relationships: {e}")
+            raise
+        print(f"Loaded {len(relationships_data)} artist-song relationships")
+
+    def ensure_partitions(self, table_name: str, rows: list):
+        """Create the monthly partitions of a table needed by the rows' dates
+
+        Args:
+            table_name (str): Partitioned table
+            rows (list): List of row dictionaries with a ``date`` key
+        """
+        months = {partition_name(table_name, month_start(row['date'])): month_start(row['date']) for row in rows}
+        connection = self.get_connection()
+        try:
+            missing = connection.execute(
+                "SELECT name FROM unnest(%s::text[]) AS name WHERE to_regclass(name) IS NULL",
+                [list(months)]
+            ).fetchall()
+            for (name,) in sorted(missing):
+                connection.execute(monthly_partition_ddl(table_name, months[name]))
+                print(f"Created partition {name}")
+        except Exception as e:
+            if not self.in_unit_of_work:
+                connection.rollback()
+            print(f"Error creating partitions of {table_name}: {e}")
+            raise
+
+    def load_spotify_charts(self, charts_data: list) -> dict:
+        """Load Spotify charts data with change-aware upserts
+
+        Args:
+            charts_data (list): List of chart entry dictionaries
+
+        Returns:
+            dict: Number of inserted, updated and unchanged chart entries
+        """
+        if not charts_data:
+            return count_upserts(0, [])
+
+        self.ensure_partitions('spotify_charts_keyed', charts_data)
+        charts_data = [{**dict.fromkeys(MOVEMENT_COLUMNS), **row} for row in charts_data]
+        rows = self.encode_keys(charts_data, ['song_id', 'country_code'])
+        flags = self._execute_pipelined(CHART_UPSERT, rows, 'chart entries', returning=True)
+        counts = count_upserts(len(charts_data), flags)
+        print(f"Loaded {len(charts_data)} chart entries ({format_counts(counts)})")
+        return counts
+
+    def replace_chart_dropouts(self, charts_data: list, dropouts_data: list):
+        """Replace the drop-outs of the country-days of a batch of chart entries
+
+        Args:
+            charts_data (list): Chart entry dictionaries whose country-days are replaced
+            dropouts_data (list): Drop-out dictionaries built by ``src.transformers.chart_movement_transformer``
+        """
+        days = sorted({(str(row['date'])[:10], row['country_code']) for row in charts_data})
+        if not days:
+            return
+
+        rows = self.encode_keys(dropouts_data, ['song_id', 'country_code']) if dropouts_data else []
+        connection = self.get_connection()
+        try:
+            connection.execute(DROPOUT_DELETE, {
+                "dates": [day for day, _ in days], "countries": [country for _, country in days]
+            })
+            if rows:
+                with connection.cursor() as cursor:
+                    cursor.executemany(DROPOUT_INSERT, rows)
+            if not self.in_unit_of_work:
+                connection.commit()
+        except Exception as e:
+            if not self.in_unit_of_work:
+                connection.rollback()
+            print(f"Error loading chart drop-outs: {e}")
+            raise
+
+    def load_artist_stats(self, stats_data: list) -> dict:
+        """Load artist statistics with change-aware upserts
+
+        Args:
+            stats_data (list): List of artist stats dictionaries
+
+        Returns:
+            dict: Number of inserted, updated and unchanged artist stats
+        """
+        if not stats_data:
+            return count_upserts(0, [])
+
+        self.ensure_partitions('artist_stats_keyed', stats_data)
+        flags = []
+        for month, rows in sorted(group_by_month(self.encode_keys(stats_data, ['artist_id'])).items()):
+            sql = STATS_UPSERT.format(partition=partition_name('artist_stats_keyed', month))
+            flags.extend(self._execute_pipelined(sql, rows, 'artist stats', returning=True))
+        counts = count_upserts(len(stats_data), flags)
+        print(f"Loaded {len(stats_data)} artist stats ({format_counts(counts)})")
+        return counts
+
+    def _load_chart_parts(self, chart_data: dict):
+        """Load artists, songs, relationships, charts and chart drop-outs of one chart payload"""
+        self.load_artists(chart_data.get('artists', []))
+        self.load_songs(chart_data.get('songs', []))
+        self.load_artist_song_relationships(chart_data.get('artist_songs', []))
+        self.load_spotify_charts(chart_data.get('charts', []))
+        if 'dropouts' in chart_data:
+            self.replace_chart_dropouts(chart_data.get('charts', []), chart_data['dropouts'])
+
+    def load_complete_chart_data(self, chart_data: dict):
+        """Load complete chart data (artists, songs, relationships, charts)
+
+        Args:
+            chart_data (dict): Dictionary containing all chart-related data
+        """
+        try:
+            self._load_chart_parts(chart_data)
+            print("Successfully loaded complete chart data")
+        except Exception as e:
+            print(f"Error loading complete chart data: {e}")
+            raise
+
+    @contextmanager
+    def unit_of_work(self):
+        """Collect every load issued inside the block into a single transaction
+
+        The connection is closed once the transaction is over, as in
+        ``PostgresLoader.unit_of_work``.
+
+        Yields:
+            Connection: The connection shared by all loads of the unit of work
+        """
+        connection = self.get_connection()
+        self.in_unit_of_work = True
+        try:
+            with connection.transaction():
+                connection.execute("SET CONSTRAINTS ALL DEFERRED")
+                yield connection
+        finally:
+            self.in_unit_of_work = False
+            self.close_session()
+
+    def load_country_savepoint(self, chart_data: dict) -> bool:
+        """Load one country's chart data in a savepoint of the current unit of work
+
+        Args:
+            chart_data (dict): Dictionary containing all chart-related data
+
+        Returns:
+            bool: Whether the country's data was kept
+        """
+        connection = self.get_connection()
+        charts = chart_data.get('charts', [])
+        country_code = charts[0]['country_code'] if charts else 'unknown'
+        try:
+            with connection.transaction():
+                self._load_chart_parts(chart_data)
+                connection.execute("SET CONSTRAINTS ALL IMMEDIATE")
+            return True
+        except Exception as e:
+            print(f"Rolled back chart data for {country_code}: {e}")
+            return False
+        finally:
+            connection.execute("SET CONSTRAINTS ALL DEFERRED")
+
+    def load_charts_unit_of_work(self, all_chart_data: list) -> list:
+        """Load the chart data of every country in a single transaction
+
+        Same semantics as ``PostgresLoader.load_charts_unit_of_work``: one
+        savepoint per country with deferred foreign key checks forced at
+        its end.
+
+        Args:
+            all_chart_data (list): List of chart data dictionaries (one per country)
+
+        Returns:
+            list: Chart data dictionaries that were loaded successfully
+        """
+        with self.unit_of_work():
+            loaded = [
+                chart_data for chart_data in all_chart_data
+                if chart_data and self.load_country_savepoint(chart_data)
+            ]
+
+        print(f"Committed chart data for {len(loaded)}/{len(all_chart_data)} countries in one transaction")
+        return loaded
@@ -0,0 +1,163 @@
+import os
+import shutil
+import threading
+import time
+from src.loaders.aggregates import AggregateRefresher, rebuild_regional_charts
+from src.loaders.collab_graph import CollabGraphMetrics
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+CHART_PARTS = ['artists', 'songs', 'artist_songs', 'charts', 'dropouts']
+
+
+class BatchSpool:
+    """Append-only local spool of parsed batches in Arrow IPC format
+
+    Every batch is a directory named after a monotonically increasing
+    sequence number and its kind (``chart_data`` or ``artist_stats``),
+    holding one Arrow IPC file per part. Empty parts are written too,
+    since an empty part is not the same as a missing one on replay (empty
+    drop-outs still clear the drop-outs of their chart days). Batches are
+    written to a temporary directory and renamed into place, so a crash
+    never leaves a half-written batch behind, and they are replayed in
+    sequence order.
+    """
+
+    def __init__(self, directory: str = "data/spool"):
+        if not HAS_PYARROW:
+            raise ImportError("BatchSpool requires pyarrow: pip install pyarrow")
+        self.directory = directory
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _next_sequence(self) -> int:
+        sequences = [int(name.split('_', 1)[0]) for name in self.pending()]
+        return max(sequences, default=0) + 1
+
+    def write(self, kind: str, parts: dict) -> str:
+        """Append a batch to the spool
+
+        Args:
+            kind (str): Batch kind, ``chart_data`` or ``artist_stats``
+            parts (dict): Mapping of part name to list of row dictionaries
+
+        Returns:
+            str: Name of the spooled batch
+        """
+        tmp_path = os.path.join(self.directory, f".{kind}.{time.time_ns()}.tmp")
+        os.makedirs(tmp_path)
+
+        for part, rows in parts.items():
+            table = pa.Table.from_pylist(rows)
+            with ipc.new_file(os.path.join(tmp_path, f"{part}.arrow"), table.schema) as writer:
+                writer.write_table(table)
+
+        with self._lock:
+            name = f"{self._next_sequence():012d}_{kind}"
+            os.rename(tmp_path, os.path.join(self.directory, name))
+        return name
+
+    def write_chart_data(self, chart_data: dict) -> str:
+        """Spool one country's chart data"""
+        return self.write('chart_data', {part: chart_data[part] for part in CHART_PARTS if part in chart_data})
+
+    def write_artist_stats(self, stats_data: list) -> str:
+        """Spool a batch of artist statistics"""
+        return self.write('artist_stats', {'stats': stats_data})
+
+    def pending(self) -> list:
+        """List spooled batches in the order they were written"""
+        return sorted(name for name in os.listdir(self.directory) if not name.startswith('.'))
+
+    def read(self, name: str) -> tuple:
+        """Read a spooled batch
+
+        Args:
+            name (str): Name of the batch
+
+        Returns:
+            tuple: Batch kind and mapping of part name to list of row dictionaries
+        """
+        kind = name.split('_', 1)[1]
+        path = os.path.join(self.directory, name)
+        parts = {}
+        for filename in os.listdir(path):
+            with pa.memory_map(os.path.join(path, filename)) as source:
+                parts[filename[:-len('.arrow')]] = ipc.open_file(source).read_all().to_pylist()
+        return kind, parts
+
+    def remove(self, name: str):
+        """Drop a batch once it has been loaded"""
+        shutil.rmtree(os.path.join(self.directory, name))
+
+
+def replay_batches(loader, spool: BatchSpool, batches: list) -> list:
+    """Load spooled batches in order, removing each one once committed
+
+    Loading is idempotent (the upserts resolve conflicts), so a batch that
+    was partially loaded before a failure can safely be replayed. Batches
+    that fail again are kept in the spool for the next replay.
+
+    Args:
+        loader: PostgresLoader (ideally in bulk mode) used to load the batches
+        spool (BatchSpool): Spool holding the batches
+        batches (list): Names of the batches to replay
+
+    Returns:
+        list: (kind, parts) of every replayed batch
+    """
+    replayed = []
+    try:
+        for name in batches:
+            kind, parts = spool.read(name)
+            try:
+                if kind == 'chart_data':
+                    if not loader.load_charts_unit_of_work([parts]):
+                        print(f"Keeping batch {name} in the spool")
+                        continue
+                elif kind == 'artist_stats':
+                    loader.load_artist_stats(parts.get('stats', []))
+            except Exception as e:
+                print(f"Keeping batch {name} in the spool: {e}")
+                continue
+            spool.remove(name)
+            replayed.append((kind, parts))
+    finally:
+        loader.close_session()
+    return replayed
+
+
+def replay_spool(loader, directory: str = "data/spool") -> int:
+    """Replay every spooled batch and refresh what depends on the replayed rows
+
+    The batches are loaded by ``replay_batches``, then the regional charts
+    of the replayed dates are rebuilt and the dashboard aggregates
+    refreshed for the replayed rows.
+
+    Args:
+        loader: PostgresLoader (ideally in bulk mode) used to load the batches
+        directory (str): Spool directory
+
+    Returns:
+        int: Number of replayed batches
+    """
+    spool = BatchSpool(directory)
+    batches = spool.pending()
+    print(f"Found {len(batches)} spooled batches in {directory}")
+
+    replayed = replay_batches(loader, spool, batches)
+    chart_rows = [row for _, parts in replayed for row in parts.get('charts', [])]
+    stats_rows = [row for _, parts in replayed for row in parts.get('stats', [])]
+
+    rebuild_regional_charts(sorted({str(row['date'])[:10] for row in chart_rows}))
+    AggregateRefresher().refresh_charts(chart_rows)
+    AggregateRefresher().refresh_artist_stats(stats_rows)
+    CollabGraphMetrics().refresh()
+
+    print(f"Replayed {len(replayed)}/{len(batches)} spooled batches")
+    return len(replayed)
@@ -0,0 +1,109 @@
+"""Artist collaboration graph maintained alongside artist_song_keyed
+
+``artist_collab`` holds one edge per pair of artists sharing at least one
+song (``artist_key_a < artist_key_b``) with the number of shared songs
+and the first and last chart date of those songs. Edges are merged from
+the artist-song links a load actually inserted, in one statement per
+load once all its links are in, so the whole table is never self-joined
+again. Merged edges are flagged ``metrics_stale`` until the graph
+metrics of their component are recomputed (see
+``src.loaders.collab_graph``).
+"""
+
+# Serializes link loading per song across connections: the edges of a song
+# are computed from its other links, which must be committed (or ours) to be
+# seen. {song_keys} must be sorted so concurrent loaders lock in the same order
+LINK_LOCKS = """
+SELECT pg_advisory_xact_lock(hashtext('artist_collab'), song_key)
+FROM unnest(CAST({song_keys} AS integer[])) AS k(song_key)
+"""
+
+# {artist_keys} and {song_keys} are the driver's placeholders for two parallel arrays
+LINK_ARTISTS = """
+INSERT INTO artist_song_keyed (artist_key, song_key)
+SELECT artist_key, song_key
+FROM unnest(CAST({artist_keys} AS integer[]), CAST({song_keys} AS integer[])) AS n(artist_key, song_key)
+ON CONFLICT (artist_key, song_key) DO NOTHING
+RETURNING artist_key, song_key
+"""
+
+# Merges the edges created by the links inserted by LINK_ARTISTS (the same
+# parallel arrays). Run once per load, so the artist_collab rows of the whole
+# load are locked in (artist_key_a, artist_key_b) order and concurrent
+# loaders sharing edges through different songs cannot deadlock
+MERGE_EDGES = """
+WITH shared AS (
+    SELECT DISTINCT LEAST(n.artist_key, o.artist_key) AS artist_key_a,
+                    GREATEST(n.artist_key, o.artist_key) AS artist_key_b, n.song_key
+    FROM unnest(CAST({artist_keys} AS integer[]), CAST({song_keys} AS integer[])) AS n(artist_key, song_key)
+    JOIN artist_song_keyed o ON o.song_key = n.song_key AND o.artist_key <> n.artist_key
+)
+INSERT INTO artist_collab AS t (artist_key_a, artist_key_b, shared_songs, first_shared_date, last_shared_date, metrics_stale)
+SELECT p.artist_key_a, p.artist_key_b, COUNT(*), MIN(s.first_date), MAX(s.last_date), true
+FROM shared p
+LEFT JOIN song_summary s ON s.song_key = p.song_key
+GROUP BY p.artist_key_a, p.artist_key_b
+ORDER BY p.artist_key_a, p.artist_key_b
+ON CONFLICT (artist_key_a, artist_key_b) DO UPDATE
+SET shared_songs = t.shared_songs + EXCLUDED.shared_songs,
+    first_shared_date = LEAST(t.first_shared_date, EXCLUDED.first_shared_date),
+    last_shared_date = GREATEST(t.last_shared_date, EXCLUDED.last_shared_date),
+    metrics_stale = true
+"""
+
+# Songs are usually linked before they first chart, so the shared chart dates
+# are widened from the songs whose summary the aggregate refresh just updated
+# (expects its ``summary_songs`` temporary table)
+COLLAB_DATES = """
+UPDATE artist_collab t
+SET first_shared_date = LEAST(t.first_shared_date, d.first_date),
+    last_shared_date = GREATEST(t.last_shared_date, d.last_date)
+FROM (
+    SELECT a1.artist_key AS artist_key_a, a2.artist_key AS artist_key_b, MIN(s.first_date) AS first_date,
+           MAX(s.last_date) AS last_date
+    FROM summary_songs x
+    JOIN song_summary s ON s.song_key = x.song_key
+    JOIN artist_song_keyed a1 ON a1.song_key = x.song_key
+    JOIN artist_song_keyed a2 ON a2.song_key = x.song_key AND a2.artist_key > a1.artist_key
+    GROUP BY a1.artist_key, a2.artist_key
+) d
+WHERE t.artist_key_a = d.artist_key_a AND t.artist_key_b = d.artist_key_b
+  AND (t.first_shared_date, t.last_shared_date)
+    IS DISTINCT FROM (LEAST(t.first_shared_date, d.first_date), GREATEST(t.last_shared_date, d.last_date))
+"""
+
+
+def link_artists_sql(placeholder: str) -> str:
+    """Statement inserting artist-song links and returning the ones actually inserted
+
+    Args:
+        placeholder (str): Format of a named parameter for the driver, e.g. ``:{}`` or ``%({})s``
+
+    Returns:
+        str: SQL statement expecting the ``artist_keys`` and ``song_keys`` arrays
+    """
+    return LINK_ARTISTS.format(artist_keys=placeholder.format('artist_keys'), song_keys=placeholder.format('song_keys'))
+
+
+def merge_edges_sql(placeholder: str) -> str:
+    """Statement merging the collaboration edges created by newly inserted artist-song links
+
+    Args:
+        placeholder (str): Format of a named parameter for the driver, e.g. ``:{}`` or ``%({})s``
+
+    Returns:
+        str: SQL statement expecting the ``artist_keys`` and ``song_keys`` arrays of the inserted links
+    """
+    return MERGE_EDGES.format(artist_keys=placeholder.format('artist_keys'), song_keys=placeholder.format('song_keys'))
+
+
+def link_locks_sql(placeholder: str) -> str:
+    """Statement taking the per-song link locks, see ``LINK_LOCKS``
+
+    Args:
+        placeholder (str): Format of a named parameter for the driver, e.g. ``:{}`` or ``%({})s``
+
+    Returns:
+        str: SQL statement expecting the sorted, distinct ``song_keys`` array
+    """
+    return LINK_LOCKS.format(song_keys=placeholder.format('song_keys'))
@@ -1,71 +1,190 @@
-from sqlalchemy import Column, PrimaryKeyConstraint, String, Integer, ForeignKey, Table, Date, BigInteger
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import Column, PrimaryKeyConstraint, String, Integer, SmallInteger, Boolean, REAL, ForeignKey, Table, Date, BigInteger, Index, Identity, event
+from sqlalchemy.dialects.postgresql import JSONB, BIT
+import sqlalchemy as sa
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import relationship
-from sqlalchemy.schema import UniqueConstraint
+from src.models.views import create_compat_views
+from src.models.rollups import ROLLUP_GRAINS, rollup_table_name
 
 
 Base = declarative_base()
 
-# Association table for many-to-many relationship
-artist_song = Table(
-    'artist_song',
+# Association table for many-to-many relationship, keyed by the artist and
+# song surrogate keys (the artist_song view exposes the Spotify IDs)
+artist_song_keyed = Table(
+    'artist_song_keyed',
     Base.metadata,
-    Column('artist_id', String, ForeignKey('artist.spotify_id'), nullable=False),
-    Column('song_id', String, ForeignKey('song.song_id'), nullable=False),
-    PrimaryKeyConstraint('artist_id', 'song_id')
+    Column('artist_key', Integer, ForeignKey('artist.artist_key', deferrable=True), nullable=False),
+    Column('song_key', Integer, ForeignKey('song.song_key', deferrable=True), nullable=False),
+    PrimaryKeyConstraint('artist_key', 'song_key'),
+    # Song -> artists lookups (the primary key only serves artist -> songs)
+    Index('ix_artist_song_keyed_song_key', 'song_key', 'artist_key'),
 )
 
 class Artist(Base):
     __tablename__ = 'artist'
 
     spotify_id = Column(String, primary_key=True)
+    artist_key = Column(Integer, Identity(), unique=True, nullable=False)
     name = Column(String, nullable=False)
     sp_artist = Column(JSONB, nullable=True)
     mbid = Column(String, nullable=True)
 
-    songs = relationship('Song', secondary=artist_song, back_populates='artists')
+    songs = relationship('Song', secondary=artist_song_keyed, back_populates='artists')
+
+    __table_args__ = (
+        # Containment and existence queries on genres (sp_artist->'genres' ? 'pop')
+        Index('ix_artist_sp_artist_genres', sa.text("(sp_artist->'genres')"), postgresql_using='gin'),
+    )
 
     def __repr__(self):
         return f"<Artist(spotify_id='{self.spotify_id}', name='{self.name}')>"
 
+# Genres of each artist, kept in sync with sp_artist by the loader
+class Artist_genre(Base):
+    __tablename__ = 'artist_genre'
+
+    artist_key = Column(Integer, ForeignKey('artist.artist_key', deferrable=True), nullable=False)
+    genre = Column(String, nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('artist_key', 'genre'),
+        Index('ix_artist_genre_genre', 'genre', 'artist_key'),
+    )
+
+    def __repr__(self):
+        return f"<ArtistGenre(artist_key='{self.artist_key}', genre='{self.genre}')>"
+
+# Change-only history of the artists' tracked Spotify fields (see src.models.history)
+class Artist_history(Base):
+    __tablename__ = 'artist_history'
+
+    artist_key = Column(Integer, ForeignKey('artist.artist_key', deferrable=True), nullable=False)
+    valid_from = Column(Date, nullable=False)
+    valid_to = Column(Date, nullable=True)
+    popularity = Column(SmallInteger, nullable=True)
+    followers = Column(BigInteger, nullable=True)
+    genres = Column(JSONB, nullable=True)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('artist_key', 'valid_from'),
+        Index('ix_artist_history_current', 'artist_key', postgresql_where=sa.text('valid_to IS NULL')),
+    )
+
+    def __repr__(self):
+        return f"<ArtistHistory(artist_key='{self.artist_key}', valid_from='{self.valid_from}', popularity='{self.popularity}')>"
+
+# Change-only history of the songs' tracked Spotify fields (see src.models.history)
+class Song_history(Base):
+    __tablename__ = 'song_history'
+
+    song_key = Column(Integer, ForeignKey('song.song_key', deferrable=True), nullable=False)
+    valid_from = Column(Date, nullable=False)
+    valid_to = Column(Date, nullable=True)
+    popularity = Column(SmallInteger, nullable=True)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('song_key', 'valid_from'),
+        Index('ix_song_history_current', 'song_key', postgresql_where=sa.text('valid_to IS NULL')),
+    )
+
+    def __repr__(self):
+        return f"<SongHistory(song_key='{self.song_key}', valid_from='{self.valid_from}', popularity='{self.popularity}')>"
+
+class Album(Base):
+    __tablename__ = 'album'
+
+    album_id = Column(String, primary_key=True)
+    name = Column(String, nullable=True)
+    album_type = Column(String, nullable=True)
+    release_date = Column(Date, nullable=True)
+    release_date_precision = Column(String, nullable=True)
+    total_tracks = Column(SmallInteger, nullable=True)
+    sp_album = Column(JSONB, nullable=True)
+
+    songs = relationship('Song', back_populates='album')
+
+    __table_args__ = (
+        Index('ix_album_release_date', 'release_date'),
+    )
+
+    def __repr__(self):
+        return f"<Album(album_id='{self.album_id}', name='{self.name}')>"
+
 class Song(Base):
     __tablename__ = 'song'
 
     song_id = Column(String, primary_key=True)
+    song_key = Column(Integer, Identity(), unique=True, nullable=False)
     name = Column(String, nullable=False)
+    album_id = Column(String, ForeignKey('album.album_id', deferrable=True), nullable=True)
     sp_track = Column(JSONB, nullable=True)
     features = Column(JSONB, nullable=True)
     mbid = Column(String, nullable=True)
 
-    artists = relationship('Artist', secondary=artist_song, back_populates='songs')
+    # Typed copies of hot sp_track and features fields, written by the loader
+    # (see src.models.typed_columns)
+    popularity = Column(SmallInteger, nullable=True)
+    duration_ms = Column(Integer, nullable=True)
+    explicit = Column(Boolean, nullable=True)
+    release_date = Column(Date, nullable=True)
+    release_date_precision = Column(String, nullable=True)
+    danceability = Column(REAL, nullable=True)
+    energy = Column(REAL, nullable=True)
+    key = Column(SmallInteger, nullable=True)
+    loudness = Column(REAL, nullable=True)
+    mode = Column(SmallInteger, nullable=True)
+    speechiness = Column(REAL, nullable=True)
+    acousticness = Column(REAL, nullable=True)
+    instrumentalness = Column(REAL, nullable=True)
+    liveness = Column(REAL, nullable=True)
+    valence = Column(REAL, nullable=True)
+    tempo = Column(REAL, nullable=True)
+    time_signature = Column(SmallInteger, nullable=True)
+    # Market availability, bit i set for the country with country_key i + 1
+    # (see src.models.markets)
+    available_markets = Column(BIT(varying=True), nullable=True)
+
+    artists = relationship('Artist', secondary=artist_song_keyed, back_populates='songs')
+    album = relationship('Album', back_populates='songs')
+
+    __table_args__ = (
+        Index('ix_song_album_id', 'album_id'),
+        Index('ix_song_popularity', 'popularity'),
+        Index('ix_song_release_date', 'release_date'),
+        Index('ix_song_tempo', 'tempo'),
+    )
 
     def __repr__(self):
         return f"<Song(song_id='{self.song_id}', name='{self.name}')>"
 
 class Artist_stats(Base):
-    __tablename__ = "artist_stats"
+    __tablename__ = "artist_stats_keyed"
 
-    artist_id = Column(String, ForeignKey('artist.spotify_id'), nullable=False)
+    artist_key = Column(Integer, ForeignKey('artist.artist_key', deferrable=True), nullable=False)
     date = Column(Date, nullable=False)
     total_streams = Column(BigInteger)
     daily_streams = Column(Integer)
     listeners = Column(BigInteger)
 
-
-
     __table_args__ = (
-        UniqueConstraint('artist_id', 'date', name='uq_artists_stats'),
-        PrimaryKeyConstraint('artist_id', 'date'),
+        PrimaryKeyConstraint('artist_key', 'date'),
+        Index('ix_artist_stats_keyed_date_brin', 'date', postgresql_using='brin'),
+        # Covering index for the per-day artist leaderboard
+        Index('ix_artist_stats_keyed_date_daily_streams', 'date', daily_streams.desc(),
+              postgresql_include=['artist_key', 'listeners']),
+        # Monthly partitions are created by src.models.partitions
+        {'postgresql_partition_by': 'RANGE (date)'},
     )
 
     def __repr__(self):
-        return f"<ArtistStats(artist='{self.artist_name}', date='{self.date}', streams='{self.total_streams}')>"
+        return f"<ArtistStats(artist_key='{self.artist_key}', date='{self.date}', streams='{self.total_streams}')>"
 
 class Country(Base):
     __tablename__ = 'country'
 
     country_code = Column(String, primary_key=True)
+    country_key = Column(SmallInteger, Identity(), unique=True, nullable=False)
     country_name = Column(String, nullable=False)
     region = Column(String, nullable=True)
 
@@ -73,22 +192,298 @@ class Country(Base):
         return f"<Country(country_code='{self.country_code}', country_name='{self.country_name}')>"
 
 class Spotify_charts(Base):
-    __tablename__ = 'spotify_charts'
+    __tablename__ = 'spotify_charts_keyed'
 
     date = Column(Date, nullable=False)
-    country_code = Column(String, ForeignKey('country.country_code'), nullable=False)
-    song_id = Column(String, ForeignKey('song.song_id'), nullable=False)
+    country_key = Column(SmallInteger, ForeignKey('country.country_key', deferrable=True), nullable=False)
+    song_key = Column(Integer, ForeignKey('song.song_key', deferrable=True), nullable=False)
 
     streams = Column(BigInteger, nullable=False)
     total_streams = Column(BigInteger, nullable=False)
     days = Column(Integer, nullable=False)
     rank = Column(Integer, nullable=False)
 
+    # Movement versus the country's previous day, computed at transform time
+    # (src.transformers.chart_movement_transformer); NULL when unknown
+    previous_rank = Column(Integer, nullable=True)
+    rank_change = Column(Integer, nullable=True)
+    streams_change = Column(BigInteger, nullable=True)
+    entry = Column(String, nullable=True)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('song_key', 'country_key', 'date'),
+        # Covering indexes for "top N of a country on a date" and "every country on a date"
+        Index('ix_spotify_charts_keyed_country_date_rank', 'country_key', 'date', 'rank',
+              postgresql_include=['song_key', 'streams']),
+        Index('ix_spotify_charts_keyed_date_rank', 'date', 'rank',
+              postgresql_include=['country_key', 'song_key', 'streams']),
+        # New entries and re-entries of a country's chart
+        Index('ix_spotify_charts_keyed_entries', 'country_key', 'date',
+              postgresql_where=sa.text("entry IN ('new', 'reentry')")),
+        # Monthly partitions are created by src.models.partitions
+        {'postgresql_partition_by': 'RANGE (date)'},
+    )
+
+    def __repr__(self):
+        return f"<SpotifyCharts(song_key='{self.song_key}', country_key='{self.country_key}', rank='{self.rank}')>"
+
+# Songs of a country's previous-day chart missing from its chart on date,
+# written with the chart entries of that day
+class Chart_dropout(Base):
+    __tablename__ = 'chart_dropout'
+
+    date = Column(Date, nullable=False)
+    country_key = Column(SmallInteger, ForeignKey('country.country_key', deferrable=True), nullable=False)
+    song_key = Column(Integer, ForeignKey('song.song_key', deferrable=True), nullable=False)
+    last_rank = Column(Integer, nullable=False)
+    last_streams = Column(BigInteger, nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('country_key', 'date', 'song_key'),
+    )
+
+    def __repr__(self):
+        return f"<ChartDropout(song_key='{self.song_key}', country_key='{self.country_key}', date='{self.date}')>"
+
+# Dashboard aggregates derived from the fact tables and refreshed by
+# src.loaders.aggregates at the end of each pipeline run (no foreign keys:
+# they are rebuilt from tables that already enforce them)
+
+# Latest chart of every country, rebuilt and swapped in atomically
+class Latest_chart(Base):
+    __tablename__ = 'latest_chart'
+
+    country_key = Column(SmallInteger, nullable=False)
+    country_code = Column(String, nullable=False)
+    date = Column(Date, nullable=False)
+    rank = Column(Integer, nullable=False)
+    song_key = Column(Integer, nullable=False)
+    song_id = Column(String, nullable=False)
+    song_name = Column(String, nullable=False)
+    streams = Column(BigInteger, nullable=False)
+    days = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('country_key', 'rank', 'song_key'),
+    )
+
+    def __repr__(self):
+        return f"<LatestChart(country_code='{self.country_code}', rank='{self.rank}', song_id='{self.song_id}')>"
+
+# Chart streams of every artist per day and country
+class Daily_artist_streams(Base):
+    __tablename__ = 'daily_artist_streams'
+
+    date = Column(Date, nullable=False)
+    country_key = Column(SmallInteger, nullable=False)
+    artist_key = Column(Integer, nullable=False)
+    streams = Column(BigInteger, nullable=False)
+    entries = Column(Integer, nullable=False)
+    best_rank = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('date', 'country_key', 'artist_key'),
+        # Top artists of a day, across all countries
+        Index('ix_daily_artist_streams_date_streams', 'date', streams.desc(), postgresql_include=['artist_key']),
+    )
+
+    def __repr__(self):
+        return f"<DailyArtistStreams(date='{self.date}', country_key='{self.country_key}', artist_key='{self.artist_key}')>"
+
+# Days on chart, peak and streaks of every song in every country (see src.models.summaries)
+class Song_country_summary(Base):
+    __tablename__ = 'song_country_summary'
+
+    song_key = Column(Integer, nullable=False)
+    country_key = Column(SmallInteger, nullable=False)
+    days_on_chart = Column(Integer, nullable=False)
+    peak_rank = Column(Integer, nullable=False)
+    first_date = Column(Date, nullable=False)
+    last_date = Column(Date, nullable=False)
+    total_streams = Column(BigInteger, nullable=False)
+    # Consecutive chart days up to the country's latest chart, 0 once the song dropped out
+    current_streak = Column(Integer, nullable=False)
+    current_streak_start = Column(Date, nullable=True)
+    longest_streak = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('song_key', 'country_key'),
+        Index('ix_song_country_summary_country_days', 'country_key', days_on_chart.desc()),
+        # Songs on a running streak, checked when a country's new chart closes streaks
+        Index('ix_song_country_summary_on_chart', 'country_key', postgresql_where=sa.text('current_streak > 0')),
+    )
+
+    def __repr__(self):
+        return f"<SongCountrySummary(song_key='{self.song_key}', country_key='{self.country_key}', days='{self.days_on_chart}')>"
+
+# Chart summary of every song across countries
+class Song_summary(Base):
+    __tablename__ = 'song_summary'
+
+    song_key = Column(Integer, primary_key=True)
+    peak_rank = Column(Integer, nullable=False)
+    first_date = Column(Date, nullable=False)
+    last_date = Column(Date, nullable=False)
+    countries_charted = Column(SmallInteger, nullable=False)
+    chart_days = Column(Integer, nullable=False)
+    longest_streak = Column(Integer, nullable=False)
+    total_streams = Column(BigInteger, nullable=False)
+
+    def __repr__(self):
+        return f"<SongSummary(song_key='{self.song_key}', peak_rank='{self.peak_rank}')>"
+
+# Chart summary of every artist across their songs and countries
+class Artist_summary(Base):
+    __tablename__ = 'artist_summary'
+
+    artist_key = Column(Integer, primary_key=True)
+    peak_rank = Column(Integer, nullable=False)
+    first_date = Column(Date, nullable=False)
+    last_date = Column(Date, nullable=False)
+    songs_charted = Column(Integer, nullable=False)
+    countries_charted = Column(SmallInteger, nullable=False)
+    longest_streak = Column(Integer, nullable=False)
+    total_streams = Column(BigInteger, nullable=False)
+
+    def __repr__(self):
+        return f"<ArtistSummary(artist_key='{self.artist_key}', peak_rank='{self.peak_rank}')>"
+
+# Most recent statistics of every artist
+class Latest_artist_stats(Base):
+    __tablename__ = 'latest_artist_stats'
+
+    artist_key = Column(Integer, primary_key=True)
+    date = Column(Date, nullable=False)
+    total_streams = Column(BigInteger)
+    daily_streams = Column(Integer)
+    listeners = Column(BigInteger)
+
+    __table_args__ = (
+        Index('ix_latest_artist_stats_daily_streams', daily_streams.desc()),
+    )
+
+    def __repr__(self):
+        return f"<LatestArtistStats(artist_key='{self.artist_key}', date='{self.date}', streams='{self.total_streams}')>"
+
+# Last refresh of each aggregate table and the latest data date it covers
+class Aggregate_watermark(Base):
+    __tablename__ = 'aggregate_watermark'
+
+    aggregate = Column(String, primary_key=True)
+    through_date = Column(Date, nullable=False)
+    refreshed_at = Column(sa.DateTime(timezone=True), nullable=False)
+    changed_days = Column(Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<AggregateWatermark(aggregate='{self.aggregate}', through_date='{self.through_date}')>"
+
+# Regional and worldwide charts summed from the country charts (see
+# src.transformers.regional_chart_transformer); scope is a country region or 'Global'
+class Regional_chart(Base):
+    __tablename__ = 'regional_chart'
+
+    date = Column(Date, nullable=False)
+    scope = Column(String, nullable=False)
+    song_key = Column(Integer, nullable=False)
+    streams = Column(BigInteger, nullable=False)
+    countries = Column(SmallInteger, nullable=False)
+    best_country_rank = Column(Integer, nullable=False)
+    rank = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('song_key', 'scope', 'date'),
+        # Top N of a region on a date, as for the country charts
+        Index('ix_regional_chart_scope_date_rank', 'scope', 'date', 'rank', postgresql_include=['song_key', 'streams']),
+    )
+
+    def __repr__(self):
+        return f"<RegionalChart(scope='{self.scope}', date='{self.date}', rank='{self.rank}')>"
+
+# Collaboration edges between artists sharing songs, merged by the loader
+# with the artist-song links (see src.models.collab)
+class Artist_collab(Base):
+    __tablename__ = 'artist_collab'
+
+    artist_key_a = Column(Integer, nullable=False)
+    artist_key_b = Column(Integer, nullable=False)
+    shared_songs = Column(Integer, nullable=False)
+    first_shared_date = Column(Date, nullable=True)
+    last_shared_date = Column(Date, nullable=True)
+    metrics_stale = Column(Boolean, nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('artist_key_a', 'artist_key_b'),
+        sa.CheckConstraint('artist_key_a < artist_key_b', name='ck_artist_collab_ordered'),
+        # Edges of an artist on the b side (the primary key serves the a side)
+        Index('ix_artist_collab_artist_key_b', 'artist_key_b', 'artist_key_a'),
+        Index('ix_artist_collab_stale', 'artist_key_a', postgresql_where=sa.text('metrics_stale')),
+    )
+
+    def __repr__(self):
+        return f"<ArtistCollab(artist_key_a='{self.artist_key_a}', artist_key_b='{self.artist_key_b}', songs='{self.shared_songs}')>"
+
+# Graph metrics of every collaborating artist (see src.loaders.collab_graph)
+class Artist_graph_metrics(Base):
+    __tablename__ = 'artist_graph_metrics'
+
+    artist_key = Column(Integer, primary_key=True)
+    component = Column(Integer, nullable=False)
+    degree = Column(Integer, nullable=False)
+    weighted_degree = Column(Integer, nullable=False)
+    community = Column(Integer, nullable=False)
+    centrality = Column(REAL, nullable=False)
 
     __table_args__ = (
-        UniqueConstraint('song_id', 'country_code', 'date', name='uq_spotify_charts'),
-        PrimaryKeyConstraint('song_id', 'country_code', 'date'),
+        Index('ix_artist_graph_metrics_component', 'component'),
+        Index('ix_artist_graph_metrics_community', 'community'),
     )
 
     def __repr__(self):
-        return f"<SpotifyCharts(song_id='{self.song_id}', country_code='{self.country_code}', rank='{self.rank}')>"
+        return f"<ArtistGraphMetrics(artist_key='{self.artist_key}', community='{self.community}', degree='{self.degree}')>"
+
+# Week, month and year rollups of the charts, one table per grain with the
+# same columns, merged from each day's load (see src.models.rollups)
+def _chart_rollup_table(grain: str) -> Table:
+    table = Table(
+        rollup_table_name(grain),
+        Base.metadata,
+        Column('period_start', Date, nullable=False),
+        Column('song_key', Integer, nullable=False),
+        Column('country_key', SmallInteger, nullable=False),
+        Column('streams', BigInteger, nullable=False),
+        Column('best_rank', Integer, nullable=False),
+        Column('days_on_chart', Integer, nullable=False),
+        Column('entries', Integer, nullable=False),
+        PrimaryKeyConstraint('song_key', 'country_key', 'period_start'),
+    )
+    # Top songs of a country over a period
+    Index(f'ix_{table.name}_country_period_streams', table.c.country_key, table.c.period_start, table.c.streams.desc())
+    return table
+
+chart_rollups = {grain: _chart_rollup_table(grain) for grain in ROLLUP_GRAINS}
+
+# Chart days already merged into the rollups, with a fingerprint of their rows
+class Chart_rollup_merged(Base):
+    __tablename__ = 'chart_rollup_merged'
+
+    date = Column(Date, nullable=False)
+    country_key = Column(SmallInteger, nullable=False)
+    fingerprint = Column(String, nullable=True)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('date', 'country_key'),
+    )
+
+    def __repr__(self):
+        return f"<ChartRollupMerged(date='{self.date}', country_key='{self.country_key}')>"
+
+
+# spotify_charts, artist_stats and artist_song views over the keyed tables
+event.listen(Base.metadata, 'after_create', lambda target, connection, **kw: create_compat_views(connection))
+
+# JSONB documents are stored with LZ4 compression, as in migrations d8b2e4f6a017 and e4a6c8d0f239
+LZ4_COLUMNS = [(Song, 'sp_track'), (Song, 'features'), (Artist, 'sp_artist'), (Album, 'sp_album')]
+for model, column in LZ4_COLUMNS:
+    event.listen(model.__table__, 'after_create', sa.DDL(
+        f"ALTER TABLE {model.__tablename__} ALTER COLUMN {column} SET COMPRESSION lz4"
+    ))
@@ -0,0 +1,129 @@
+"""Change-only history of the tracked fields of the Spotify artist and track objects
+
+Every history row holds the tracked fields of one entity over a validity
+range ``[valid_from, valid_to)``, ``valid_to`` being NULL for the current
+version. A refresh only appends a version when one of the fields differs
+from the current version, so the tables grow with the amount of change
+rather than with days x entities.
+"""
+from datetime import date
+import sqlalchemy as sa
+
+# kind (entity table) -> (history table, natural key column, surrogate key column, JSONB column, tracked fields)
+HISTORY_KINDS = {
+    'artist': ('artist_history', 'spotify_id', 'artist_key', 'sp_artist', {
+        'popularity': "CAST({doc}->>'popularity' AS smallint)",
+        'followers': "CAST({doc}->'followers'->>'total' AS bigint)",
+        'genres': "{doc}->'genres'",
+    }),
+    'song': ('song_history', 'song_id', 'song_key', 'sp_track', {
+        'popularity': "CAST({doc}->>'popularity' AS smallint)",
+    }),
+}
+
+
+def record_changes_sql(kind: str) -> str:
+    """Statement appending a version for every given entity whose tracked fields changed
+
+    The current version of a changed entity is closed at ``:today`` and the
+    new one opened; a second change on the same day overwrites that day's
+    version instead, and a change back to the version closed today deletes
+    that day's version and reopens the previous one, so consecutive
+    versions always differ. Expects ``:ids`` (natural keys) and ``:today``.
+
+    Args:
+        kind (str): ``artist`` or ``song``
+
+    Returns:
+        str: SQL statement
+    """
+    history, natural_column, key_column, json_column, fields = HISTORY_KINDS[kind]
+    names = list(fields)
+    values = ', '.join(f"{expression.format(doc=f'e.{json_column}')} AS {name}" for name, expression in fields.items())
+
+    return f"""
+        WITH fetched AS (
+            SELECT e.{key_column}, {values}
+            FROM {kind} e
+            WHERE e.{natural_column} = ANY(:ids) AND e.{json_column} IS NOT NULL
+        ), changed AS (
+            SELECT f.*
+            FROM fetched f
+            LEFT JOIN {history} h ON h.{key_column} = f.{key_column} AND h.valid_to IS NULL
+            WHERE h.{key_column} IS NULL
+               OR ({', '.join(f'h.{name}' for name in names)}) IS DISTINCT FROM ({', '.join(f'f.{name}' for name in names)})
+        ), reverted AS (
+            SELECT c.{key_column}
+            FROM changed c
+            JOIN {history} h ON h.{key_column} = c.{key_column} AND h.valid_to IS NULL AND h.valid_from = :today
+            JOIN {history} p ON p.{key_column} = c.{key_column} AND p.valid_to = :today
+            WHERE ({', '.join(f'p.{name}' for name in names)}) IS NOT DISTINCT FROM ({', '.join(f'c.{name}' for name in names)})
+        ), deleted AS (
+            DELETE FROM {history} h
+            USING reverted r
+            WHERE h.{key_column} = r.{key_column} AND h.valid_from = :today
+        ), reopened AS (
+            UPDATE {history} h
+            SET valid_to = NULL
+            FROM reverted r
+            WHERE h.{key_column} = r.{key_column} AND h.valid_to = :today
+        ), closed AS (
+            UPDATE {history} h
+            SET valid_to = :today
+            FROM changed c
+            WHERE h.{key_column} = c.{key_column} AND h.valid_to IS NULL AND h.valid_from < :today
+        )
+        INSERT INTO {history} ({key_column}, valid_from, {', '.join(names)})
+        SELECT {key_column}, :today, {', '.join(names)}
+        FROM changed
+        WHERE {key_column} NOT IN (SELECT {key_column} FROM reverted)
+        ON CONFLICT ({key_column}, valid_from) DO UPDATE
+        SET {', '.join(f'{name} = EXCLUDED.{name}' for name in names)}
+        """
+
+
+def value_as_of(session, kind: str, natural_key: str, day: date) -> dict:
+    """Tracked fields of one artist or song as they were on a date
+
+    Served by the (key, valid_from) primary key: a single backward index
+    probe finds the last version that started on or before the date.
+
+    Args:
+        session: Database session
+        kind (str): ``artist`` or ``song``
+        natural_key (str): Spotify ID of the artist or track
+        day (date): Date of interest
+
+    Returns:
+        dict: Tracked fields with ``valid_from`` and ``valid_to``, or None when unknown on that date
+    """
+    history, natural_column, key_column, _, fields = HISTORY_KINDS[kind]
+    row = session.execute(sa.text(f"""
+        SELECT h.valid_from, h.valid_to, {', '.join(f'h.{name}' for name in fields)}
+        FROM {history} h
+        WHERE h.{key_column} = (SELECT {key_column} FROM {kind} WHERE {natural_column} = :key)
+          AND h.valid_from <= :day
+        ORDER BY h.valid_from DESC
+        LIMIT 1
+        """), {"key": natural_key, "day": day}).mappings().first()
+
+    if row is None or (row['valid_to'] is not None and row['valid_to'] <= day):
+        return None
+    return dict(row)
+
+
+def history_as_of_sql(kind: str) -> str:
+    """Query of the tracked fields of every artist or song on ``:day``
+
+    Args:
+        kind (str): ``artist`` or ``song``
+
+    Returns:
+        str: SQL query returning the surrogate key and the tracked fields
+    """
+    history, _, key_column, _, fields = HISTORY_KINDS[kind]
+    return f"""
+        SELECT {key_column}, {', '.join(fields)}
+        FROM {history}
+        WHERE valid_from <= :day AND (valid_to IS NULL OR valid_to > :day)
+        """
@@ -0,0 +1,38 @@
+import sqlalchemy as sa
+from src.models.database import Country, Song
+
+
+def market_positions(session) -> dict:
+    """Bit position of every country code in the market bit strings
+
+    Bit ``i`` of ``song.available_markets`` stands for the country whose
+    ``country_key`` is ``i + 1``, so the bit strings stay aligned with the
+    country table as it grows.
+
+    Args:
+        session: Database session
+
+    Returns:
+        dict: Mapping of country code to bit position
+    """
+    return {code: key - 1 for code, key in session.execute(sa.select(Country.country_code, Country.country_key))}
+
+
+def available_in_market(country_code: str):
+    """SQL condition selecting the songs available in a market
+
+    Songs whose bit string is shorter than the country's position (written
+    before the country was added) or that have no market data are excluded.
+
+    Args:
+        country_code (str): ISO 3166-1 alpha-2 country code
+
+    Returns:
+        ColumnElement: Boolean expression usable in ``where``
+    """
+    key = sa.select(Country.country_key).where(Country.country_code == country_code).scalar_subquery()
+    # CASE guarantees get_bit is only evaluated on long enough bit strings
+    return sa.case(
+        (sa.func.length(Song.available_markets) >= key, sa.func.get_bit(Song.available_markets, key - 1) == 1),
+        else_=False
+    )
@@ -7,9 +7,9 @@ from alembic import context
 
 import os
 import sys
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))))
 
-from db.models import Base
+from src.models.database import Base
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -0,0 +1,73 @@
+"""Change-only history of artist and song Spotify fields
+
+Revision ID: 0a9c3e5b7d61
+Revises: f5b7d9e1a34c
+Create Date: 2026-10-19 22:51:33.207846
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0a9c3e5b7d61'
+down_revision: Union[str, None] = 'f5b7d9e1a34c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'artist_history',
+        sa.Column('artist_key', sa.Integer(), nullable=False),
+        sa.Column('valid_from', sa.Date(), nullable=False),
+        sa.Column('valid_to', sa.Date(), nullable=True),
+        sa.Column('popularity', sa.SmallInteger(), nullable=True),
+        sa.Column('followers', sa.BigInteger(), nullable=True),
+        sa.Column('genres', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.ForeignKeyConstraint(['artist_key'], ['artist.artist_key'], deferrable=True, initially='IMMEDIATE'),
+        sa.PrimaryKeyConstraint('artist_key', 'valid_from'),
+    )
+    op.create_index(
+        'ix_artist_history_current', 'artist_history', ['artist_key'], postgresql_where=sa.text('valid_to IS NULL')
+    )
+
+    op.create_table(
+        'song_history',
+        sa.Column('song_key', sa.Integer(), nullable=False),
+        sa.Column('valid_from', sa.Date(), nullable=False),
+        sa.Column('valid_to', sa.Date(), nullable=True),
+        sa.Column('popularity', sa.SmallInteger(), nullable=True),
+        sa.ForeignKeyConstraint(['song_key'], ['song.song_key'], deferrable=True, initially='IMMEDIATE'),
+        sa.PrimaryKeyConstraint('song_key', 'valid_from'),
+    )
+    op.create_index(
+        'ix_song_history_current', 'song_history', ['song_key'], postgresql_where=sa.text('valid_to IS NULL')
+    )
+
+    # The current Spotify data becomes the first version of every entity
+    op.execute("""
+    INSERT INTO artist_history (artist_key, valid_from, popularity, followers, genres)
+    SELECT artist_key, CURRENT_DATE, CAST(sp_artist->>'popularity' AS smallint),
+           CAST(sp_artist->'followers'->>'total' AS bigint), sp_artist->'genres'
+    FROM artist
+    WHERE sp_artist IS NOT NULL
+    """)
+    op.execute("""
+    INSERT INTO song_history (song_key, valid_from, popularity)
+    SELECT song_key, CURRENT_DATE, CAST(sp_track->>'popularity' AS smallint)
+    FROM song
+    WHERE sp_track IS NOT NULL
+    """)
+    op.execute("ANALYZE artist_history")
+    op.execute("ANALYZE song_history")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('song_history')
+    op.drop_table('artist_history')
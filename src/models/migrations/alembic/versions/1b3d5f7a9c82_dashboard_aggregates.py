@@ -0,0 +1,133 @@
+"""Dashboard aggregate tables and refresh watermark
+
+Revision ID: 1b3d5f7a9c82
+Revises: 0a9c3e5b7d61
+Create Date: 2026-10-19 23:18:40.561203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1b3d5f7a9c82'
+down_revision: Union[str, None] = '0a9c3e5b7d61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'latest_chart',
+        sa.Column('country_key', sa.SmallInteger(), nullable=False),
+        sa.Column('country_code', sa.String(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('rank', sa.Integer(), nullable=False),
+        sa.Column('song_key', sa.Integer(), nullable=False),
+        sa.Column('song_id', sa.String(), nullable=False),
+        sa.Column('song_name', sa.String(), nullable=False),
+        sa.Column('streams', sa.BigInteger(), nullable=False),
+        sa.Column('days', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('country_key', 'rank', 'song_key', name='latest_chart_pkey'),
+    )
+    op.create_table(
+        'daily_artist_streams',
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('country_key', sa.SmallInteger(), nullable=False),
+        sa.Column('artist_key', sa.Integer(), nullable=False),
+        sa.Column('streams', sa.BigInteger(), nullable=False),
+        sa.Column('entries', sa.Integer(), nullable=False),
+        sa.Column('best_rank', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('date', 'country_key', 'artist_key'),
+    )
+    op.create_table(
+        'song_country_summary',
+        sa.Column('song_key', sa.Integer(), nullable=False),
+        sa.Column('country_key', sa.SmallInteger(), nullable=False),
+        sa.Column('days_on_chart', sa.Integer(), nullable=False),
+        sa.Column('peak_rank', sa.Integer(), nullable=False),
+        sa.Column('first_date', sa.Date(), nullable=False),
+        sa.Column('last_date', sa.Date(), nullable=False),
+        sa.Column('total_streams', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('song_key', 'country_key'),
+    )
+    op.create_table(
+        'latest_artist_stats',
+        sa.Column('artist_key', sa.Integer(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('total_streams', sa.BigInteger(), nullable=True),
+        sa.Column('daily_streams', sa.Integer(), nullable=True),
+        sa.Column('listeners', sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint('artist_key'),
+    )
+    op.create_table(
+        'aggregate_watermark',
+        sa.Column('aggregate', sa.String(), nullable=False),
+        sa.Column('through_date', sa.Date(), nullable=False),
+        sa.Column('refreshed_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('changed_days', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('aggregate'),
+    )
+
+    # Initial build over the whole history; the pipelines refresh incrementally from here on
+    op.execute("""
+    INSERT INTO latest_chart (country_key, country_code, date, rank, song_key, song_id, song_name, streams, days)
+    SELECT ch.country_key, co.country_code, ch.date, ch.rank, ch.song_key, s.song_id, s.name, ch.streams, ch.days
+    FROM (SELECT country_key, MAX(date) AS date FROM spotify_charts_keyed GROUP BY country_key) latest
+    JOIN spotify_charts_keyed ch ON ch.country_key = latest.country_key AND ch.date = latest.date
+    JOIN country co ON co.country_key = ch.country_key
+    JOIN song s ON s.song_key = ch.song_key
+    """)
+    op.execute("""
+    INSERT INTO daily_artist_streams (date, country_key, artist_key, streams, entries, best_rank)
+    SELECT ch.date, ch.country_key, ars.artist_key, SUM(ch.streams), COUNT(*), MIN(ch.rank)
+    FROM spotify_charts_keyed ch
+    JOIN artist_song_keyed ars ON ars.song_key = ch.song_key
+    GROUP BY ch.date, ch.country_key, ars.artist_key
+    """)
+    op.execute("""
+    INSERT INTO song_country_summary (song_key, country_key, days_on_chart, peak_rank, first_date, last_date, total_streams)
+    SELECT song_key, country_key, COUNT(*), MIN(rank), MIN(date), MAX(date), SUM(streams)
+    FROM spotify_charts_keyed
+    GROUP BY song_key, country_key
+    """)
+    op.execute("""
+    INSERT INTO latest_artist_stats (artist_key, date, total_streams, daily_streams, listeners)
+    SELECT DISTINCT ON (artist_key) artist_key, date, total_streams, daily_streams, listeners
+    FROM artist_stats_keyed
+    ORDER BY artist_key, date DESC
+    """)
+    op.execute("""
+    INSERT INTO aggregate_watermark (aggregate, through_date, refreshed_at, changed_days)
+    SELECT aggregate, through_date, now(), 0
+    FROM (
+        SELECT unnest(ARRAY['latest_chart', 'daily_artist_streams', 'song_country_summary']) AS aggregate,
+               (SELECT MAX(date) FROM spotify_charts_keyed) AS through_date
+        UNION ALL
+        SELECT 'latest_artist_stats', (SELECT MAX(date) FROM artist_stats_keyed)
+    ) w
+    WHERE through_date IS NOT NULL
+    """)
+
+    op.create_index(
+        'ix_daily_artist_streams_date_streams', 'daily_artist_streams', ['date', sa.text('streams DESC')],
+        postgresql_include=['artist_key']
+    )
+    op.create_index(
+        'ix_song_country_summary_country_days', 'song_country_summary', ['country_key', sa.text('days_on_chart DESC')]
+    )
+    op.create_index('ix_latest_artist_stats_daily_streams', 'latest_artist_stats', [sa.text('daily_streams DESC')])
+    for table in ['latest_chart', 'daily_artist_streams', 'song_country_summary', 'latest_artist_stats']:
+        op.execute(f"ANALYZE {table}")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('aggregate_watermark')
+    op.drop_table('latest_artist_stats')
+    op.drop_table('song_country_summary')
+    op.drop_table('daily_artist_streams')
+    op.drop_table('latest_chart')
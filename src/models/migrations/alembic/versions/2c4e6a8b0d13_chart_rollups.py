@@ -0,0 +1,71 @@
+"""Week, month and year chart rollup tables
+
+Revision ID: 2c4e6a8b0d13
+Revises: 1b3d5f7a9c82
+Create Date: 2026-10-19 23:52:17.804356
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2c4e6a8b0d13'
+down_revision: Union[str, None] = '1b3d5f7a9c82'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+GRAINS = ['week', 'month', 'year']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for grain in GRAINS:
+        table = f'chart_rollup_{grain}'
+        op.create_table(
+            table,
+            sa.Column('period_start', sa.Date(), nullable=False),
+            sa.Column('song_key', sa.Integer(), nullable=False),
+            sa.Column('country_key', sa.SmallInteger(), nullable=False),
+            sa.Column('streams', sa.BigInteger(), nullable=False),
+            sa.Column('best_rank', sa.Integer(), nullable=False),
+            sa.Column('days_on_chart', sa.Integer(), nullable=False),
+            sa.Column('entries', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('song_key', 'country_key', 'period_start'),
+        )
+        op.execute(f"""
+        INSERT INTO {table} (period_start, song_key, country_key, streams, best_rank, days_on_chart, entries)
+        SELECT CAST(date_trunc('{grain}', CAST(date AS timestamp)) AS date), song_key, country_key,
+               SUM(streams), MIN(rank), MAX(days), COUNT(*)
+        FROM spotify_charts_keyed
+        GROUP BY 1, song_key, country_key
+        """)
+        op.create_index(
+            f'ix_{table}_country_period_streams', table, ['country_key', 'period_start', sa.text('streams DESC')]
+        )
+        op.execute(f"ANALYZE {table}")
+
+    op.create_table(
+        'chart_rollup_merged',
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('country_key', sa.SmallInteger(), nullable=False),
+        sa.Column('fingerprint', sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint('date', 'country_key'),
+    )
+    # Every existing day is now part of the rollups
+    op.execute("""
+    INSERT INTO chart_rollup_merged (date, country_key, fingerprint)
+    SELECT date, country_key,
+           md5(string_agg(concat_ws(':', song_key, rank, streams, days), ',' ORDER BY song_key))
+    FROM spotify_charts_keyed
+    GROUP BY date, country_key
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('chart_rollup_merged')
+    for grain in reversed(GRAINS):
+        op.drop_table(f'chart_rollup_{grain}')
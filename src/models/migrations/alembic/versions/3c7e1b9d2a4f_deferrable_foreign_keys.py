@@ -0,0 +1,39 @@
+"""Deferrable foreign keys
+
+Revision ID: 3c7e1b9d2a4f
+Revises: eaa4923c23f8
+Create Date: 2026-10-19 09:12:41.530218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c7e1b9d2a4f'
+down_revision: Union[str, None] = 'eaa4923c23f8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+FOREIGN_KEYS = [
+    ('artist_song', 'artist_song_artist_id_fkey'),
+    ('artist_song', 'artist_song_song_id_fkey'),
+    ('artist_stats', 'artist_stats_artist_id_fkey'),
+    ('spotify_charts', 'spotify_charts_country_code_fkey'),
+    ('spotify_charts', 'spotify_charts_song_id_fkey'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, constraint in FOREIGN_KEYS:
+        op.execute(f"ALTER TABLE {table} ALTER CONSTRAINT {constraint} DEFERRABLE INITIALLY IMMEDIATE")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, constraint in FOREIGN_KEYS:
+        op.execute(f"ALTER TABLE {table} ALTER CONSTRAINT {constraint} NOT DEFERRABLE")
@@ -0,0 +1,60 @@
+"""Regional and global charts derived from the country charts
+
+Revision ID: 3d5f7b9c1e24
+Revises: 2c4e6a8b0d13
+Create Date: 2026-10-19 23:58:41.117924
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3d5f7b9c1e24'
+down_revision: Union[str, None] = '2c4e6a8b0d13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'regional_chart',
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('scope', sa.String(), nullable=False),
+        sa.Column('song_key', sa.Integer(), nullable=False),
+        sa.Column('streams', sa.BigInteger(), nullable=False),
+        sa.Column('countries', sa.SmallInteger(), nullable=False),
+        sa.Column('best_country_rank', sa.Integer(), nullable=False),
+        sa.Column('rank', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('song_key', 'scope', 'date'),
+    )
+
+    # Same ranking as src.transformers.regional_chart_transformer, over the whole history
+    op.execute("""
+    INSERT INTO regional_chart (date, scope, song_key, streams, countries, best_country_rank, rank)
+    SELECT date, scope, song_key, streams, countries, best_country_rank,
+           ROW_NUMBER() OVER (PARTITION BY date, scope ORDER BY streams DESC, best_country_rank, song_key)
+    FROM (
+        SELECT ch.date, s.scope, ch.song_key, SUM(ch.streams) AS streams, COUNT(*) AS countries,
+               MIN(ch.rank) AS best_country_rank
+        FROM spotify_charts_keyed ch
+        JOIN country co ON co.country_key = ch.country_key
+        CROSS JOIN LATERAL (VALUES (co.region), ('Global')) AS s(scope)
+        WHERE s.scope IS NOT NULL
+        GROUP BY ch.date, s.scope, ch.song_key
+    ) summed
+    """)
+
+    op.create_index(
+        'ix_regional_chart_scope_date_rank', 'regional_chart', ['scope', 'date', 'rank'],
+        postgresql_include=['song_key', 'streams']
+    )
+    op.execute("ANALYZE regional_chart")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('regional_chart')
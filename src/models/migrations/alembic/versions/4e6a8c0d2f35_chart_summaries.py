@@ -0,0 +1,131 @@
+"""Streaks on song_country_summary, song and artist chart summaries
+
+Revision ID: 4e6a8c0d2f35
+Revises: 3d5f7b9c1e24
+Create Date: 2026-10-20 00:26:13.480531
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e6a8c0d2f35'
+down_revision: Union[str, None] = '3d5f7b9c1e24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('song_country_summary', sa.Column('current_streak', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('song_country_summary', sa.Column('current_streak_start', sa.Date(), nullable=True))
+    op.add_column('song_country_summary', sa.Column('longest_streak', sa.Integer(), nullable=False, server_default='0'))
+    op.alter_column('song_country_summary', 'current_streak', server_default=None)
+    op.alter_column('song_country_summary', 'longest_streak', server_default=None)
+
+    # Streaks need the whole history of every pair, so the summary is rebuilt once
+    # (gaps and islands over the charts, as src.models.summaries did at this revision)
+    op.execute("""
+    INSERT INTO song_country_summary AS t (song_key, country_key, days_on_chart, peak_rank, first_date, last_date,
+                                           total_streams, current_streak, current_streak_start, longest_streak)
+    WITH entries AS (
+        SELECT ch.song_key, ch.country_key, ch.date, ch.rank, ch.streams,
+               ch.date - CAST(ROW_NUMBER() OVER (PARTITION BY ch.song_key, ch.country_key ORDER BY ch.date) AS integer) AS island
+        FROM spotify_charts_keyed ch
+    ), islands AS (
+        SELECT song_key, country_key, MIN(date) AS streak_start, MAX(date) AS streak_end, COUNT(*) AS streak
+        FROM entries
+        GROUP BY song_key, country_key, island
+    ), latest AS (
+        SELECT country_key, MAX(date) AS date
+        FROM spotify_charts_keyed
+        GROUP BY country_key
+    )
+    SELECT e.song_key, e.country_key, e.days_on_chart, e.peak_rank, e.first_date, e.last_date, e.total_streams,
+           CASE WHEN cur.streak_end = l.date THEN cur.streak ELSE 0 END AS current_streak,
+           CASE WHEN cur.streak_end = l.date THEN cur.streak_start END AS current_streak_start,
+           lng.longest_streak
+    FROM (
+        SELECT song_key, country_key, COUNT(*) AS days_on_chart, MIN(rank) AS peak_rank, MIN(date) AS first_date,
+               MAX(date) AS last_date, SUM(streams) AS total_streams
+        FROM entries
+        GROUP BY song_key, country_key
+    ) e
+    JOIN (
+        SELECT song_key, country_key, MAX(streak) AS longest_streak
+        FROM islands
+        GROUP BY song_key, country_key
+    ) lng ON lng.song_key = e.song_key AND lng.country_key = e.country_key
+    JOIN (
+        SELECT DISTINCT ON (song_key, country_key) song_key, country_key, streak_start, streak_end, streak
+        FROM islands
+        ORDER BY song_key, country_key, streak_end DESC
+    ) cur ON cur.song_key = e.song_key AND cur.country_key = e.country_key
+    JOIN latest l ON l.country_key = e.country_key
+    ON CONFLICT (song_key, country_key) DO UPDATE
+    SET days_on_chart = EXCLUDED.days_on_chart, peak_rank = EXCLUDED.peak_rank, first_date = EXCLUDED.first_date,
+        last_date = EXCLUDED.last_date, total_streams = EXCLUDED.total_streams,
+        current_streak = EXCLUDED.current_streak, current_streak_start = EXCLUDED.current_streak_start,
+        longest_streak = EXCLUDED.longest_streak
+    """)
+    op.create_index(
+        'ix_song_country_summary_on_chart', 'song_country_summary', ['country_key'],
+        postgresql_where=sa.text('current_streak > 0')
+    )
+
+    op.create_table(
+        'song_summary',
+        sa.Column('song_key', sa.Integer(), nullable=False),
+        sa.Column('peak_rank', sa.Integer(), nullable=False),
+        sa.Column('first_date', sa.Date(), nullable=False),
+        sa.Column('last_date', sa.Date(), nullable=False),
+        sa.Column('countries_charted', sa.SmallInteger(), nullable=False),
+        sa.Column('chart_days', sa.Integer(), nullable=False),
+        sa.Column('longest_streak', sa.Integer(), nullable=False),
+        sa.Column('total_streams', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('song_key'),
+    )
+    op.create_table(
+        'artist_summary',
+        sa.Column('artist_key', sa.Integer(), nullable=False),
+        sa.Column('peak_rank', sa.Integer(), nullable=False),
+        sa.Column('first_date', sa.Date(), nullable=False),
+        sa.Column('last_date', sa.Date(), nullable=False),
+        sa.Column('songs_charted', sa.Integer(), nullable=False),
+        sa.Column('countries_charted', sa.SmallInteger(), nullable=False),
+        sa.Column('longest_streak', sa.Integer(), nullable=False),
+        sa.Column('total_streams', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('artist_key'),
+    )
+    op.execute("""
+    INSERT INTO song_summary (song_key, peak_rank, first_date, last_date, countries_charted, chart_days,
+                              longest_streak, total_streams)
+    SELECT song_key, MIN(peak_rank), MIN(first_date), MAX(last_date), COUNT(*), SUM(days_on_chart),
+           MAX(longest_streak), SUM(total_streams)
+    FROM song_country_summary
+    GROUP BY song_key
+    """)
+    op.execute("""
+    INSERT INTO artist_summary (artist_key, peak_rank, first_date, last_date, songs_charted, countries_charted,
+                                longest_streak, total_streams)
+    SELECT ars.artist_key, MIN(s.peak_rank), MIN(s.first_date), MAX(s.last_date), COUNT(DISTINCT s.song_key),
+           COUNT(DISTINCT s.country_key), MAX(s.longest_streak), SUM(s.total_streams)
+    FROM artist_song_keyed ars
+    JOIN song_country_summary s ON s.song_key = ars.song_key
+    GROUP BY ars.artist_key
+    """)
+    for table in ['song_country_summary', 'song_summary', 'artist_summary']:
+        op.execute(f"ANALYZE {table}")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('artist_summary')
+    op.drop_table('song_summary')
+    op.drop_index('ix_song_country_summary_on_chart', table_name='song_country_summary')
+    op.drop_column('song_country_summary', 'longest_streak')
+    op.drop_column('song_country_summary', 'current_streak_start')
+    op.drop_column('song_country_summary', 'current_streak')
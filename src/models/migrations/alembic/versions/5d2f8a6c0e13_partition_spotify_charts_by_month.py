@@ -0,0 +1,87 @@
+"""Partition spotify_charts by month
+
+Revision ID: 5d2f8a6c0e13
+Revises: 3c7e1b9d2a4f
+Create Date: 2026-10-19 11:04:27.918344
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2f8a6c0e13'
+down_revision: Union[str, None] = '3c7e1b9d2a4f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+COLUMNS = "date, country_code, song_id, streams, total_streams, days, rank"
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _rename_old_table():
+    op.rename_table('spotify_charts', 'spotify_charts_old')
+    op.execute("ALTER INDEX spotify_charts_pkey RENAME TO spotify_charts_old_pkey")
+    op.execute("ALTER INDEX uq_spotify_charts RENAME TO uq_spotify_charts_old")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _rename_old_table()
+
+    op.execute("""
+    CREATE TABLE spotify_charts (
+        date DATE NOT NULL,
+        country_code VARCHAR NOT NULL REFERENCES country (country_code) DEFERRABLE INITIALLY IMMEDIATE,
+        song_id VARCHAR NOT NULL REFERENCES song (song_id) DEFERRABLE INITIALLY IMMEDIATE,
+        streams BIGINT NOT NULL,
+        total_streams BIGINT NOT NULL,
+        days INTEGER NOT NULL,
+        rank INTEGER NOT NULL,
+        PRIMARY KEY (song_id, country_code, date),
+        CONSTRAINT uq_spotify_charts UNIQUE (song_id, country_code, date)
+    ) PARTITION BY RANGE (date)
+    """)
+
+    bounds = op.get_bind().execute(sa.text("SELECT min(date), max(date) FROM spotify_charts_old")).first()
+    month = (bounds[0] or date.today()).replace(day=1)
+    last = _add_months(max(bounds[1] or date.today(), date.today()).replace(day=1), 2)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE IF NOT EXISTS spotify_charts_y{month.year}m{month.month:02d} PARTITION OF spotify_charts "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        month = _add_months(month, 1)
+
+    op.execute(f"INSERT INTO spotify_charts ({COLUMNS}) SELECT {COLUMNS} FROM spotify_charts_old")
+    op.drop_table('spotify_charts_old')
+    op.execute("ANALYZE spotify_charts")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _rename_old_table()
+
+    op.execute("""
+    CREATE TABLE spotify_charts (
+        date DATE NOT NULL,
+        country_code VARCHAR NOT NULL REFERENCES country (country_code) DEFERRABLE INITIALLY IMMEDIATE,
+        song_id VARCHAR NOT NULL REFERENCES song (song_id) DEFERRABLE INITIALLY IMMEDIATE,
+        streams BIGINT NOT NULL,
+        total_streams BIGINT NOT NULL,
+        days INTEGER NOT NULL,
+        rank INTEGER NOT NULL,
+        PRIMARY KEY (song_id, country_code, date),
+        CONSTRAINT uq_spotify_charts UNIQUE (song_id, country_code, date)
+    )
+    """)
+    op.execute(f"INSERT INTO spotify_charts ({COLUMNS}) SELECT {COLUMNS} FROM spotify_charts_old")
+    op.execute("DROP TABLE spotify_charts_old CASCADE")
@@ -0,0 +1,69 @@
+"""Artist collaboration edges and graph metrics
+
+Revision ID: 5f7b9d1e3a46
+Revises: 4e6a8c0d2f35
+Create Date: 2026-10-20 00:51:37.204816
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f7b9d1e3a46'
+down_revision: Union[str, None] = '4e6a8c0d2f35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'artist_collab',
+        sa.Column('artist_key_a', sa.Integer(), nullable=False),
+        sa.Column('artist_key_b', sa.Integer(), nullable=False),
+        sa.Column('shared_songs', sa.Integer(), nullable=False),
+        sa.Column('first_shared_date', sa.Date(), nullable=True),
+        sa.Column('last_shared_date', sa.Date(), nullable=True),
+        sa.Column('metrics_stale', sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint('artist_key_a', 'artist_key_b'),
+        sa.CheckConstraint('artist_key_a < artist_key_b', name='ck_artist_collab_ordered'),
+    )
+    op.create_table(
+        'artist_graph_metrics',
+        sa.Column('artist_key', sa.Integer(), nullable=False),
+        sa.Column('component', sa.Integer(), nullable=False),
+        sa.Column('degree', sa.Integer(), nullable=False),
+        sa.Column('weighted_degree', sa.Integer(), nullable=False),
+        sa.Column('community', sa.Integer(), nullable=False),
+        sa.Column('centrality', sa.REAL(), nullable=False),
+        sa.PrimaryKeyConstraint('artist_key'),
+    )
+
+    # The one full self-join; every edge is stale so the first refresh computes all metrics
+    op.execute("""
+    INSERT INTO artist_collab (artist_key_a, artist_key_b, shared_songs, first_shared_date, last_shared_date,
+                               metrics_stale)
+    SELECT a1.artist_key, a2.artist_key, COUNT(*), MIN(s.first_date), MAX(s.last_date), true
+    FROM artist_song_keyed a1
+    JOIN artist_song_keyed a2 ON a2.song_key = a1.song_key AND a2.artist_key > a1.artist_key
+    LEFT JOIN song_summary s ON s.song_key = a1.song_key
+    GROUP BY a1.artist_key, a2.artist_key
+    """)
+
+    op.create_index('ix_artist_collab_artist_key_b', 'artist_collab', ['artist_key_b', 'artist_key_a'])
+    op.create_index(
+        'ix_artist_collab_stale', 'artist_collab', ['artist_key_a'],
+        postgresql_where=sa.text('metrics_stale')
+    )
+    op.create_index('ix_artist_graph_metrics_component', 'artist_graph_metrics', ['component'])
+    op.create_index('ix_artist_graph_metrics_community', 'artist_graph_metrics', ['community'])
+    op.execute("ANALYZE artist_collab")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('artist_graph_metrics')
+    op.drop_table('artist_collab')
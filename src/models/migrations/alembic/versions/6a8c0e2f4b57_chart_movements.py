@@ -0,0 +1,105 @@
+"""Chart movement fields on spotify_charts_keyed and chart drop-outs
+
+Revision ID: 6a8c0e2f4b57
+Revises: 5f7b9d1e3a46
+Create Date: 2026-10-20 01:17:52.639041
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6a8c0e2f4b57'
+down_revision: Union[str, None] = '5f7b9d1e3a46'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('spotify_charts_keyed', sa.Column('previous_rank', sa.Integer(), nullable=True))
+    op.add_column('spotify_charts_keyed', sa.Column('rank_change', sa.Integer(), nullable=True))
+    op.add_column('spotify_charts_keyed', sa.Column('streams_change', sa.BigInteger(), nullable=True))
+    op.add_column('spotify_charts_keyed', sa.Column('entry', sa.String(), nullable=True))
+
+    op.create_table(
+        'chart_dropout',
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('country_key', sa.SmallInteger(), nullable=False),
+        sa.Column('song_key', sa.Integer(), nullable=False),
+        sa.Column('last_rank', sa.Integer(), nullable=False),
+        sa.Column('last_streams', sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(['country_key'], ['country.country_key'], deferrable=True),
+        sa.ForeignKeyConstraint(['song_key'], ['song.song_key'], deferrable=True),
+        sa.PrimaryKeyConstraint('country_key', 'date', 'song_key'),
+    )
+
+    # Same rules as src.transformers.chart_movement_transformer, over the whole history
+    op.execute("""
+    UPDATE spotify_charts_keyed t
+    SET previous_rank = m.previous_rank,
+        rank_change = m.previous_rank - t.rank,
+        streams_change = t.streams - m.previous_streams,
+        entry = CASE WHEN m.previous_rank IS NOT NULL THEN 'stay'
+                     WHEN t.days <= 1 THEN 'new'
+                     WHEN m.previous_known THEN 'reentry' END
+    FROM (
+        SELECT ch.song_key, ch.country_key, ch.date, p.rank AS previous_rank, p.streams AS previous_streams,
+               d.country_key IS NOT NULL AS previous_known
+        FROM spotify_charts_keyed ch
+        LEFT JOIN spotify_charts_keyed p
+               ON p.song_key = ch.song_key AND p.country_key = ch.country_key AND p.date = ch.date - 1
+        LEFT JOIN (SELECT DISTINCT country_key, date FROM spotify_charts_keyed) d
+               ON d.country_key = ch.country_key AND d.date = ch.date - 1
+    ) m
+    WHERE t.song_key = m.song_key AND t.country_key = m.country_key AND t.date = m.date
+    """)
+    op.execute("""
+    INSERT INTO chart_dropout (date, country_key, song_key, last_rank, last_streams)
+    SELECT p.date + 1, p.country_key, p.song_key, p.rank, p.streams
+    FROM spotify_charts_keyed p
+    JOIN (SELECT DISTINCT country_key, date FROM spotify_charts_keyed) d
+      ON d.country_key = p.country_key AND d.date = p.date + 1
+    WHERE NOT EXISTS (
+        SELECT 1 FROM spotify_charts_keyed n
+        WHERE n.song_key = p.song_key AND n.country_key = p.country_key AND n.date = p.date + 1
+    )
+    """)
+
+    op.create_index(
+        'ix_spotify_charts_keyed_entries', 'spotify_charts_keyed', ['country_key', 'date'],
+        postgresql_where=sa.text("entry IN ('new', 'reentry')")
+    )
+    # Columns can only be appended to a view, which keeps existing readers working
+    op.execute("""
+    CREATE OR REPLACE VIEW spotify_charts AS
+    SELECT c.date, co.country_code, s.song_id, c.streams, c.total_streams, c.days, c.rank,
+           c.previous_rank, c.rank_change, c.streams_change, c.entry
+    FROM spotify_charts_keyed c
+    JOIN song s ON s.song_key = c.song_key
+    JOIN country co ON co.country_key = c.country_key
+    """)
+
+    for table in ['spotify_charts_keyed', 'chart_dropout']:
+        op.execute(f"ANALYZE {table}")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP VIEW spotify_charts")
+    op.execute("""
+    CREATE VIEW spotify_charts AS
+    SELECT c.date, co.country_code, s.song_id, c.streams, c.total_streams, c.days, c.rank
+    FROM spotify_charts_keyed c
+    JOIN song s ON s.song_key = c.song_key
+    JOIN country co ON co.country_key = c.country_key
+    """)
+    op.drop_index('ix_spotify_charts_keyed_entries', table_name='spotify_charts_keyed')
+    op.drop_table('chart_dropout')
+    op.drop_column('spotify_charts_keyed', 'entry')
+    op.drop_column('spotify_charts_keyed', 'streams_change')
+    op.drop_column('spotify_charts_keyed', 'rank_change')
+    op.drop_column('spotify_charts_keyed', 'previous_rank')
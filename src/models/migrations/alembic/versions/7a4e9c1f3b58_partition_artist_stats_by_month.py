@@ -0,0 +1,86 @@
+"""Partition artist_stats by month with a BRIN index on date
+
+Revision ID: 7a4e9c1f3b58
+Revises: 5d2f8a6c0e13
+Create Date: 2026-10-19 14:22:05.417093
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a4e9c1f3b58'
+down_revision: Union[str, None] = '5d2f8a6c0e13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+COLUMNS = "artist_id, date, total_streams, daily_streams, listeners"
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _rename_old_table():
+    op.rename_table('artist_stats', 'artist_stats_old')
+    op.execute("ALTER INDEX artist_stats_pkey RENAME TO artist_stats_old_pkey")
+    op.execute("ALTER INDEX uq_artists_stats RENAME TO uq_artists_stats_old")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _rename_old_table()
+
+    op.execute("""
+    CREATE TABLE artist_stats (
+        artist_id VARCHAR NOT NULL REFERENCES artist (spotify_id) DEFERRABLE INITIALLY IMMEDIATE,
+        date DATE NOT NULL,
+        total_streams BIGINT,
+        daily_streams INTEGER,
+        listeners BIGINT,
+        PRIMARY KEY (artist_id, date),
+        CONSTRAINT uq_artists_stats UNIQUE (artist_id, date)
+    ) PARTITION BY RANGE (date)
+    """)
+    # Rows arrive in date order, so block ranges summarise each partition in a few pages
+    op.execute("CREATE INDEX ix_artist_stats_date_brin ON artist_stats USING brin (date)")
+
+    bounds = op.get_bind().execute(sa.text("SELECT min(date), max(date) FROM artist_stats_old")).first()
+    month = (bounds[0] or date.today()).replace(day=1)
+    last = _add_months(max(bounds[1] or date.today(), date.today()).replace(day=1), 2)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE IF NOT EXISTS artist_stats_y{month.year}m{month.month:02d} PARTITION OF artist_stats "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        month = _add_months(month, 1)
+
+    op.execute(f"INSERT INTO artist_stats ({COLUMNS}) SELECT {COLUMNS} FROM artist_stats_old ORDER BY date, artist_id")
+    op.drop_table('artist_stats_old')
+    op.execute("ANALYZE artist_stats")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _rename_old_table()
+    op.execute("DROP INDEX IF EXISTS ix_artist_stats_date_brin")
+
+    op.execute("""
+    CREATE TABLE artist_stats (
+        artist_id VARCHAR NOT NULL REFERENCES artist (spotify_id) DEFERRABLE INITIALLY IMMEDIATE,
+        date DATE NOT NULL,
+        total_streams BIGINT,
+        daily_streams INTEGER,
+        listeners BIGINT,
+        PRIMARY KEY (artist_id, date),
+        CONSTRAINT uq_artists_stats UNIQUE (artist_id, date)
+    )
+    """)
+    op.execute(f"INSERT INTO artist_stats ({COLUMNS}) SELECT {COLUMNS} FROM artist_stats_old")
+    op.execute("DROP TABLE artist_stats_old CASCADE")
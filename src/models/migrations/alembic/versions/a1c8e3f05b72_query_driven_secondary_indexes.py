@@ -0,0 +1,51 @@
+"""Covering secondary indexes for chart and stats access paths
+
+Revision ID: a1c8e3f05b72
+Revises: 7a4e9c1f3b58
+Create Date: 2026-10-19 15:41:12.073519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c8e3f05b72'
+down_revision: Union[str, None] = '7a4e9c1f3b58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Top 200 of a country on a date, and a country's history over a date range
+    op.create_index(
+        'ix_spotify_charts_country_date_rank', 'spotify_charts', ['country_code', 'date', 'rank'],
+        postgresql_include=['song_id', 'streams']
+    )
+    # Every country on a date
+    op.create_index(
+        'ix_spotify_charts_date_rank', 'spotify_charts', ['date', 'rank'],
+        postgresql_include=['country_code', 'song_id', 'streams']
+    )
+    # Song -> artists, used to join chart runs back to their artists
+    op.create_index('ix_artist_song_song_id', 'artist_song', ['song_id', 'artist_id'])
+    # Per-day artist leaderboard
+    op.create_index(
+        'ix_artist_stats_date_daily_streams', 'artist_stats', ['date', sa.text('daily_streams DESC')],
+        postgresql_include=['artist_id', 'listeners']
+    )
+
+    op.execute("ANALYZE spotify_charts")
+    op.execute("ANALYZE artist_song")
+    op.execute("ANALYZE artist_stats")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_artist_stats_date_daily_streams', table_name='artist_stats')
+    op.drop_index('ix_artist_song_song_id', table_name='artist_song')
+    op.drop_index('ix_spotify_charts_date_rank', table_name='spotify_charts')
+    op.drop_index('ix_spotify_charts_country_date_rank', table_name='spotify_charts')
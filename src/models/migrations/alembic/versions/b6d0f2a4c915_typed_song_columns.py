@@ -0,0 +1,133 @@
+"""Typed song columns extracted from sp_track and features
+
+Revision ID: b6d0f2a4c915
+Revises: a1c8e3f05b72
+Create Date: 2026-10-19 16:58:40.261837
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6d0f2a4c915'
+down_revision: Union[str, None] = 'a1c8e3f05b72'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BATCH_SIZE = 5000
+
+COLUMN_TYPES = {
+    'popularity': sa.SmallInteger(),
+    'duration_ms': sa.Integer(),
+    'explicit': sa.Boolean(),
+    'release_date': sa.Date(),
+    'release_date_precision': sa.String(),
+    'danceability': sa.REAL(),
+    'energy': sa.REAL(),
+    'key': sa.SmallInteger(),
+    'loudness': sa.REAL(),
+    'mode': sa.SmallInteger(),
+    'speechiness': sa.REAL(),
+    'acousticness': sa.REAL(),
+    'instrumentalness': sa.REAL(),
+    'liveness': sa.REAL(),
+    'valence': sa.REAL(),
+    'tempo': sa.REAL(),
+    'time_signature': sa.SmallInteger(),
+}
+
+# Typed column expressions as of this revision (frozen: src.models.typed_columns
+# keeps evolving), per JSONB column
+TYPED_ASSIGNMENTS = {
+    'sp_track': [
+        "popularity = CAST(song.sp_track->>'popularity' AS smallint)",
+        "duration_ms = CAST(song.sp_track->>'duration_ms' AS integer)",
+        "explicit = CAST(song.sp_track->>'explicit' AS boolean)",
+        """release_date = CASE
+            WHEN song.sp_track->'album'->>'release_date' ~ '^[1-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]$'
+                THEN CAST(song.sp_track->'album'->>'release_date' AS date)
+            WHEN song.sp_track->'album'->>'release_date' ~ '^[1-9][0-9][0-9][0-9]-[0-9][0-9]$'
+                THEN CAST(song.sp_track->'album'->>'release_date' || '-01' AS date)
+            WHEN song.sp_track->'album'->>'release_date' ~ '^[1-9][0-9][0-9][0-9]$'
+                THEN CAST(song.sp_track->'album'->>'release_date' || '-01-01' AS date)
+        END""",
+        "release_date_precision = song.sp_track->'album'->>'release_date_precision'",
+    ],
+    'features': [
+        "danceability = CAST(song.features->>'danceability' AS real)",
+        "energy = CAST(song.features->>'energy' AS real)",
+        "key = CAST(song.features->>'key' AS smallint)",
+        "loudness = CAST(song.features->>'loudness' AS real)",
+        "mode = CAST(song.features->>'mode' AS smallint)",
+        "speechiness = CAST(song.features->>'speechiness' AS real)",
+        "acousticness = CAST(song.features->>'acousticness' AS real)",
+        "instrumentalness = CAST(song.features->>'instrumentalness' AS real)",
+        "liveness = CAST(song.features->>'liveness' AS real)",
+        "valence = CAST(song.features->>'valence' AS real)",
+        "tempo = CAST(song.features->>'tempo' AS real)",
+        "time_signature = CAST(song.features->>'time_signature' AS smallint)",
+    ],
+}
+
+INDEXES = {
+    'ix_song_popularity': 'popularity',
+    'ix_song_release_date': 'release_date',
+    'ix_song_tempo': 'tempo',
+}
+
+
+def _backfill(json_column: str):
+    """Fill the typed columns of a JSONB column in key-ordered batches
+
+    Every batch is committed on its own, so row locks are held briefly and
+    an interrupted backfill can simply be re-run.
+    """
+    stmt = sa.text(f"""
+        WITH batch AS (
+            SELECT song_id FROM song
+            WHERE song_id > :after AND {json_column} IS NOT NULL
+            ORDER BY song_id
+            LIMIT :batch_size
+        )
+        UPDATE song
+        SET {', '.join(TYPED_ASSIGNMENTS[json_column])}
+        FROM batch
+        WHERE song.song_id = batch.song_id
+        RETURNING song.song_id
+        """)
+
+    connection = op.get_bind()
+    after, updated = '', 0
+    with op.get_context().autocommit_block():
+        while True:
+            song_ids = connection.execute(stmt, {"after": after, "batch_size": BATCH_SIZE}).scalars().all()
+            if not song_ids:
+                break
+            after = max(song_ids)
+            updated += len(song_ids)
+    print(f"Backfilled typed {json_column} columns of {updated} songs")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for column, column_type in COLUMN_TYPES.items():
+        op.add_column('song', sa.Column(column, column_type, nullable=True))
+
+    _backfill('sp_track')
+    _backfill('features')
+
+    for name, column in INDEXES.items():
+        op.create_index(name, 'song', [column])
+    op.execute("ANALYZE song")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in INDEXES:
+        op.drop_index(name, table_name='song')
+    for column in COLUMN_TYPES:
+        op.drop_column('song', column)
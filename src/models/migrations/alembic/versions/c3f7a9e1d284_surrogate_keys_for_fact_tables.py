@@ -0,0 +1,231 @@
+"""Integer surrogate keys for Spotify IDs and country codes in the fact tables
+
+Revision ID: c3f7a9e1d284
+Revises: b6d0f2a4c915
+Create Date: 2026-10-19 18:12:53.604718
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f7a9e1d284'
+down_revision: Union[str, None] = 'b6d0f2a4c915'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+DIMENSION_KEYS = [
+    ('artist', 'artist_key', sa.Integer()),
+    ('song', 'song_key', sa.Integer()),
+    ('country', 'country_key', sa.SmallInteger()),
+]
+
+
+# Compatibility views as of this revision (frozen: src.models.views keeps evolving)
+COMPAT_VIEWS = {
+    'spotify_charts': """
+        SELECT c.date, co.country_code, s.song_id, c.streams, c.total_streams, c.days, c.rank
+        FROM spotify_charts_keyed c
+        JOIN song s ON s.song_key = c.song_key
+        JOIN country co ON co.country_key = c.country_key
+    """,
+    'artist_stats': """
+        SELECT a.spotify_id AS artist_id, st.date, st.total_streams, st.daily_streams, st.listeners
+        FROM artist_stats_keyed st
+        JOIN artist a ON a.artist_key = st.artist_key
+    """,
+    'artist_song': """
+        SELECT a.spotify_id AS artist_id, s.song_id
+        FROM artist_song_keyed ars
+        JOIN artist a ON a.artist_key = ars.artist_key
+        JOIN song s ON s.song_key = ars.song_key
+    """,
+}
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_monthly_partitions(table: str, source: str):
+    """Create the partitions of ``table`` covering the dates of ``source`` and the coming months"""
+    bounds = op.get_bind().execute(sa.text(f"SELECT min(date), max(date) FROM {source}")).first()
+    month = (bounds[0] or date.today()).replace(day=1)
+    last = _add_months(max(bounds[1] or date.today(), date.today()).replace(day=1), 2)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE IF NOT EXISTS {table}_y{month.year}m{month.month:02d} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        month = _add_months(month, 1)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, column, column_type in DIMENSION_KEYS:
+        op.add_column(table, sa.Column(column, column_type, sa.Identity(), nullable=False))
+        op.create_unique_constraint(f"{table}_{column}_key", table, [column])
+
+    # Charts
+    op.execute("""
+    CREATE TABLE spotify_charts_keyed (
+        date DATE NOT NULL,
+        country_key SMALLINT NOT NULL REFERENCES country (country_key) DEFERRABLE INITIALLY IMMEDIATE,
+        song_key INTEGER NOT NULL REFERENCES song (song_key) DEFERRABLE INITIALLY IMMEDIATE,
+        streams BIGINT NOT NULL,
+        total_streams BIGINT NOT NULL,
+        days INTEGER NOT NULL,
+        rank INTEGER NOT NULL,
+        PRIMARY KEY (song_key, country_key, date)
+    ) PARTITION BY RANGE (date)
+    """)
+    _create_monthly_partitions('spotify_charts_keyed', 'spotify_charts')
+    op.execute("""
+    INSERT INTO spotify_charts_keyed (date, country_key, song_key, streams, total_streams, days, rank)
+    SELECT c.date, co.country_key, s.song_key, c.streams, c.total_streams, c.days, c.rank
+    FROM spotify_charts c
+    JOIN song s ON s.song_id = c.song_id
+    JOIN country co ON co.country_code = c.country_code
+    ORDER BY c.date
+    """)
+    op.drop_table('spotify_charts')
+    op.create_index(
+        'ix_spotify_charts_keyed_country_date_rank', 'spotify_charts_keyed', ['country_key', 'date', 'rank'],
+        postgresql_include=['song_key', 'streams']
+    )
+    op.create_index(
+        'ix_spotify_charts_keyed_date_rank', 'spotify_charts_keyed', ['date', 'rank'],
+        postgresql_include=['country_key', 'song_key', 'streams']
+    )
+
+    # Artist stats
+    op.execute("""
+    CREATE TABLE artist_stats_keyed (
+        artist_key INTEGER NOT NULL REFERENCES artist (artist_key) DEFERRABLE INITIALLY IMMEDIATE,
+        date DATE NOT NULL,
+        total_streams BIGINT,
+        daily_streams INTEGER,
+        listeners BIGINT,
+        PRIMARY KEY (artist_key, date)
+    ) PARTITION BY RANGE (date)
+    """)
+    _create_monthly_partitions('artist_stats_keyed', 'artist_stats')
+    op.execute("""
+    INSERT INTO artist_stats_keyed (artist_key, date, total_streams, daily_streams, listeners)
+    SELECT a.artist_key, st.date, st.total_streams, st.daily_streams, st.listeners
+    FROM artist_stats st
+    JOIN artist a ON a.spotify_id = st.artist_id
+    ORDER BY st.date, a.artist_key
+    """)
+    op.drop_table('artist_stats')
+    op.create_index('ix_artist_stats_keyed_date_brin', 'artist_stats_keyed', ['date'], postgresql_using='brin')
+    op.create_index(
+        'ix_artist_stats_keyed_date_daily_streams', 'artist_stats_keyed', ['date', sa.text('daily_streams DESC')],
+        postgresql_include=['artist_key', 'listeners']
+    )
+
+    # Artist-song relationships
+    op.execute("""
+    CREATE TABLE artist_song_keyed (
+        artist_key INTEGER NOT NULL REFERENCES artist (artist_key) DEFERRABLE INITIALLY IMMEDIATE,
+        song_key INTEGER NOT NULL REFERENCES song (song_key) DEFERRABLE INITIALLY IMMEDIATE,
+        PRIMARY KEY (artist_key, song_key)
+    )
+    """)
+    op.execute("""
+    INSERT INTO artist_song_keyed (artist_key, song_key)
+    SELECT a.artist_key, s.song_key
+    FROM artist_song ars
+    JOIN artist a ON a.spotify_id = ars.artist_id
+    JOIN song s ON s.song_id = ars.song_id
+    """)
+    op.drop_table('artist_song')
+    op.create_index('ix_artist_song_keyed_song_key', 'artist_song_keyed', ['song_key', 'artist_key'])
+
+    for name, query in COMPAT_VIEWS.items():
+        op.execute(f"CREATE OR REPLACE VIEW {name} AS {query}")
+
+    for table in ['artist', 'song', 'country', 'spotify_charts_keyed', 'artist_stats_keyed', 'artist_song_keyed']:
+        op.execute(f"ANALYZE {table}")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in COMPAT_VIEWS:
+        op.execute(f"ALTER VIEW {name} RENAME TO {name}_view")
+
+    op.execute("""
+    CREATE TABLE artist_song (
+        artist_id VARCHAR NOT NULL REFERENCES artist (spotify_id) DEFERRABLE INITIALLY IMMEDIATE,
+        song_id VARCHAR NOT NULL REFERENCES song (song_id) DEFERRABLE INITIALLY IMMEDIATE,
+        PRIMARY KEY (artist_id, song_id)
+    )
+    """)
+    op.execute("INSERT INTO artist_song (artist_id, song_id) SELECT artist_id, song_id FROM artist_song_view")
+    op.create_index('ix_artist_song_song_id', 'artist_song', ['song_id', 'artist_id'])
+
+    op.execute("""
+    CREATE TABLE artist_stats (
+        artist_id VARCHAR NOT NULL REFERENCES artist (spotify_id) DEFERRABLE INITIALLY IMMEDIATE,
+        date DATE NOT NULL,
+        total_streams BIGINT,
+        daily_streams INTEGER,
+        listeners BIGINT,
+        PRIMARY KEY (artist_id, date),
+        CONSTRAINT uq_artists_stats UNIQUE (artist_id, date)
+    ) PARTITION BY RANGE (date)
+    """)
+    _create_monthly_partitions('artist_stats', 'artist_stats_keyed')
+    op.execute("""
+    INSERT INTO artist_stats (artist_id, date, total_streams, daily_streams, listeners)
+    SELECT artist_id, date, total_streams, daily_streams, listeners FROM artist_stats_view ORDER BY date, artist_id
+    """)
+    op.create_index('ix_artist_stats_date_brin', 'artist_stats', ['date'], postgresql_using='brin')
+    op.create_index(
+        'ix_artist_stats_date_daily_streams', 'artist_stats', ['date', sa.text('daily_streams DESC')],
+        postgresql_include=['artist_id', 'listeners']
+    )
+
+    op.execute("""
+    CREATE TABLE spotify_charts (
+        date DATE NOT NULL,
+        country_code VARCHAR NOT NULL REFERENCES country (country_code) DEFERRABLE INITIALLY IMMEDIATE,
+        song_id VARCHAR NOT NULL REFERENCES song (song_id) DEFERRABLE INITIALLY IMMEDIATE,
+        streams BIGINT NOT NULL,
+        total_streams BIGINT NOT NULL,
+        days INTEGER NOT NULL,
+        rank INTEGER NOT NULL,
+        PRIMARY KEY (song_id, country_code, date),
+        CONSTRAINT uq_spotify_charts UNIQUE (song_id, country_code, date)
+    ) PARTITION BY RANGE (date)
+    """)
+    _create_monthly_partitions('spotify_charts', 'spotify_charts_keyed')
+    op.execute("""
+    INSERT INTO spotify_charts (date, country_code, song_id, streams, total_streams, days, rank)
+    SELECT date, country_code, song_id, streams, total_streams, days, rank FROM spotify_charts_view ORDER BY date
+    """)
+    op.create_index(
+        'ix_spotify_charts_country_date_rank', 'spotify_charts', ['country_code', 'date', 'rank'],
+        postgresql_include=['song_id', 'streams']
+    )
+    op.create_index(
+        'ix_spotify_charts_date_rank', 'spotify_charts', ['date', 'rank'],
+        postgresql_include=['country_code', 'song_id', 'streams']
+    )
+
+    for name in COMPAT_VIEWS:
+        op.execute(f"DROP VIEW {name}_view")
+    op.drop_table('artist_song_keyed')
+    op.drop_table('artist_stats_keyed')
+    op.drop_table('spotify_charts_keyed')
+
+    for table, column, _ in DIMENSION_KEYS:
+        op.drop_constraint(f"{table}_{column}_key", table, type_='unique')
+        op.drop_column(table, column)
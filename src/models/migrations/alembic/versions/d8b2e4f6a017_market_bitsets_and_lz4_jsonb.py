@@ -0,0 +1,83 @@
+"""Market availability bit strings and slimmed sp_track payloads
+
+Revision ID: d8b2e4f6a017
+Revises: c3f7a9e1d284
+Create Date: 2026-10-19 19:27:16.980342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8b2e4f6a017'
+down_revision: Union[str, None] = 'c3f7a9e1d284'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BATCH_SIZE = 2000
+
+JSONB_COLUMNS = [('song', 'sp_track'), ('song', 'features'), ('artist', 'sp_artist')]
+
+# Track markets, or the album's when the track lists none
+MARKETS = "COALESCE(song.sp_track->'available_markets', song.sp_track->'album'->'available_markets')"
+
+# Bit i set when the country with country_key i + 1 is listed
+MARKET_BITS = f"""
+CASE WHEN {MARKETS} IS NOT NULL THEN (
+    SELECT CAST(string_agg(CASE WHEN {MARKETS} ? co.country_code THEN '1' ELSE '0' END, '' ORDER BY k) AS varbit)
+    FROM generate_series(1, (SELECT max(country_key) FROM country)) AS k
+    LEFT JOIN country co ON co.country_key = k
+) END
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('song', sa.Column('available_markets', postgresql.BIT(varying=True), nullable=True))
+
+    # Only values written from now on are compressed with LZ4, which includes the backfill below
+    for table, column in JSONB_COLUMNS:
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} SET COMPRESSION lz4")
+
+    stmt = sa.text(f"""
+        WITH batch AS (
+            SELECT song_id FROM song
+            WHERE song_id > :after
+              AND (sp_track ? 'available_markets' OR sp_track->'album' ? 'available_markets')
+            ORDER BY song_id
+            LIMIT :batch_size
+        )
+        UPDATE song
+        SET available_markets = {MARKET_BITS},
+            sp_track = (sp_track - 'available_markets') #- '{{album,available_markets}}'
+        FROM batch
+        WHERE song.song_id = batch.song_id
+        RETURNING song.song_id
+        """)
+
+    # Every batch is committed on its own, so an interrupted backfill can simply be re-run
+    connection = op.get_bind()
+    after, updated = '', 0
+    with op.get_context().autocommit_block():
+        while True:
+            song_ids = connection.execute(stmt, {"after": after, "batch_size": BATCH_SIZE}).scalars().all()
+            if not song_ids:
+                break
+            after = max(song_ids)
+            updated += len(song_ids)
+    print(f"Moved the markets of {updated} songs to available_markets")
+
+    op.execute("ANALYZE song")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The market arrays are not restored into sp_track
+    for table, column in JSONB_COLUMNS:
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} SET COMPRESSION default")
+    op.drop_column('song', 'available_markets')
@@ -0,0 +1,93 @@
+"""Album table normalized out of sp_track
+
+Revision ID: e4a6c8d0f239
+Revises: d8b2e4f6a017
+Create Date: 2026-10-19 20:36:48.715263
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a6c8d0f239'
+down_revision: Union[str, None] = 'd8b2e4f6a017'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'album',
+        sa.Column('album_id', sa.String(), primary_key=True),
+        sa.Column('name', sa.String(), nullable=True),
+        sa.Column('album_type', sa.String(), nullable=True),
+        sa.Column('release_date', sa.Date(), nullable=True),
+        sa.Column('release_date_precision', sa.String(), nullable=True),
+        sa.Column('total_tracks', sa.SmallInteger(), nullable=True),
+        sa.Column('sp_album', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    )
+    op.execute("ALTER TABLE album ALTER COLUMN sp_album SET COMPRESSION lz4")
+    op.add_column('song', sa.Column('album_id', sa.String(), nullable=True))
+
+    # One row per album, taken from any of its tracks
+    op.execute("""
+    INSERT INTO album (album_id, name, album_type, release_date, release_date_precision, total_tracks, sp_album)
+    SELECT DISTINCT ON (sp_track->'album'->>'id')
+        sp_track->'album'->>'id',
+        sp_track->'album'->>'name',
+        sp_track->'album'->>'album_type',
+        CASE
+            WHEN sp_track->'album'->>'release_date' ~ '^[1-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]$'
+                THEN CAST(sp_track->'album'->>'release_date' AS date)
+            WHEN sp_track->'album'->>'release_date' ~ '^[1-9][0-9][0-9][0-9]-[0-9][0-9]$'
+                THEN CAST(sp_track->'album'->>'release_date' || '-01' AS date)
+            WHEN sp_track->'album'->>'release_date' ~ '^[1-9][0-9][0-9][0-9]$'
+                THEN CAST(sp_track->'album'->>'release_date' || '-01-01' AS date)
+        END,
+        sp_track->'album'->>'release_date_precision',
+        CAST(sp_track->'album'->>'total_tracks' AS smallint),
+        sp_track->'album'
+    FROM song
+    WHERE sp_track->'album'->>'id' IS NOT NULL
+    ORDER BY sp_track->'album'->>'id', song_id
+    """)
+
+    # Tracks keep a stub of their album, enough for the song's typed release columns
+    op.execute("""
+    UPDATE song
+    SET album_id = sp_track->'album'->>'id',
+        sp_track = jsonb_set(sp_track, '{album}', jsonb_build_object(
+            'id', sp_track->'album'->'id',
+            'release_date', sp_track->'album'->'release_date',
+            'release_date_precision', sp_track->'album'->'release_date_precision'
+        ))
+    WHERE sp_track->'album'->>'id' IS NOT NULL
+    """)
+
+    op.create_foreign_key(
+        'song_album_id_fkey', 'song', 'album', ['album_id'], ['album_id'],
+        deferrable=True, initially='IMMEDIATE'
+    )
+    op.create_index('ix_song_album_id', 'song', ['album_id'])
+    op.create_index('ix_album_release_date', 'album', ['release_date'])
+    op.execute("ANALYZE album")
+    op.execute("ANALYZE song")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("""
+    UPDATE song
+    SET sp_track = jsonb_set(song.sp_track, '{album}', album.sp_album)
+    FROM album
+    WHERE album.album_id = song.album_id AND album.sp_album IS NOT NULL
+    """)
+    op.drop_index('ix_song_album_id', table_name='song')
+    op.drop_constraint('song_album_id_fkey', 'song', type_='foreignkey')
+    op.drop_column('song', 'album_id')
+    op.drop_table('album')
@@ -0,0 +1,48 @@
+"""Artist genre table and GIN index on sp_artist genres
+
+Revision ID: f5b7d9e1a34c
+Revises: e4a6c8d0f239
+Create Date: 2026-10-19 21:44:09.352170
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5b7d9e1a34c'
+down_revision: Union[str, None] = 'e4a6c8d0f239'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'artist_genre',
+        sa.Column('artist_key', sa.Integer(), nullable=False),
+        sa.Column('genre', sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(['artist_key'], ['artist.artist_key'], deferrable=True, initially='IMMEDIATE'),
+        sa.PrimaryKeyConstraint('artist_key', 'genre'),
+    )
+
+    op.execute("""
+    INSERT INTO artist_genre (artist_key, genre)
+    SELECT DISTINCT a.artist_key, genre
+    FROM artist a, jsonb_array_elements_text(a.sp_artist->'genres') AS genre
+    WHERE jsonb_typeof(a.sp_artist->'genres') = 'array'
+    """)
+
+    op.create_index('ix_artist_genre_genre', 'artist_genre', ['genre', 'artist_key'])
+    op.create_index(
+        'ix_artist_sp_artist_genres', 'artist', [sa.text("(sp_artist->'genres')")], postgresql_using='gin'
+    )
+    op.execute("ANALYZE artist_genre")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_artist_sp_artist_genres', table_name='artist')
+    op.drop_table('artist_genre')
@@ -0,0 +1,219 @@
+from datetime import date
+import gzip
+import os
+import sqlalchemy as sa
+
+
+def month_start(day) -> date:
+    """First day of the month of a date (or ISO date string)"""
+    if isinstance(day, str):
+        day = date.fromisoformat(day[:10])
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    """Shift the first day of a month by a number of months"""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    """Name of the monthly partition of a table, e.g. spotify_charts_y2025m03"""
+    return f"{table}_y{month.year}m{month.month:02d}"
+
+
+def month_from_partition_name(name: str) -> date:
+    """First day of the month held by a partition named by ``partition_name``"""
+    suffix = name.rsplit('_y', 1)[1]
+    return date(int(suffix[:4]), int(suffix[5:7]), 1)
+
+
+def partition_table(table: sa.Table, month: date) -> sa.TableClause:
+    """Lightweight table construct addressing one monthly partition directly
+
+    Args:
+        table (sa.Table): Partitioned parent table
+        month (date): First day of the month
+
+    Returns:
+        sa.TableClause: Table with the parent's columns and the partition's name
+    """
+    return sa.table(partition_name(table.name, month), *[sa.column(column.name, column.type) for column in table.columns])
+
+
+def group_by_month(rows: list) -> dict:
+    """Group row dictionaries by the month of their ``date``
+
+    Returns:
+        dict: Mapping of first day of the month to list of rows
+    """
+    months = {}
+    for row in rows:
+        months.setdefault(month_start(row['date']), []).append(row)
+    return months
+
+
+def monthly_partition_ddl(table: str, month: date) -> str:
+    """DDL creating the monthly range partition of a table
+
+    Args:
+        table (str): Partitioned parent table
+        month (date): First day of the month
+
+    Returns:
+        str: CREATE TABLE ... PARTITION OF statement
+    """
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, month)} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+def months_between(start: date, end: date) -> list:
+    """First days of every month from start to end, both included"""
+    months = []
+    month = month_start(start)
+    while month <= month_start(end):
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def ensure_monthly_partitions(connection, table: str, dates) -> list:
+    """Create the monthly partitions needed to hold the given dates
+
+    Only a catalog lookup is made when every partition already exists, so
+    this is cheap enough to call before each load. It runs on the caller's
+    connection and transaction so it never waits on the caller's own locks.
+
+    Args:
+        connection: SQLAlchemy connection or session
+        table (str): Partitioned parent table
+        dates: Iterable of dates (or ISO date strings)
+
+    Returns:
+        list: Names of the partitions that were created
+    """
+    months = {partition_name(table, month_start(day)): month_start(day) for day in dates}
+    if not months:
+        return []
+
+    missing = connection.execute(
+        sa.text("SELECT name FROM unnest(CAST(:names AS text[])) AS name WHERE to_regclass(name) IS NULL"),
+        {"names": list(months)}
+    ).scalars().all()
+
+    for name in sorted(missing):
+        connection.execute(sa.text(monthly_partition_ddl(table, months[name])))
+        print(f"Created partition {name}")
+    return missing
+
+
+def ensure_partitions_ahead(connection, table: str, months_ahead: int = 2, today: date = None) -> list:
+    """Create the partitions of the previous, current and next ``months_ahead`` months
+
+    The previous month is included because a chart fetched on the first
+    day of a month is dated the day before.
+
+    Args:
+        connection: SQLAlchemy connection or session
+        table (str): Partitioned parent table
+        months_ahead (int): Number of future months to prepare
+        today (date): Reference date (defaults to today)
+
+    Returns:
+        list: Names of the partitions that were created
+    """
+    current = month_start(today or date.today())
+    return ensure_monthly_partitions(
+        connection, table, [add_months(current, offset) for offset in range(-1, months_ahead + 1)]
+    )
+
+
+def list_partitions(connection, table: str) -> list:
+    """Names of the partitions currently attached to a table, oldest first
+
+    Args:
+        connection: SQLAlchemy connection or session
+        table (str): Partitioned parent table
+
+    Returns:
+        list: Partition names
+    """
+    return sorted(connection.execute(
+        sa.text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.oid = to_regclass(:table)
+        """),
+        {"table": table}
+    ).scalars().all())
+
+
+def archive_partition(engine, table: str, month: date, directory: str = "data/archive", keep: bool = False) -> str:
+    """Detach a monthly partition and export it to a gzip-compressed CSV file
+
+    The partition is detached concurrently (queries and loads on the rest
+    of the table are not blocked), dumped with ``COPY TO STDOUT`` into
+    ``<directory>/<partition>.csv.gz`` and dropped unless ``keep`` is set.
+
+    Args:
+        engine: SQLAlchemy engine
+        table (str): Partitioned parent table
+        month (date): First day of the month to archive
+        directory (str): Directory receiving the archive
+        keep (bool): Keep the detached table instead of dropping it
+
+    Returns:
+        str: Path of the archive file
+    """
+    name = partition_name(table, month)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}.csv.gz")
+
+    # DETACH ... CONCURRENTLY cannot run inside a transaction block
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(sa.text(f"ALTER TABLE {table} DETACH PARTITION {name} CONCURRENTLY"))
+
+    raw = engine.raw_connection()
+    try:
+        with gzip.open(path, 'wt', encoding='utf-8') as archive:
+            raw.cursor().copy_expert(f"COPY {name} TO STDOUT WITH (FORMAT csv, HEADER)", archive)
+        if not keep:
+            raw.cursor().execute(f"DROP TABLE {name}")
+        raw.commit()
+    finally:
+        raw.close()
+
+    print(f"Archived partition {name} to {path}")
+    return path
+
+
+def restore_partition(engine, table: str, path: str) -> str:
+    """Re-create an archived monthly partition from its gzip-compressed CSV file
+
+    Args:
+        engine: SQLAlchemy engine
+        table (str): Partitioned parent table
+        path (str): Archive written by ``archive_partition``
+
+    Returns:
+        str: Name of the restored partition
+    """
+    name = os.path.basename(path)[:-len('.csv.gz')]
+    month = month_from_partition_name(name)
+
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute(monthly_partition_ddl(table, month))
+        with gzip.open(path, 'rt', encoding='utf-8') as archive:
+            cursor.copy_expert(f"COPY {name} FROM STDIN WITH (FORMAT csv, HEADER)", archive)
+        raw.commit()
+    finally:
+        raw.close()
+
+    print(f"Restored partition {name} from {path}")
+    return name
@@ -0,0 +1,224 @@
+"""Week, month and year rollups of the daily charts
+
+Every rollup table holds, per song, country and period, the summed
+streams, the best rank, the days on chart (the chart's cumulative
+``days`` at its latest entry in the period) and the number of daily
+entries. Days loaded for the first time are merged into the rollups as
+deltas; a day that was already merged and whose content changed since
+(a corrected reload) has its periods recomputed for that country, since
+minimum ranks cannot be subtracted. Each merged day is recorded with a
+fingerprint of its rows in ``chart_rollup_merged`` to tell them apart.
+"""
+from datetime import date, timedelta
+import sqlalchemy as sa
+
+# Finest to coarsest
+ROLLUP_GRAINS = ['week', 'month', 'year']
+
+
+def rollup_table_name(grain: str) -> str:
+    """Name of the rollup table of a grain, e.g. chart_rollup_month"""
+    return f"chart_rollup_{grain}"
+
+
+def period_start(grain: str, day: date) -> date:
+    """First day of the week (Monday), month or year containing a date"""
+    if grain == 'week':
+        return day - timedelta(days=day.weekday())
+    if grain == 'month':
+        return day.replace(day=1)
+    return day.replace(month=1, day=1)
+
+
+def period_end(grain: str, day: date) -> date:
+    """Last day of the week, month or year containing a date"""
+    if grain == 'week':
+        return period_start(grain, day) + timedelta(days=6)
+    if grain == 'month':
+        return (day.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+    return day.replace(month=12, day=31)
+
+
+def _cover(first: date, last: date, grains: list) -> list:
+    """Cover first..last with whole periods of the coarsest of ``grains`` (finest to coarsest), then finer ones"""
+    if first > last:
+        return []
+    if not grains:
+        return [('day', first, last)]
+
+    grain, finer = grains[-1], grains[:-1]
+    whole_first = first if period_start(grain, first) == first else period_end(grain, first) + timedelta(days=1)
+    whole_last = last if period_end(grain, last) == last else period_start(grain, last) - timedelta(days=1)
+    if whole_first > whole_last:
+        return _cover(first, last, finer)
+    return (
+        _cover(first, whole_first - timedelta(days=1), finer)
+        + [(grain, whole_first, whole_last)]
+        + _cover(whole_last + timedelta(days=1), last, finer)
+    )
+
+
+def rollup_segments(grain: str, start: date, end: date) -> list:
+    """Split a date range into the sources answering it at an output grain
+
+    The range is cut into the periods of the output grain; whole periods
+    are read from that grain's rollup, and the partial periods at the
+    edges from the whole periods of finer rollups they contain and from
+    the daily rows for what is left. Every segment therefore lies within
+    a single output period, or spans whole output periods.
+
+    Args:
+        grain (str): Output grain, ``day`` or one of ROLLUP_GRAINS
+        start (date): First day of the range
+        end (date): Last day of the range, included
+
+    Returns:
+        list: (source grain or ``day``, first day, last day) tuples in date order, each
+            covering whole periods of its source
+    """
+    grains = ROLLUP_GRAINS[:ROLLUP_GRAINS.index(grain) + 1] if grain in ROLLUP_GRAINS else []
+
+    segments = []
+    day = start
+    while day <= end:
+        last = min(period_end(grain, day), end) if grains else end
+        for source, first, segment_last in _cover(day, last, grains):
+            if segments and segments[-1][0] == source and segments[-1][2] + timedelta(days=1) == first:
+                segments[-1] = (source, segments[-1][1], segment_last)
+            else:
+                segments.append((source, first, segment_last))
+        day = last + timedelta(days=1)
+    return segments
+
+
+def _period_start_sql(grain: str, column: str) -> str:
+    # Truncated as a timestamp without time zone so the session time zone plays no part
+    return f"CAST(date_trunc('{grain}', CAST({column} AS timestamp)) AS date)"
+
+
+def merge_rollups_sql() -> list:
+    """Statements merging the changed chart days into every rollup table
+
+    Expects the ``changed_chart_days`` temporary table (``date``,
+    ``country_key``) created by ``src.loaders.aggregates``, and must run
+    in the same transaction.
+
+    Returns:
+        list: SQL statements, to be executed in order
+    """
+    statements = ["""
+        CREATE TEMPORARY TABLE rollup_days ON COMMIT DROP AS
+        SELECT c.date, c.country_key, m.date IS NOT NULL AS merged, m.fingerprint AS merged_fingerprint,
+               md5(string_agg(concat_ws(':', ch.song_key, ch.rank, ch.streams, ch.days), ',' ORDER BY ch.song_key)) AS fingerprint
+        FROM changed_chart_days c
+        LEFT JOIN spotify_charts_keyed ch ON ch.date = c.date AND ch.country_key = c.country_key
+        LEFT JOIN chart_rollup_merged m ON m.date = c.date AND m.country_key = c.country_key
+        GROUP BY c.date, c.country_key, m.date, m.fingerprint
+        """]
+
+    for grain in ROLLUP_GRAINS:
+        table = rollup_table_name(grain)
+        revised_periods = f"""
+            SELECT DISTINCT {_period_start_sql(grain, 'date')} AS period_start, country_key
+            FROM rollup_days
+            WHERE merged AND fingerprint IS DISTINCT FROM merged_fingerprint
+            """
+        statements += [
+            # New days: add their contribution to the existing periods
+            f"""
+            INSERT INTO {table} AS r (period_start, song_key, country_key, streams, best_rank, days_on_chart, entries)
+            SELECT {_period_start_sql(grain, 'ch.date')}, ch.song_key, ch.country_key,
+                   SUM(ch.streams), MIN(ch.rank), MAX(ch.days), COUNT(*)
+            FROM rollup_days d
+            JOIN spotify_charts_keyed ch ON ch.date = d.date AND ch.country_key = d.country_key
+            WHERE NOT d.merged
+            GROUP BY 1, ch.song_key, ch.country_key
+            ON CONFLICT (song_key, country_key, period_start) DO UPDATE
+            SET streams = r.streams + EXCLUDED.streams, best_rank = LEAST(r.best_rank, EXCLUDED.best_rank),
+                days_on_chart = GREATEST(r.days_on_chart, EXCLUDED.days_on_chart), entries = r.entries + EXCLUDED.entries
+            """,
+            # Revised days: rebuild their periods for the country (after the deltas above)
+            f"""
+            DELETE FROM {table} r
+            USING ({revised_periods}) p
+            WHERE r.period_start = p.period_start AND r.country_key = p.country_key
+            """,
+            f"""
+            INSERT INTO {table} (period_start, song_key, country_key, streams, best_rank, days_on_chart, entries)
+            SELECT p.period_start, ch.song_key, ch.country_key, SUM(ch.streams), MIN(ch.rank), MAX(ch.days), COUNT(*)
+            FROM ({revised_periods}) p
+            JOIN spotify_charts_keyed ch ON ch.country_key = p.country_key
+             AND ch.date >= p.period_start AND ch.date < CAST(p.period_start + interval '1 {grain}' AS date)
+            GROUP BY p.period_start, ch.song_key, ch.country_key
+            """,
+        ]
+
+    statements.append("""
+        INSERT INTO chart_rollup_merged (date, country_key, fingerprint)
+        SELECT date, country_key, fingerprint
+        FROM rollup_days
+        ON CONFLICT (date, country_key) DO UPDATE
+        SET fingerprint = EXCLUDED.fingerprint
+        """)
+    return statements
+
+
+def query_rollup(session, start: date, end: date, grain: str = 'month', song_id: str = None,
+                 country_code: str = None) -> list:
+    """Per-period chart statistics over a date range, at the requested grain
+
+    Whole periods are read from the coarsest rollup that fits them and only
+    the partial edges from the daily charts (see ``rollup_segments``), so
+    "monthly streams over 3 years" reads one row per song and month even
+    when the range does not start on the first of a month.
+
+    Args:
+        session: Database session
+        start (date): First day of the range
+        end (date): Last day of the range, included
+        grain (str): Output grain, ``day``, ``week``, ``month`` or ``year``
+        song_id (str): Restrict to one song
+        country_code (str): Restrict to one country
+
+    Returns:
+        list: Row mappings with period_start, song_id, country_code, streams, best_rank,
+            days_on_chart and entries, one per period, song and country
+    """
+    filters = []
+    params = {}
+    if song_id:
+        filters.append("song_key = (SELECT song_key FROM song WHERE song_id = :song_id)")
+        params["song_id"] = song_id
+    if country_code:
+        filters.append("country_key = (SELECT country_key FROM country WHERE country_code = :country_code)")
+        params["country_code"] = country_code
+
+    parts = []
+    for number, (source, first, last) in enumerate(rollup_segments(grain, start, end)):
+        params[f"first_{number}"], params[f"last_{number}"] = first, last
+        if source == 'day':
+            conditions = [f"date BETWEEN :first_{number} AND :last_{number}"] + filters
+            parts.append(f"""
+                SELECT date AS period_start, song_key, country_key, streams, rank AS best_rank,
+                       days AS days_on_chart, 1 AS entries
+                FROM spotify_charts_keyed
+                WHERE {' AND '.join(conditions)}""")
+        else:
+            conditions = [f"period_start BETWEEN :first_{number} AND :last_{number}"] + filters
+            parts.append(f"""
+                SELECT period_start, song_key, country_key, streams, best_rank, days_on_chart, entries
+                FROM {rollup_table_name(source)}
+                WHERE {' AND '.join(conditions)}""")
+    if not parts:
+        return []
+
+    period = 'r.period_start' if grain == 'day' else _period_start_sql(grain, 'r.period_start')
+    return session.execute(sa.text(f"""
+        SELECT {period} AS period_start, s.song_id, co.country_code, SUM(r.streams) AS streams,
+               MIN(r.best_rank) AS best_rank, MAX(r.days_on_chart) AS days_on_chart, SUM(r.entries) AS entries
+        FROM ({' UNION ALL '.join(parts)}) r
+        JOIN song s ON s.song_key = r.song_key
+        JOIN country co ON co.country_key = r.country_key
+        GROUP BY 1, s.song_id, co.country_code
+        ORDER BY period_start, co.country_code, streams DESC
+        """), params).mappings().all()
@@ -8,10 +8,10 @@ def drop_and_create_schema():
     inspector = inspect(engine)
 
     # Drop tables if they exist
-    if 'artist_song' in inspector.get_table_names():
-        print("Dropping artist_song table...")
+    if 'artist_song_keyed' in inspector.get_table_names():
+        print("Dropping artist_song_keyed table...")
         with engine.connect() as conn:
-            conn.execute(text("DROP TABLE artist_song CASCADE"))
+            conn.execute(text("DROP TABLE artist_song_keyed CASCADE"))
             conn.commit()
 
     if 'artist' in inspector.get_table_names():
@@ -38,7 +38,7 @@ def ensure_schema_exists():
 
     # Check if tables exist
     tables_exist = all(table in inspector.get_table_names()
-                      for table in ['artist', 'song', 'artist_song'])
+                      for table in ['artist', 'song', 'artist_song_keyed'])
 
     if not tables_exist:
         print("Some tables are missing, creating schema...")
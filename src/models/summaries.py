@@ -0,0 +1,224 @@
+"""Chart summaries per song x country, per song and per artist
+
+``song_country_summary`` holds the days on chart, peak rank, first and
+last chart date, streams and streaks of every song in every country.
+It is updated in place from each day's delta: a song charting on the day
+after its last chart date extends its current streak, any other new day
+starts a new one, and songs of the country missing from its latest chart
+have their current streak closed. Deltas cannot be applied to corrected
+days, backfilled days or several new days of a country at once, so the
+affected (song, country) pairs are recomputed from their chart history
+instead (gaps and islands over the charts primary key).
+
+``song_summary`` and ``artist_summary`` (through ``artist_song_keyed``)
+are then re-aggregated from the per-country rows of the affected songs.
+"""
+import sqlalchemy as sa
+
+# kind -> (summary table, entity table, natural key column, surrogate key column)
+SUMMARY_KINDS = {
+    'song': ('song_summary', 'song', 'song_id', 'song_key'),
+    'artist': ('artist_summary', 'artist', 'spotify_id', 'artist_key'),
+}
+
+SUMMARY_COLUMNS = [
+    'days_on_chart', 'peak_rank', 'first_date', 'last_date', 'total_streams',
+    'current_streak', 'current_streak_start', 'longest_streak',
+]
+
+
+def recompute_pairs_sql(pairs: str) -> str:
+    """Query summarizing the whole chart history of a set of (song, country) pairs
+
+    Args:
+        pairs (str): Relation with ``song_key`` and ``country_key`` columns
+
+    Returns:
+        str: SQL query returning song_key, country_key and the summary columns
+    """
+    return f"""
+        WITH entries AS (
+            SELECT ch.song_key, ch.country_key, ch.date, ch.rank, ch.streams,
+                   ch.date - CAST(ROW_NUMBER() OVER (PARTITION BY ch.song_key, ch.country_key ORDER BY ch.date) AS integer) AS island
+            FROM {pairs} p
+            JOIN spotify_charts_keyed ch ON ch.song_key = p.song_key AND ch.country_key = p.country_key
+        ), islands AS (
+            SELECT song_key, country_key, MIN(date) AS streak_start, MAX(date) AS streak_end, COUNT(*) AS streak
+            FROM entries
+            GROUP BY song_key, country_key, island
+        ), latest AS (
+            SELECT c.country_key, (SELECT MAX(date) FROM spotify_charts_keyed WHERE country_key = c.country_key) AS date
+            FROM (SELECT DISTINCT country_key FROM {pairs}) c
+        )
+        SELECT e.song_key, e.country_key, e.days_on_chart, e.peak_rank, e.first_date, e.last_date, e.total_streams,
+               CASE WHEN cur.streak_end = l.date THEN cur.streak ELSE 0 END AS current_streak,
+               CASE WHEN cur.streak_end = l.date THEN cur.streak_start END AS current_streak_start,
+               lng.longest_streak
+        FROM (
+            SELECT song_key, country_key, COUNT(*) AS days_on_chart, MIN(rank) AS peak_rank, MIN(date) AS first_date,
+                   MAX(date) AS last_date, SUM(streams) AS total_streams
+            FROM entries
+            GROUP BY song_key, country_key
+        ) e
+        JOIN (
+            SELECT song_key, country_key, MAX(streak) AS longest_streak
+            FROM islands
+            GROUP BY song_key, country_key
+        ) lng ON lng.song_key = e.song_key AND lng.country_key = e.country_key
+        JOIN (
+            SELECT DISTINCT ON (song_key, country_key) song_key, country_key, streak_start, streak_end, streak
+            FROM islands
+            ORDER BY song_key, country_key, streak_end DESC
+        ) cur ON cur.song_key = e.song_key AND cur.country_key = e.country_key
+        JOIN latest l ON l.country_key = e.country_key
+        """
+
+
+def refresh_summaries_sql() -> list:
+    """Statements bringing the chart summaries up to date with the changed chart days
+
+    Expects the ``rollup_days`` temporary table of
+    ``src.models.rollups.merge_rollups_sql`` (changed days with their
+    merge state) and must run in the same transaction, after it.
+
+    Returns:
+        list: SQL statements, to be executed in order
+    """
+    revised = "d.merged AND d.fingerprint IS DISTINCT FROM d.merged_fingerprint"
+    return [
+        f"""
+        CREATE TEMPORARY TABLE summary_recompute ON COMMIT DROP AS
+        -- Pairs charted on a corrected day, on a backfilled day (older than the
+        -- country's latest chart or their last chart date), or on one of several
+        -- new days of the same country
+        SELECT ch.song_key, ch.country_key
+        FROM rollup_days d
+        JOIN spotify_charts_keyed ch ON ch.date = d.date AND ch.country_key = d.country_key
+        LEFT JOIN song_country_summary s ON s.song_key = ch.song_key AND s.country_key = ch.country_key
+        WHERE ({revised})
+           OR (NOT d.merged AND (
+                  s.last_date >= d.date
+               OR EXISTS (SELECT 1 FROM spotify_charts_keyed later WHERE later.country_key = d.country_key AND later.date > d.date)
+               OR (SELECT COUNT(*) FROM rollup_days n WHERE n.country_key = d.country_key AND NOT n.merged) > 1
+           ))
+        UNION
+        -- Pairs spanning a corrected day, which may have been dropped from it
+        SELECT s.song_key, s.country_key
+        FROM rollup_days d
+        JOIN song_country_summary s ON s.country_key = d.country_key AND s.first_date <= d.date AND s.last_date >= d.date
+        WHERE {revised}
+        """,
+        # Delta of the new days: extend the streak when the song charted the day before
+        """
+        INSERT INTO song_country_summary AS t (song_key, country_key, days_on_chart, peak_rank, first_date, last_date,
+                                               total_streams, current_streak, current_streak_start, longest_streak)
+        SELECT ch.song_key, ch.country_key, 1, ch.rank, ch.date, ch.date, ch.streams, 1, ch.date, 1
+        FROM rollup_days d
+        JOIN spotify_charts_keyed ch ON ch.date = d.date AND ch.country_key = d.country_key
+        WHERE NOT d.merged
+          AND NOT EXISTS (
+              SELECT 1 FROM summary_recompute r WHERE r.song_key = ch.song_key AND r.country_key = ch.country_key
+          )
+        ON CONFLICT (song_key, country_key) DO UPDATE
+        SET days_on_chart = t.days_on_chart + 1,
+            peak_rank = LEAST(t.peak_rank, EXCLUDED.peak_rank),
+            last_date = EXCLUDED.last_date,
+            total_streams = t.total_streams + EXCLUDED.total_streams,
+            current_streak = CASE WHEN t.last_date = EXCLUDED.last_date - 1 THEN t.current_streak + 1 ELSE 1 END,
+            current_streak_start = CASE WHEN t.last_date = EXCLUDED.last_date - 1 THEN t.current_streak_start
+                                        ELSE EXCLUDED.last_date END,
+            longest_streak = GREATEST(t.longest_streak,
+                                      CASE WHEN t.last_date = EXCLUDED.last_date - 1 THEN t.current_streak + 1 ELSE 1 END)
+        """,
+        # Pairs left without any chart entry by a correction
+        """
+        DELETE FROM song_country_summary s
+        USING summary_recompute r
+        WHERE s.song_key = r.song_key AND s.country_key = r.country_key
+          AND NOT EXISTS (
+              SELECT 1 FROM spotify_charts_keyed ch WHERE ch.song_key = r.song_key AND ch.country_key = r.country_key
+          )
+        """,
+        f"""
+        INSERT INTO song_country_summary AS t (song_key, country_key, {', '.join(SUMMARY_COLUMNS)})
+        {recompute_pairs_sql('(SELECT DISTINCT song_key, country_key FROM summary_recompute)')}
+        ON CONFLICT (song_key, country_key) DO UPDATE
+        SET {', '.join(f'{column} = EXCLUDED.{column}' for column in SUMMARY_COLUMNS)}
+        """,
+        # Close the current streak of the songs missing from their country's latest chart
+        """
+        UPDATE song_country_summary s
+        SET current_streak = 0, current_streak_start = NULL
+        FROM (
+            SELECT c.country_key, (SELECT MAX(date) FROM spotify_charts_keyed WHERE country_key = c.country_key) AS date
+            FROM (SELECT DISTINCT country_key FROM rollup_days) c
+        ) latest
+        WHERE s.country_key = latest.country_key AND s.current_streak > 0 AND s.last_date < latest.date
+        """,
+        f"""
+        CREATE TEMPORARY TABLE summary_songs ON COMMIT DROP AS
+        SELECT ch.song_key
+        FROM rollup_days d
+        JOIN spotify_charts_keyed ch ON ch.date = d.date AND ch.country_key = d.country_key
+        WHERE NOT d.merged OR ({revised})
+        UNION
+        SELECT song_key FROM summary_recompute
+        """,
+        """
+        DELETE FROM song_summary s
+        USING summary_songs x
+        WHERE s.song_key = x.song_key
+          AND NOT EXISTS (SELECT 1 FROM song_country_summary c WHERE c.song_key = x.song_key)
+        """,
+        """
+        INSERT INTO song_summary AS t (song_key, peak_rank, first_date, last_date, countries_charted, chart_days,
+                                       longest_streak, total_streams)
+        SELECT s.song_key, MIN(s.peak_rank), MIN(s.first_date), MAX(s.last_date), COUNT(*), SUM(s.days_on_chart),
+               MAX(s.longest_streak), SUM(s.total_streams)
+        FROM summary_songs x
+        JOIN song_country_summary s ON s.song_key = x.song_key
+        GROUP BY s.song_key
+        ON CONFLICT (song_key) DO UPDATE
+        SET peak_rank = EXCLUDED.peak_rank, first_date = EXCLUDED.first_date, last_date = EXCLUDED.last_date,
+            countries_charted = EXCLUDED.countries_charted, chart_days = EXCLUDED.chart_days,
+            longest_streak = EXCLUDED.longest_streak, total_streams = EXCLUDED.total_streams
+        """,
+        """
+        INSERT INTO artist_summary AS t (artist_key, peak_rank, first_date, last_date, songs_charted, countries_charted,
+                                         longest_streak, total_streams)
+        SELECT ars.artist_key, MIN(s.peak_rank), MIN(s.first_date), MAX(s.last_date), COUNT(DISTINCT s.song_key),
+               COUNT(DISTINCT s.country_key), MAX(s.longest_streak), SUM(s.total_streams)
+        FROM (
+            SELECT DISTINCT ars.artist_key
+            FROM summary_songs x
+            JOIN artist_song_keyed ars ON ars.song_key = x.song_key
+        ) a
+        JOIN artist_song_keyed ars ON ars.artist_key = a.artist_key
+        JOIN song_country_summary s ON s.song_key = ars.song_key
+        GROUP BY ars.artist_key
+        ON CONFLICT (artist_key) DO UPDATE
+        SET peak_rank = EXCLUDED.peak_rank, first_date = EXCLUDED.first_date, last_date = EXCLUDED.last_date,
+            songs_charted = EXCLUDED.songs_charted, countries_charted = EXCLUDED.countries_charted,
+            longest_streak = EXCLUDED.longest_streak, total_streams = EXCLUDED.total_streams
+        """,
+    ]
+
+
+def chart_profile(session, kind: str, natural_key: str) -> dict:
+    """Chart summary of one song or artist, read by primary key
+
+    Args:
+        session: Database session
+        kind (str): ``song`` or ``artist``
+        natural_key (str): Spotify ID of the song or artist
+
+    Returns:
+        dict: Summary columns, or None when it never charted
+    """
+    summary, entity, natural_column, key_column = SUMMARY_KINDS[kind]
+    row = session.execute(sa.text(f"""
+        SELECT s.*
+        FROM {summary} s
+        WHERE s.{key_column} = (SELECT {key_column} FROM {entity} WHERE {natural_column} = :key)
+        """), {"key": natural_key}).mappings().first()
+    return dict(row) if row else None
@@ -0,0 +1,59 @@
+"""Typed song columns extracted from the sp_track and features JSONB documents
+
+Each mapping gives, for every typed column, the SQL expression computing
+it from a JSONB document written as ``{doc}``. The loader evaluates them
+in the same UPDATE that stores the document. Migration b6d0f2a4c915
+backfilled the columns from a frozen copy of these expressions as they
+were at that revision, so a later change to them needs its own backfill
+migration to bring the existing rows in line.
+"""
+
+SP_TRACK_COLUMNS = {
+    'popularity': "CAST({doc}->>'popularity' AS smallint)",
+    'duration_ms': "CAST({doc}->>'duration_ms' AS integer)",
+    'explicit': "CAST({doc}->>'explicit' AS boolean)",
+    # Release dates come with year, month or day precision ('2019', '2019-03', '2019-03-08')
+    # and placeholder years such as '0000', which are left NULL
+    'release_date': """CASE
+        WHEN {doc}->'album'->>'release_date' ~ '^[1-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]$'
+            THEN CAST({doc}->'album'->>'release_date' AS date)
+        WHEN {doc}->'album'->>'release_date' ~ '^[1-9][0-9][0-9][0-9]-[0-9][0-9]$'
+            THEN CAST({doc}->'album'->>'release_date' || '-01' AS date)
+        WHEN {doc}->'album'->>'release_date' ~ '^[1-9][0-9][0-9][0-9]$'
+            THEN CAST({doc}->'album'->>'release_date' || '-01-01' AS date)
+    END""",
+    'release_date_precision': "{doc}->'album'->>'release_date_precision'",
+}
+
+FEATURES_COLUMNS = {
+    'danceability': "CAST({doc}->>'danceability' AS real)",
+    'energy': "CAST({doc}->>'energy' AS real)",
+    'key': "CAST({doc}->>'key' AS smallint)",
+    'loudness': "CAST({doc}->>'loudness' AS real)",
+    'mode': "CAST({doc}->>'mode' AS smallint)",
+    'speechiness': "CAST({doc}->>'speechiness' AS real)",
+    'acousticness': "CAST({doc}->>'acousticness' AS real)",
+    'instrumentalness': "CAST({doc}->>'instrumentalness' AS real)",
+    'liveness': "CAST({doc}->>'liveness' AS real)",
+    'valence': "CAST({doc}->>'valence' AS real)",
+    'tempo': "CAST({doc}->>'tempo' AS real)",
+    'time_signature': "CAST({doc}->>'time_signature' AS smallint)",
+}
+
+TYPED_COLUMNS = {'sp_track': SP_TRACK_COLUMNS, 'features': FEATURES_COLUMNS}
+
+
+def typed_assignments(json_column: str, doc: str) -> list:
+    """SET clauses computing the typed columns of a JSONB column
+
+    Args:
+        json_column (str): ``sp_track`` or ``features`` (other columns have no typed columns)
+        doc (str): SQL expression of the JSONB document
+
+    Returns:
+        list: ``column = expression`` strings
+    """
+    return [
+        f"{column} = {expression.format(doc=doc)}"
+        for column, expression in TYPED_COLUMNS.get(json_column, {}).items()
+    ]
@@ -0,0 +1,39 @@
+"""Compatibility views exposing the keyed fact tables with their natural keys
+
+The fact tables store integer surrogate keys (``song_key``, ``artist_key``
+and ``country_key``) instead of Spotify IDs and country codes. These views
+join the keys back so queries written against the original
+``spotify_charts``, ``artist_stats`` and ``artist_song`` tables keep working.
+"""
+import sqlalchemy as sa
+
+COMPAT_VIEWS = {
+    'spotify_charts': """
+        SELECT c.date, co.country_code, s.song_id, c.streams, c.total_streams, c.days, c.rank,
+               c.previous_rank, c.rank_change, c.streams_change, c.entry
+        FROM spotify_charts_keyed c
+        JOIN song s ON s.song_key = c.song_key
+        JOIN country co ON co.country_key = c.country_key
+    """,
+    'artist_stats': """
+        SELECT a.spotify_id AS artist_id, st.date, st.total_streams, st.daily_streams, st.listeners
+        FROM artist_stats_keyed st
+        JOIN artist a ON a.artist_key = st.artist_key
+    """,
+    'artist_song': """
+        SELECT a.spotify_id AS artist_id, s.song_id
+        FROM artist_song_keyed ars
+        JOIN artist a ON a.artist_key = ars.artist_key
+        JOIN song s ON s.song_key = ars.song_key
+    """,
+}
+
+
+def create_compat_views(connection):
+    """Create (or replace) the compatibility views
+
+    Args:
+        connection: SQLAlchemy connection
+    """
+    for name, query in COMPAT_VIEWS.items():
+        connection.execute(sa.text(f"CREATE OR REPLACE VIEW {name} AS {query}"))
@@ -5,18 +5,26 @@ from tqdm import tqdm
 from src.extractors.kworb_stats_extractor import fetch_artist_stats, fetch_listeners
 from src.transformers.stats_transformer import normalize_artist_stats, normalize_listeners_data
 from src.loaders.postgres_loader import PostgresLoader
+from src.loaders.parallel_loader import ParallelLoader
+from src.loaders.psycopg_loader import PsycopgLoader
+from src.loaders.spool import BatchSpool
+from src.loaders.aggregates import AggregateRefresher
 from src.config.connection import get_session
-from src.models.database import Artist
+from src.models.database import Artist, Artist_stats
+from src.models.partitions import ensure_partitions_ahead
 from src.models.schema import ensure_schema_exists
 
 
 class ArtistStatsPipeline:
     """Pipeline for fetching and loading artist statistics data"""
 
-    def __init__(self, batch_size: int = 20, max_workers: int = 5):
+    def __init__(self, batch_size: int = 20, max_workers: int = 5, load_workers: int = 1, loader_backend: str = 'sqlalchemy',
+                 spool_dir: str = "data/spool"):
         self.batch_size = batch_size
         self.max_workers = max_workers
-        self.loader = PostgresLoader()
+        self.load_workers = load_workers
+        self.spool_dir = spool_dir
+        self.loader = PsycopgLoader() if loader_backend == 'psycopg' else PostgresLoader()
 
     def extract_artist_stats_batch(self, artist_ids: list) -> list:
         """
@@ -127,6 +135,35 @@ class ArtistStatsPipeline:
         finally:
             session.close()
 
+    def load_stats(self, stats_data: list):
+        """Load artist statistics, spooling them locally if the database fails
+
+        Args:
+            stats_data (list): List of artist statistics
+        """
+        try:
+            if self.load_workers > 1:
+                ParallelLoader(workers=self.load_workers).load_artist_stats(stats_data)
+            else:
+                self.loader.load_artist_stats(stats_data)
+        except Exception as e:
+            print(f"Error loading artist stats: {str(e)}")
+            try:
+                BatchSpool(self.spool_dir).write_artist_stats(stats_data)
+                print(f"Spooled {len(stats_data)} artist stats to {self.spool_dir} for replay")
+            except ImportError as spool_error:
+                print(f"Spooling disabled: {spool_error}")
+            raise
+
+    def prepare_partitions(self):
+        """Create the artist stats partitions of the coming months ahead of time"""
+        session = get_session()
+        try:
+            ensure_partitions_ahead(session, Artist_stats.__tablename__)
+            session.commit()
+        finally:
+            session.close()
+
     def run(self):
         """Run the complete artist stats ETL pipeline"""
         print("Starting Artist Stats ETL Pipeline...")
@@ -135,6 +172,7 @@ class ArtistStatsPipeline:
         try:
             # Ensure database schema exists
             ensure_schema_exists()
+            self.prepare_partitions()
 
             # Extract phase
             print("\n--- EXTRACT PHASE ---")
@@ -157,7 +195,10 @@ class ArtistStatsPipeline:
             # Load phase
             print("\n--- LOAD PHASE ---")
             if enriched_stats:
-                self.loader.load_artist_stats(enriched_stats)
+                self.load_stats(enriched_stats)
+
+                print("\n--- AGGREGATE PHASE ---")
+                AggregateRefresher().refresh_artist_stats(enriched_stats)
 
             elapsed_time = time.time() - start_time
             print(f"\nArtist Stats Pipeline completed successfully in {elapsed_time:.2f} seconds")
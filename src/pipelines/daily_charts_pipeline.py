@@ -1,93 +1,370 @@
 import concurrent.futures
+import itertools
+import queue
+import threading
 import time
+import pandas as pd
 from tqdm import tqdm
 from src.extractors.kworb_charts_extractor import fetch_country_charts
 from src.loaders.postgres_loader import PostgresLoader
+from src.loaders.parallel_loader import ParallelLoader
+from src.loaders.psycopg_loader import PsycopgLoader
+from src.loaders.known_ids import KnownEntityCache
+from src.loaders.spool import BatchSpool, replay_batches
+from src.loaders.aggregates import AggregateRefresher, changed_chart_days, rebuild_regional_charts
+from src.loaders.collab_graph import CollabGraphMetrics
+from src.transformers.chart_movement_transformer import chart_movements
 from src.config.connection import get_session
-from src.models.database import Country
+from src.models.database import Country, Spotify_charts
+from src.models.partitions import ensure_partitions_ahead
 from src.models.schema import ensure_schema_exists
 
 
 class DailyChartsPipeline:
     """Pipeline for fetching and loading daily Spotify charts data"""
 
-    def __init__(self, max_workers: int = 10):
+    def __init__(self, max_workers: int = 10, load_workers: int = 1, loader_backend: str = 'sqlalchemy',
+                 streaming: bool = False, queue_depth: int = 4, spool_dir: str = "data/spool", spool_after: float = 30):
         self.max_workers = max_workers
-        self.loader = PostgresLoader()
+        self.load_workers = load_workers
+        self.streaming = streaming
+        self.queue_depth = queue_depth
+        self.spool_dir = spool_dir
+        self.spool_after = spool_after
+        self._spool = None
+        self.loader = PsycopgLoader() if loader_backend == 'psycopg' else PostgresLoader()
+        self.known_entities = KnownEntityCache()
 
-    def extract_all_countries_charts(self) -> list:
-        """Extract charts data for all countries
+    def get_country_codes(self) -> list:
+        """Get the codes of all countries to fetch charts for
 
         Returns:
-            list: List of chart data dictionaries for all countries
+            list: List of alpha-2 country codes
         """
         session = get_session()
         try:
             countries = session.query(Country).all()
-            country_codes = [country.country_code for country in countries]
-            print(f"Found {len(country_codes)} countries to process")
+            return [country.country_code for country in countries]
+        finally:
+            session.close()
 
-            all_chart_data = []
+    def iter_country_charts(self, country_codes: list):
+        """Fetch country charts concurrently, yielding each one as soon as it is parsed
 
-            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                futures = {executor.submit(fetch_country_charts, code): code for code in country_codes}
+        At most ``max_workers`` fetches are in flight and a new one is only
+        submitted once a result has been taken, so a slow consumer holds
+        back extraction instead of letting results pile up in memory.
+
+        Args:
+            country_codes (list): List of alpha-2 country codes
+
+        Yields:
+            dict: Chart data of one country
+        """
+        codes = iter(country_codes)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor, \
+                tqdm(total=len(country_codes), desc="Fetching country charts") as progress:
+            futures = {}
+            for code in itertools.islice(codes, self.max_workers):
+                futures[executor.submit(fetch_country_charts, code)] = code
+
+            while futures:
+                done, _ = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    country_code = futures.pop(future)
+                    progress.update(1)
+                    for code in itertools.islice(codes, 1):
+                        futures[executor.submit(fetch_country_charts, code)] = code
 
-                for future in tqdm(concurrent.futures.as_completed(futures), total=len(country_codes), desc="Fetching country charts"):
-                    country_code = futures[future]
                     try:
                         data = future.result()
                         if data and data.get('charts'):
-                            all_chart_data.append(data)
                             print(f"Successfully extracted {len(data['charts'])} entries for {country_code}")
+                            yield data
                     except Exception as e:
                         print(f"Error processing {country_code}: {str(e)}")
 
-            return all_chart_data
+    def extract_all_countries_charts(self) -> list:
+        """Extract charts data for all countries
+
+        Returns:
+            list: List of chart data dictionaries for all countries
+        """
+        try:
+            country_codes = self.get_country_codes()
+            print(f"Found {len(country_codes)} countries to process")
+
+            return list(self.iter_country_charts(country_codes))
 
         except Exception as e:
             print(f"Error in extract_all_countries_charts: {str(e)}")
             return []
+
+    def get_spool(self):
+        """Get the local spool, or None when pyarrow is not installed"""
+        if self._spool is None:
+            try:
+                self._spool = BatchSpool(self.spool_dir)
+            except ImportError as e:
+                print(f"Spooling disabled: {e}")
+                return None
+        return self._spool
+
+    def spool_chart_data(self, all_chart_data: list) -> list:
+        """Write chart data that could not be loaded to the local spool
+
+        Args:
+            all_chart_data (list): List of chart data dictionaries
+
+        Returns:
+            list: Names of the spooled batches
+        """
+        spool = self.get_spool()
+        if not spool or not all_chart_data:
+            return []
+        batches = [spool.write_chart_data(chart_data) for chart_data in all_chart_data]
+        print(f"Spooled chart data of {len(all_chart_data)} countries to {self.spool_dir} for replay")
+        return batches
+
+    def prepare_partitions(self):
+        """Create the chart partitions of the coming months ahead of time"""
+        session = get_session()
+        try:
+            ensure_partitions_ahead(session, Spotify_charts.__tablename__)
+            session.commit()
         finally:
             session.close()
 
-    def load_charts_data(self, all_chart_data: list):
-        """Load all extracted chart data into the database
+    def verify_known_entities(self):
+        """Check the known-entity cache against the database before loading"""
+        session = get_session()
+        try:
+            self.known_entities.verify(session)
+        finally:
+            session.close()
+
+    def print_summary(self, loaded_chart_data: list):
+        """Record the loaded entities and print the load summary
 
         Args:
-            all_chart_data (list): List of chart data dictionaries
+            loaded_chart_data (list): Chart data dictionaries that were committed
         """
         total_charts = 0
         total_songs = 0
         total_artists = 0
         total_relationships = 0
 
+        for chart_data in loaded_chart_data:
+            self.known_entities.add_chart_data(chart_data)
+            total_charts += len(chart_data.get('charts', []))
+            total_songs += len(chart_data.get('songs', []))
+            total_artists += len(chart_data.get('artists', []))
+            total_relationships += len(chart_data.get('artist_songs', []))
+        session = get_session()
+        try:
+            self.known_entities.save(session)
+        finally:
+            session.close()
+
+        print(f"\nPipeline Summary:")
+        print(f"- Loaded {total_charts} chart entries")
+        print(f"- Processed {total_songs} new songs")
+        print(f"- Processed {total_artists} new artists")
+        print(f"- Created {total_relationships} artist-song relationships")
+
+    def add_chart_movements(self, all_chart_data: list) -> list:
+        """Add the movement fields to every chart entry and the drop-outs to every country
+
+        The previous day's chart of every (date, country) of the batch is
+        read in a single query, and the whole batch is compared with it at
+        once (see ``src.transformers.chart_movement_transformer``). When the
+        database cannot be read, movements are left unknown so the load can
+        still go ahead (or be spooled).
+
+        Args:
+            all_chart_data (list): List of chart data dictionaries, updated in place
+
+        Returns:
+            list: The same chart data dictionaries
+        """
+        chart_data_list = [chart_data for chart_data in all_chart_data if chart_data and chart_data.get('charts')]
+        charts = [row for chart_data in chart_data_list for row in chart_data['charts']]
+        if not charts:
+            return all_chart_data
+
+        loader = PostgresLoader()
+        try:
+            previous = loader.fetch_previous_charts(changed_chart_days(charts))
+        except Exception as e:
+            print(f"Chart movements left unknown, could not read the previous charts: {e}")
+            return all_chart_data
+        finally:
+            loader.close_session()
+
+        movements, dropouts = chart_movements(pd.DataFrame(charts), previous)
+        for row, movement in zip(charts, movements):
+            row.update(movement)
+
+        dropouts_by_country = {}
+        for dropout in dropouts:
+            dropouts_by_country.setdefault(dropout['country_code'], []).append(dropout)
+        for chart_data in chart_data_list:
+            chart_data['dropouts'] = dropouts_by_country.get(chart_data['charts'][0]['country_code'], [])
+
+        print(f"Computed chart movements of {len(charts)} entries ({len(dropouts)} drop-outs)")
+        return all_chart_data
+
+    def build_regional_charts(self, loaded_chart_data: list):
+        """Rebuild the regional and global charts of the dates that were loaded
+
+        Args:
+            loaded_chart_data (list): Chart data dictionaries that were committed
+        """
+        rebuild_regional_charts(
+            sorted({str(row['date'])[:10] for chart_data in loaded_chart_data for row in chart_data.get('charts', [])})
+        )
+
+    def refresh_aggregates(self, loaded_chart_data: list):
+        """Refresh the dashboard aggregates for the dates and countries that were loaded,
+        then the graph metrics of the collaborations they linked
+
+        Args:
+            loaded_chart_data (list): Chart data dictionaries that were committed
+        """
+        chart_rows = [row for chart_data in loaded_chart_data for row in chart_data.get('charts', [])]
+        AggregateRefresher().refresh_charts(chart_rows)
+        CollabGraphMetrics().refresh()
+
+    def load_charts_data(self, all_chart_data: list) -> list:
+        """Load all extracted chart data into the database
+
+        Args:
+            all_chart_data (list): List of chart data dictionaries
+
+        Returns:
+            list: Chart data dictionaries that were committed
+        """
         try:
-            for chart_data in all_chart_data:
-                if chart_data:
-                    self.loader.load_complete_chart_data(chart_data)
-                    total_charts += len(chart_data.get('charts', []))
-                    total_songs += len(chart_data.get('songs', []))
-                    total_artists += len(chart_data.get('artists', []))
-                    total_relationships += len(chart_data.get('artist_songs', []))
-
-            print(f"\nPipeline Summary:")
-            print(f"- Loaded {total_charts} chart entries")
-            print(f"- Processed {total_songs} songs")
-            print(f"- Processed {total_artists} artists")
-            print(f"- Created {total_relationships} artist-song relationships")
+            # Only send artists, songs and relationships not already in the database
+            self.verify_known_entities()
+            filtered_chart_data = [self.known_entities.filter_chart_data(chart_data) for chart_data in all_chart_data if chart_data]
+
+            if self.load_workers > 1:
+                ParallelLoader(workers=self.load_workers).load_chart_data(filtered_chart_data)
+                loaded_chart_data = filtered_chart_data
+            else:
+                # All countries go through one transaction, with a savepoint per country
+                loaded_chart_data = self.loader.load_charts_unit_of_work(filtered_chart_data)
+
+            self.print_summary(loaded_chart_data)
+            return loaded_chart_data
 
         except Exception as e:
             print(f"Error loading charts data: {str(e)}")
+            # Keep the extracted data so the next attempt does not have to re-crawl
+            self.spool_chart_data([chart_data for chart_data in all_chart_data if chart_data])
             raise
 
+    def write_from_queue(self, chart_queue: queue.Queue, loaded_chart_data: list, errors: list):
+        """Writer loop loading each queued country in a shared unit of work
+
+        Runs until a ``None`` sentinel is received. If the database fails,
+        every country received so far (none of it is committed) and the rest
+        of the queue are spooled, so extraction is never blocked.
+
+        Args:
+            chart_queue (queue.Queue): Queue of chart data dictionaries
+            loaded_chart_data (list): Receives the chart data that was committed
+            errors (list): Receives the exception that stopped the writer, if any
+        """
+        received = []
+        committed = []
+        finished = False
+        try:
+            with self.loader.unit_of_work():
+                while (chart_data := chart_queue.get()) is not None:
+                    received.append(chart_data)
+                    chart_data = self.known_entities.filter_chart_data(chart_data)
+                    if self.loader.load_country_savepoint(chart_data):
+                        committed.append(chart_data)
+                finished = True
+            loaded_chart_data.extend(committed)
+        except Exception as e:
+            errors.append(e)
+            while not finished and (chart_data := chart_queue.get()) is not None:
+                received.append(chart_data)
+            self.spool_chart_data(received)
+
+    def extract_and_load_streaming(self) -> list:
+        """Overlap extraction and loading through a bounded queue
+
+        Each country gets its chart movements and is handed to a dedicated
+        writer thread as soon as it is parsed, so peak memory is bounded by
+        the queue depth rather than the number of countries. When the writer
+        lags behind for more than ``spool_after`` seconds, or has failed,
+        countries go to the local spool instead; the batches this run spooled
+        because of lag are replayed at the end, and returned with the rest so
+        the caller refreshes the aggregates once over both.
+
+        Returns:
+            list: Chart data dictionaries that were committed
+        """
+        country_codes = self.get_country_codes()
+        print(f"Found {len(country_codes)} countries to process")
+        self.verify_known_entities()
+
+        chart_queue = queue.Queue(maxsize=self.queue_depth)
+        loaded_chart_data = []
+        errors = []
+        writer = threading.Thread(target=self.write_from_queue, args=(chart_queue, loaded_chart_data, errors))
+        writer.start()
+
+        spooled = []
+        try:
+            for chart_data in self.iter_country_charts(country_codes):
+                self.add_chart_movements([chart_data])
+                if errors:
+                    spooled += self.spool_chart_data([chart_data])
+                    continue
+                try:
+                    chart_queue.put(chart_data, timeout=self.spool_after if self.get_spool() else None)
+                except queue.Full:
+                    spooled += self.spool_chart_data([chart_data])
+        finally:
+            chart_queue.put(None)
+            writer.join()
+
+        if errors:
+            raise errors[0]
+
+        print(f"Committed chart data for {len(loaded_chart_data)} countries in one transaction")
+        if spooled:
+            replayed = replay_batches(PostgresLoader(bulk_mode=True), self.get_spool(), spooled)
+            print(f"Replayed {len(replayed)}/{len(spooled)} batches spooled by this run")
+            loaded_chart_data.extend(parts for _, parts in replayed)
+        return loaded_chart_data
+
     def run(self):
         """Run the complete daily charts ETL pipeline"""
         print("Starting Daily Charts ETL Pipeline...")
         start_time = time.time()
 
         try:
-            # Ensure database schema exists
+            # Ensure database schema and upcoming partitions exist
             ensure_schema_exists()
+            self.prepare_partitions()
+
+            if self.streaming:
+                print("\n--- EXTRACT & LOAD PHASE (streaming) ---")
+                loaded_chart_data = self.extract_and_load_streaming()
+                self.print_summary(loaded_chart_data)
+                self.build_regional_charts(loaded_chart_data)
+                self.refresh_aggregates(loaded_chart_data)
+
+                elapsed_time = time.time() - start_time
+                print(f"\nDaily Charts Pipeline completed successfully in {elapsed_time:.2f} seconds")
+                return
 
             # Extract data from all countries
             print("\n--- EXTRACT PHASE ---")
@@ -97,9 +374,18 @@ class DailyChartsPipeline:
                 print("No chart data extracted. Pipeline completed with no data.")
                 return
 
+            print("\n--- TRANSFORM PHASE ---")
+            self.add_chart_movements(all_chart_data)
+
             # Load data into database
             print("\n--- LOAD PHASE ---")
-            self.load_charts_data(all_chart_data)
+            loaded_chart_data = self.load_charts_data(all_chart_data)
+
+            print("\n--- REGIONAL CHARTS PHASE ---")
+            self.build_regional_charts(loaded_chart_data)
+
+            print("\n--- AGGREGATE PHASE ---")
+            self.refresh_aggregates(loaded_chart_data)
 
             elapsed_time = time.time() - start_time
             print(f"\nDaily Charts Pipeline completed successfully in {elapsed_time:.2f} seconds")
@@ -6,6 +6,8 @@ from datetime import datetime
 from src.pipelines.daily_charts_pipeline import DailyChartsPipeline
 from src.pipelines.artist_stats_pipeline import ArtistStatsPipeline
 from src.pipelines.spotify_metadata_pipeline import SpotifyMetadataPipeline
+from src.loaders.postgres_loader import PostgresLoader
+from src.loaders.spool import replay_spool
 
 # Setup logging
 logging.basicConfig(
@@ -22,10 +24,11 @@ logger = logging.getLogger(__name__)
 class PipelineOrchestrator:
     """Main orchestrator for all ETL pipelines"""
 
-    def __init__(self):
-        self.daily_charts_pipeline = DailyChartsPipeline()
-        self.artist_stats_pipeline = ArtistStatsPipeline()
-        self.spotify_metadata_pipeline = SpotifyMetadataPipeline()
+    def __init__(self, load_workers: int = 1, loader_backend: str = 'sqlalchemy', streaming: bool = False,
+                 refresh_metadata: bool = False):
+        self.daily_charts_pipeline = DailyChartsPipeline(load_workers=load_workers, loader_backend=loader_backend, streaming=streaming)
+        self.artist_stats_pipeline = ArtistStatsPipeline(load_workers=load_workers, loader_backend=loader_backend)
+        self.spotify_metadata_pipeline = SpotifyMetadataPipeline(refresh=refresh_metadata)
 
     def run_daily_pipeline(self):
         """Run all daily pipelines in sequence"""
@@ -82,6 +85,16 @@ class PipelineOrchestrator:
             logger.error(f"Stats pipeline failed: {str(e)}")
             raise
 
+    def run_replay_only(self):
+        """Bulk-load the batches spooled while the database was unavailable"""
+        logger.info("Replaying spooled batches")
+        try:
+            replay_spool(PostgresLoader(bulk_mode=True))
+            logger.info("Spool replay completed successfully")
+        except Exception as e:
+            logger.error(f"Spool replay failed: {str(e)}")
+            raise
+
     def run_scheduler(self):
         """Run the pipeline on a schedule"""
         try:
@@ -116,13 +129,46 @@ def main():
     parser = argparse.ArgumentParser(description='Spotify Charts ETL Pipeline Orchestrator')
     parser.add_argument(
         '--mode',
-        choices=['daily', 'charts', 'stats', 'metadata', 'scheduler'],
+        choices=['daily', 'charts', 'stats', 'metadata', 'replay', 'scheduler'],
         default='daily',
         help='Pipeline mode to run'
     )
 
+    parser.add_argument(
+        '--load-workers',
+        type=int,
+        default=1,
+        help='Number of parallel database connections used to load charts and stats'
+    )
+    parser.add_argument(
+        '--loader-backend',
+        choices=['sqlalchemy', 'psycopg'],
+        default='sqlalchemy',
+        help='Database driver used to load charts and stats (psycopg uses pipeline mode; '
+             'loads spread over --load-workers always use sqlalchemy)'
+    )
+    parser.add_argument(
+        '--streaming',
+        action='store_true',
+        help='Load each country\'s charts while the remaining countries are still being fetched'
+    )
+    parser.add_argument(
+        '--refresh-metadata',
+        action='store_true',
+        help='Re-fetch the Spotify data of every artist and track, recording popularity, follower and genre changes'
+    )
+
     args = parser.parse_args()
-    orchestrator = PipelineOrchestrator()
+    if args.load_workers > 1 and args.loader_backend != 'sqlalchemy':
+        # ParallelLoader workers always load through PostgresLoader
+        logger.warning(f"--loader-backend {args.loader_backend} is ignored for the loads spread over "
+                       f"--load-workers {args.load_workers}; they use the sqlalchemy backend")
+    orchestrator = PipelineOrchestrator(
+        load_workers=args.load_workers,
+        loader_backend=args.loader_backend,
+        streaming=args.streaming,
+        refresh_metadata=args.refresh_metadata
+    )
 
     try:
         if args.mode == 'daily':
@@ -133,6 +179,8 @@ def main():
             orchestrator.run_stats_only()
         elif args.mode == 'metadata':
             orchestrator.run_metadata_only()
+        elif args.mode == 'replay':
+            orchestrator.run_replay_only()
         elif args.mode == 'scheduler':
             orchestrator.run_scheduler()
 
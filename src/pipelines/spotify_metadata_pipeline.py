@@ -3,13 +3,22 @@ from src.extractors.spotify_api_extractor import SpotifyAPIExtractor
 from src.loaders.postgres_loader import PostgresLoader
 from src.config.connection import get_session
 from src.models.schema import ensure_schema_exists
+from src.models.markets import market_positions
+from src.transformers.track_transformer import project_tracks, extract_albums
 
 
 class SpotifyMetadataPipeline:
     """Pipeline for fetching and loading Spotify metadata (artists and tracks)"""
 
-    def __init__(self, batch_size: int = 500):
+    def __init__(self, batch_size: int = 500, refresh: bool = False):
+        """
+        Args:
+            batch_size (int): Number of artists or tracks per batch
+            refresh (bool): Re-fetch every artist and track rather than only the ones
+                without Spotify data, recording the changes in the history tables
+        """
         self.batch_size = batch_size
+        self.refresh = refresh
         self.extractor = SpotifyAPIExtractor()
         self.loader = PostgresLoader()
 
@@ -26,7 +35,10 @@ class SpotifyMetadataPipeline:
 
             # Extract phase - get missing artist IDs
             print("\n--- EXTRACT PHASE ---")
-            missing_artist_ids = self.extractor.get_missing_artist_ids(session)
+            if self.refresh:
+                missing_artist_ids = self.extractor.get_all_artist_ids(session)
+            else:
+                missing_artist_ids = self.extractor.get_missing_artist_ids(session)
             session.close()
 
             total_artists = len(missing_artist_ids)
@@ -76,7 +88,11 @@ class SpotifyMetadataPipeline:
 
             # Extract phase - get missing track IDs
             print("\n--- EXTRACT PHASE ---")
-            missing_track_ids = self.extractor.get_missing_track_ids(session)
+            if self.refresh:
+                missing_track_ids = self.extractor.get_all_track_ids(session)
+            else:
+                missing_track_ids = self.extractor.get_missing_track_ids(session)
+            positions = market_positions(session)
             session.close()
 
             total_tracks = len(missing_track_ids)
@@ -103,7 +119,12 @@ class SpotifyMetadataPipeline:
                 if track_data or audio_features:
                     print(f"\n--- LOAD PHASE (Batch {i//self.batch_size + 1}) ---")
                     if track_data:
-                        self.loader.update_song_spotify_data(track_data)
+                        # Transform phase - replace the market arrays by bit strings
+                        # and move the albums to their own table
+                        track_data, market_bits = project_tracks(track_data, positions)
+                        track_data, albums, album_ids = extract_albums(track_data)
+                        self.loader.load_albums(albums)
+                        self.loader.update_song_spotify_data(track_data, market_bits, album_ids)
                     if audio_features:
                         self.loader.update_song_audio_features(audio_features)
 
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+# Movement fields stored with every chart entry (all None when unknown)
+MOVEMENT_COLUMNS = ['previous_rank', 'rank_change', 'streams_change', 'entry']
+
+# Values of the entry field
+ENTRY_STAY = 'stay'
+ENTRY_NEW = 'new'
+ENTRY_REENTRY = 'reentry'
+
+CHART_KEYS = ['country_code', 'date', 'song_id']
+
+
+def _records(df: pd.DataFrame) -> list:
+    """Rows of a frame as dictionaries, with missing values as None"""
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+
+def chart_movements(charts: pd.DataFrame, previous: pd.DataFrame) -> tuple:
+    """Compare chart entries with the chart of the previous day in their country
+
+    The previous day is looked up in ``previous`` and in the batch itself,
+    so a batch spanning several days of a country chains correctly. An
+    entry on the previous chart is a ``stay``; otherwise it is ``new`` on
+    its first day on chart (kworb's ``days``) and a ``reentry`` when the
+    previous chart is known. Without a previous chart, the rank and
+    streams changes and the entry of older songs are unknown (None).
+    Songs of the previous chart missing from the day's chart are drop-outs.
+
+    Args:
+        charts (pd.DataFrame): Chart entries with ``country_code``, ``date``,
+            ``song_id``, ``streams``, ``days`` and ``rank`` columns
+        previous (pd.DataFrame): Earlier chart entries with ``country_code``,
+            ``date``, ``song_id``, ``streams`` and ``rank`` columns
+
+    Returns:
+        tuple: Movement rows aligned with ``charts`` (MOVEMENT_COLUMNS keys),
+            and drop-out rows with date, country_code, song_id, last_rank
+            and last_streams
+    """
+    if charts.empty:
+        return [], []
+
+    charts = charts.assign(date=pd.to_datetime(charts['date'])).reset_index(drop=True)
+    previous = previous.assign(date=pd.to_datetime(previous['date']))
+    history = pd.concat([previous[CHART_KEYS + ['rank', 'streams']], charts[CHART_KEYS + ['rank', 'streams']]])
+    history = history.drop_duplicates(CHART_KEYS, keep='last')
+
+    # Every entry moved one day forward, so it lines up with the next day's chart
+    shifted = history.assign(date=history['date'] + pd.Timedelta(days=1)).rename(
+        columns={'rank': 'previous_rank', 'streams': 'previous_streams'}
+    )
+    known_days = shifted[['country_code', 'date']].drop_duplicates().assign(previous_known=True)
+
+    moved = charts.merge(shifted, on=CHART_KEYS, how='left').merge(known_days, on=['country_code', 'date'], how='left')
+    on_previous = moved['previous_rank'].notna().to_numpy()
+    previous_known = moved['previous_known'].notna().to_numpy()
+
+    movements = pd.DataFrame({
+        'previous_rank': moved['previous_rank'].astype('Int64'),
+        'rank_change': (moved['previous_rank'] - moved['rank']).astype('Int64'),
+        'streams_change': (moved['streams'] - moved['previous_streams']).astype('Int64'),
+        'entry': np.select(
+            [on_previous, moved['days'].to_numpy() <= 1, previous_known],
+            [ENTRY_STAY, ENTRY_NEW, ENTRY_REENTRY],
+            default=None,
+        ),
+    })
+
+    # Previous-day entries of the batch's country-days that are not on their chart
+    batch_days = charts[['country_code', 'date']].drop_duplicates()
+    dropped = shifted.merge(batch_days, on=['country_code', 'date']).merge(
+        charts[CHART_KEYS], on=CHART_KEYS, how='left', indicator=True
+    )
+    dropped = dropped[dropped['_merge'] == 'left_only'].sort_values(['country_code', 'date', 'previous_rank'])
+    dropouts = pd.DataFrame({
+        'date': dropped['date'].dt.date,
+        'country_code': dropped['country_code'],
+        'song_id': dropped['song_id'],
+        'last_rank': dropped['previous_rank'].astype('Int64'),
+        'last_streams': dropped['previous_streams'].astype('Int64'),
+    })
+    return _records(movements[MOVEMENT_COLUMNS]), _records(dropouts)
@@ -0,0 +1,43 @@
+import pandas as pd
+
+# Scope of the worldwide chart, next to the regions of the country table
+GLOBAL_SCOPE = 'Global'
+
+
+def build_regional_charts(charts: pd.DataFrame) -> pd.DataFrame:
+    """Sum country charts into regional and global charts and re-rank them
+
+    Every country row is counted once in its region (countries without a
+    region only count towards the global chart) and once in the global
+    chart. Songs are ranked by summed streams within each date and scope,
+    ties going to the best country rank and then to the song key.
+
+    Args:
+        charts (pd.DataFrame): Country chart entries with ``date``, ``region``,
+            ``song_key``, ``streams`` and ``rank`` columns
+
+    Returns:
+        pd.DataFrame: Rows with date, scope, song_key, streams, countries,
+            best_country_rank and rank
+    """
+    columns = ['date', 'scope', 'song_key', 'streams', 'countries', 'best_country_rank', 'rank']
+    if charts.empty:
+        return pd.DataFrame(columns=columns)
+
+    scoped = pd.concat([
+        charts[charts['region'].notna()].assign(scope=lambda df: df['region']),
+        charts.assign(scope=GLOBAL_SCOPE),
+    ], ignore_index=True)
+
+    regional = scoped.groupby(['date', 'scope', 'song_key'], as_index=False, sort=False).agg(
+        streams=('streams', 'sum'),
+        countries=('rank', 'size'),
+        best_country_rank=('rank', 'min'),
+    )
+    regional = regional.sort_values(
+        ['date', 'scope', 'streams', 'best_country_rank', 'song_key'],
+        ascending=[True, True, False, True, True],
+        ignore_index=True,
+    )
+    regional['rank'] = regional.groupby(['date', 'scope'], sort=False).cumcount() + 1
+    return regional[columns]
@@ -0,0 +1,132 @@
+from datetime import date
+
+
+def market_bits(markets: list, positions: dict, length: int) -> str:
+    """Encode a list of market codes as a bit string aligned to the country table
+
+    Args:
+        markets (list): ISO 3166-1 alpha-2 market codes
+        positions (dict): Bit position of each country code (``country_key - 1``)
+        length (int): Number of bits (the highest country key)
+
+    Returns:
+        str: String of '0' and '1', bit ``i`` set when the market at position ``i`` is listed
+    """
+    bits = ['0'] * length
+    for market in markets:
+        position = positions.get(market)
+        if position is not None:
+            bits[position] = '1'
+    return ''.join(bits)
+
+
+def markets_from_bits(bits: str, positions: dict) -> list:
+    """Decode a market bit string back to the sorted list of market codes"""
+    return sorted(code for code, position in positions.items() if position < len(bits) and bits[position] == '1')
+
+
+def project_track(track: dict, positions: dict, length: int) -> tuple:
+    """Drop the market arrays of a Spotify track object and encode them as a bit string
+
+    The track and its album each carry an ``available_markets`` array of
+    up to ~185 codes, which make up most of the object. Both are removed;
+    the track's markets (or the album's when the track has none) are kept
+    as a bit string instead.
+
+    Args:
+        track (dict): Track object from the Spotify API
+        positions (dict): Bit position of each country code
+        length (int): Number of bits
+
+    Returns:
+        tuple: Slimmed track object and its market bit string (None when no markets were listed)
+    """
+    slim = {key: value for key, value in track.items() if key != 'available_markets'}
+    album = track.get('album')
+    if isinstance(album, dict):
+        slim['album'] = {key: value for key, value in album.items() if key != 'available_markets'}
+
+    markets = track.get('available_markets')
+    if markets is None and isinstance(album, dict):
+        markets = album.get('available_markets')
+    return slim, (market_bits(markets, positions, length) if markets is not None else None)
+
+
+def project_tracks(tracks: list, positions: dict) -> tuple:
+    """Project a batch of Spotify track objects
+
+    Args:
+        tracks (list): Track objects from the Spotify API
+        positions (dict): Bit position of each country code
+
+    Returns:
+        tuple: List of slimmed track objects and mapping of track id to market bit string
+    """
+    length = max(positions.values(), default=-1) + 1
+    slim_tracks, bits = [], {}
+    for track in tracks:
+        if not track:
+            continue
+        slim, track_bits = project_track(track, positions, length)
+        slim_tracks.append(slim)
+        bits[track['id']] = track_bits
+    return slim_tracks, bits
+
+
+def parse_release_date(value: str) -> date:
+    """Parse a Spotify release date of year, month or day precision
+
+    Args:
+        value (str): '2019', '2019-03' or '2019-03-08'
+
+    Returns:
+        date: First day of the period, or None for missing and placeholder
+            ('0000', '2019-00-00') or otherwise invalid dates
+    """
+    if not value:
+        return None
+    parts = [int(part) for part in value.split('-')] + [1, 1]
+    if min(parts[:3]) < 1:
+        return None
+    try:
+        return date(parts[0], parts[1], parts[2])
+    except ValueError:
+        return None
+
+
+def extract_albums(tracks: list) -> tuple:
+    """Move the album objects out of a batch of Spotify track objects
+
+    Each album is returned once however many of its tracks are in the
+    batch. Tracks keep a stub of their album (id and release date) so the
+    song's typed release columns can still be derived from ``sp_track``.
+
+    Args:
+        tracks (list): Track objects from the Spotify API
+
+    Returns:
+        tuple: List of tracks with album stubs, list of album rows for the
+            album table, and mapping of track id to album id
+    """
+    slim_tracks, albums, album_ids = [], {}, {}
+    for track in tracks:
+        album = track.get('album')
+        if not isinstance(album, dict) or not album.get('id'):
+            slim_tracks.append(track)
+            continue
+
+        albums[album['id']] = {
+            'album_id': album['id'],
+            'name': album.get('name'),
+            'album_type': album.get('album_type'),
+            'release_date': parse_release_date(album.get('release_date')),
+            'release_date_precision': album.get('release_date_precision'),
+            'total_tracks': album.get('total_tracks'),
+            'sp_album': album,
+        }
+        album_ids[track['id']] = album['id']
+        slim_tracks.append({
+            **track,
+            'album': {key: album.get(key) for key in ('id', 'release_date', 'release_date_precision')}
+        })
+    return slim_tracks, list(albums.values()), album_ids